@@ -47,12 +47,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista: mede o tempo total (Server-Timing e /metrics).
+    'roundRobin.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # Cookie de read-your-writes depois de um "Salvar" (réplica de leitura).
+    'roundRobin.replica.PrimaryPinMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -60,7 +64,8 @@ ROOT_URLCONF = 'ipx1.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com medição do tempo de renderização (roundRobin/metrics.py).
+        'BACKEND': 'roundRobin.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,19 +79,94 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ipx1.wsgi.application'
+ASGI_APPLICATION = 'ipx1.asgi.application'
+
+# Páginas públicas nas versões async (roundRobin/async_views.py). Em produção
+# o gunicorn roda com o worker do uvicorn (ASGI), onde elas rendem mais.
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS', 'True').lower() == 'true'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL'), # Lê a URL do .env.prod
-        conn_max_age=600,
+# PostgreSQL: psycopg 3 com o pool de conexões do próprio Django (um pool por
+# worker; cada requisição pega uma conexão e devolve no fim). Com o pool,
+# CONN_MAX_AGE tem de ser 0. Outros bancos (SQLite local) seguem com conexões
+# persistentes.
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # espera por uma conexão livre
+# Testa cada conexão (SELECT vazio) antes de entregá-la: conexões mortas
+# (reinício do Postgres, failover) são descartadas em vez de quebrar a requisição.
+DB_POOL_HEALTH_CHECK = os.environ.get('DB_POOL_HEALTH_CHECK', 'True').lower() == 'true'
+
+
+def database_config(url):
+    config = dj_database_url.parse(
+        url,
         ssl_require=False # Comece com False. Se o OCI exigir, mude para True.
     )
+    if config['ENGINE'] == 'django.db.backends.postgresql':
+        pool = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': 300,
+        }
+        config.setdefault('OPTIONS', {})['pool'] = pool
+        # Com o pool, o Django liga o check do psycopg_pool por CONN_HEALTH_CHECKS.
+        config['CONN_HEALTH_CHECKS'] = DB_POOL_HEALTH_CHECK
+    else:
+        config['CONN_MAX_AGE'] = 600
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+DATABASES = {
+    'default': database_config(os.environ.get('DATABASE_URL')), # Lê a URL do .env.prod
 }
 
+# Réplica de leitura (opcional) para as páginas públicas: ver roundRobin/replica.py.
+# Sem DATABASE_REPLICA_URL tudo vai para o primário. Nos testes a réplica é um
+# segundo banco de teste (ex.: DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3).
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = database_config(os.environ['DATABASE_REPLICA_URL'])
+
+DATABASE_ROUTERS = ['roundRobin.replica.PrimaryReplicaRouter']
+
+# Read-your-writes: depois de um "Salvar", as leituras ficam no primário por
+# este tempo (deve cobrir o atraso da réplica).
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Cache em arquivo: é compartilhado pelos workers do gunicorn (mesmo container)
+# e não precisa de nenhum serviço extra (Redis/Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '/var/tmp/ipx1_cache'),
+        'TIMEOUT': 60 * 60 * 24,
+        # Páginas + um fragmento por rodada encerrada (o padrão é só 300).
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+
+# Métricas por requisição (roundRobin/metrics.py): cada worker grava seus
+# histogramas neste diretório, e /metrics soma todos.
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_DIR = os.environ.get('METRICS_DIR', '/var/tmp/ipx1_metrics')
+
+
+# Páginas públicas pré-renderizadas (roundRobin/publishing.py), servidas
+# direto pelo nginx. Vazio = desligado (tudo passa pelo Django).
+
+PUBLISH_ROOT = os.environ.get('PUBLISH_ROOT', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -150,6 +230,24 @@ else:
     STATIC_ROOT = BASE_DIR / 'staticfiles'
     MEDIA_URL = '/media/'
 
+# Estáticos com hash do conteúdo no nome + cópias .gz/.br (roundRobin/storage.py);
+# o nginx os serve com cache "immutable". Só vale depois de um collectstatic
+# (o manifesto e os arquivos com hash ficam no STATIC_ROOT), então é ligado
+# explicitamente onde o deploy roda o collectstatic (STATIC_MANIFEST=True no
+# docker-compose.prod.yml); runserver, seed_and_bench e testes usam o simples.
+# O 'default' continua o FileSystemStorage (o DEFAULT_FILE_STORAGE acima não é
+# mais lido desde o Django 5.1).
+STATIC_MANIFEST = os.environ.get('STATIC_MANIFEST', 'False').lower() == 'true'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'roundRobin.storage.PrecompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,27 +1,167 @@
+from django import forms
 from django.contrib import admin, messages
 from django.db import transaction
+from django.db.models import Max
+
+from .models import Tournament, Player, Match, Game, Bracket, BracketMatch, StatEvent
+from .models import STATUS_COMPLETED, TOTAL_ROUNDS, round_choices
+from .schedule import generate_schedule
+from .ledger import settle_matches
+from .stats import MissingWinConditionError
+from . import standings
+from . import ratings
+from . import snapshots
+from . import playoffs
+from . import caching
+from . import events
+
+# --- CAMPEONATOS (TEMPORADAS) ---
+@admin.register(Tournament)
+class TournamentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'created_at')
+    readonly_fields = ('is_active',)
+    actions = ['activate_tournament']
+
+    @admin.action(description="Ativar o campeonato selecionado")
+    def activate_tournament(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Selecione exatamente 1 campeonato.", messages.ERROR)
+            return
+        tournament = queryset.get()
+        tournament.activate()
+        self.message_user(request, f"'{tournament}' agora é o campeonato ativo.", messages.SUCCESS)
+
+
+class TournamentFilter(admin.SimpleListFilter):
+    """ Por padrão a lista mostra só os confrontos do campeonato ativo. """
+    title = "Campeonato"
+    parameter_name = 'tournament'
+    ALL = 'all'
+
+    def lookups(self, request, model_admin):
+        return [*((str(t.pk), t.name) for t in Tournament.objects.all()), (self.ALL, "Todos")]
+
+    def value(self):
+        value = super().value()
+        if value is None:
+            if not hasattr(self, '_current'):
+                self._current = str(Tournament.objects.current().pk)
+            return self._current
+        return value
+
+    def choices(self, changelist):
+        # Sem a opção "Todos" padrão (ela cairia no campeonato ativo).
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if self.value() == self.ALL:
+            return queryset
+        return queryset.filter(tournament_id=self.value())
+
+
+# --- PLAYOFFS ---
+class BracketMatchForm(forms.ModelForm):
+
+    class Meta:
+        model = BracketMatch
+        fields = ('winner',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # O vencedor só pode ser um dos dois jogadores do confronto.
+        players = [p for p in (self.instance.player1_id, self.instance.player2_id) if p]
+        self.fields['winner'].queryset = Player.objects.filter(pk__in=players)
+
+
+class BracketMatchInline(admin.TabularInline):
+    model = BracketMatch
+    form = BracketMatchForm
+    fields = ('stage', 'position', 'player1', 'player2', 'winner')
+    readonly_fields = ('stage', 'position', 'player1', 'player2')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False  # os confrontos são criados a partir da classificação
+
+
+@admin.register(Bracket)
+class BracketAdmin(admin.ModelAdmin):
+    list_display = ('tournament', 'size', 'created_at')
+    inlines = [BracketMatchInline]
+
+    def get_readonly_fields(self, request, obj=None):
+        # Trocar campeonato/tamanho depois de gerada desmontaria a chave.
+        return ('tournament', 'size') if obj else ()
+
+    def get_inline_instances(self, request, obj=None):
+        return super().get_inline_instances(request, obj) if obj else []
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            # Cabeças de chave: os `size` primeiros da classificação (LIMIT no SQL).
+            playoffs.seed_bracket(obj)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        obj: Bracket = form.instance
+        # Vencedores avançam para a fase seguinte; resultados corrigidos desfazem o avanço.
+        playoffs.propagate(obj)
+        caching.bump_version_on_commit()
+        caching.bump_bracket_on_commit(obj.pk)
 
-from .models import Player, Match, Game 
-from .models import MATCH_FARM_LIMIT, WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM, WIN_CONDITION_FIRST_BLOOD
-from .models import STATUS_COMPLETED
 
-class MissingWinConditionError(Exception):
-    """Raised when a Game is missing its win_condition."""
-    pass
-    
 # --- ADMIN DO PLAYER (O SEU ORIGINAL, SEM 'is_approved') ---
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     list_display = ('username', 'wins', 'losses', 'winrate')
     search_fields = ('username',)
     # (Removido 'is_approved' do list_display e list_filter)
+    actions = ['generate_round_robin']
+
+    @admin.action(description="Gerar tabela round-robin com os jogadores selecionados")
+    def generate_round_robin(self, request, queryset):
+        player_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        if len(player_ids) < 2:
+            self.message_user(request, "Selecione pelo menos 2 jogadores.", messages.ERROR)
+            return
+
+        # As novas rodadas começam depois da última que já existe no campeonato ativo.
+        tournament = Tournament.objects.current()
+        last_round = tournament.matches.aggregate(last=Max('round_number'))['last'] or 0
+        created = generate_schedule(player_ids, tournament=tournament, first_round=last_round + 1)
+        self.message_user(request, f"{len(created)} confrontos criados a partir da Rodada {last_round + 1}.", messages.SUCCESS)
+
+
+# --- LIVRO-RAZÃO DAS ESTATÍSTICAS (SOMENTE LEITURA, AUDITORIA) ---
+@admin.register(StatEvent)
+class StatEventAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'player', 'kind', 'match_id', 'game_id', 'wins', 'losses', 'total_farm', 'total_kills', 'total_deaths')
+    list_filter = ('kind',)
+    search_fields = ('player__username',)
+    list_select_related = ('player',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 # --- O "EDITOR DE JOGOS" (MD3) ---
 class GameInline(admin.TabularInline):
     model = Game
     fields = ('game_number', 'winner', 'win_condition', 'duration', 'player1_farm', 'player2_farm')
-    readonly_fields = ('is_processed',)
     extra = 3
     max_num = 3
     autocomplete_fields = ('winner',)
@@ -55,17 +195,26 @@ class MatchAdmin(admin.ModelAdmin):
     # (Corrigido para usar 'series_winner' e remover 'win_condition')
     list_display = (
         '__str__',
+        'tournament',
         'status',
         'round_number',
         'series_winner', 
         'scheduled_time',
         'is_wo',
     )
-    list_filter = ('status', 'round_number', 'scheduled_time', 'is_wo')
+    list_filter = (TournamentFilter, 'status', 'round_number', 'scheduled_time', 'is_wo')
     inlines = [GameInline]
     
     # (Corrigido para usar 'series_winner')
     autocomplete_fields = ('player1', 'player2', 'series_winner')
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        # As rodadas oferecidas acompanham a tabela do campeonato ativo:
+        # pelo menos TOTAL_ROUNDS, ou a última rodada existente + 1.
+        if db_field.name == 'round_number':
+            last_round = Tournament.objects.current().matches.aggregate(last=Max('round_number'))['last'] or 0
+            kwargs['widget'] = forms.Select(choices=round_choices(max(TOTAL_ROUNDS, last_round + 1)))
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
     
     # --- LÓGICA DE EXIBIÇÃO ---
     def get_fieldsets(self, request, obj=None):
@@ -99,108 +248,66 @@ class MatchAdmin(admin.ModelAdmin):
         return ()
 
 
+    def save_model(self, request, obj, form, change):
+        # Guarda o retrato do confronto ANTES do save, para aplicar só o
+        # delta na tabela de classificação (Standing) depois.
+        obj._standing_before = standings.stored_snapshot(obj.pk) if change else None
+        super().save_model(request, obj, form, change)
+
     # --- A LÓGICA DE PROCESSAMENTO (MD3) ---
     @transaction.atomic
     def save_related(self, request, form, formsets, change):
         super().save_related(request, form, formsets, change)
 
         obj: Match = form.instance 
-        player1 = obj.player1
-        player2 = obj.player2
-        
-        # --- 1. REVERTER ESTATÍSTICAS ---
-        # Sempre reverta primeiro, para o caso de uma partida
-        # normal estar sendo convertida para W.O.
-        games_to_revert = obj.games.filter(is_processed=True, winner__isnull=False)
-
-        for game in games_to_revert:
-            game: Game 
-            loser = game.match.player2 if game.winner == game.match.player1 else game.match.player1
-            winner_farm = game.player1_farm if game.winner == game.match.player1 else game.player2_farm
-            loser_farm = game.player2_farm if game.winner == game.match.player1 else game.player1_farm
-
-            game.winner.remove_match_result(
-                did_win=True, farm=winner_farm,
-                win_condition=game.win_condition, 
-                match_duration=game.duration
-            )
-            loser.remove_match_result(
-                did_win=False, farm=loser_farm,
-                win_condition=game.win_condition, 
-                match_duration=game.duration
-            )
+        self.process_series(request, obj)
 
-        obj.games.update(is_processed=False)
-        
-        # --- 2. LÓGICA DE W.O. ---
-        if obj.is_wo:
+        # Atualiza a classificação materializada pelo delta do confronto.
+        standings.record_match_change(getattr(obj, '_standing_before', None), obj)
+        # E a classificação por rodada (gráfico), da rodada do confronto em diante.
+        snapshots.record_match_change(getattr(obj, '_standing_before', None), obj)
+
+        # Invalida o cache das páginas públicas (e o fragmento da rodada na
+        # lista de partidas) e avisa o feed ao vivo, tudo só depois do commit.
+        caching.bump_version_on_commit()
+        caching.bump_round_on_commit(obj.tournament_id, obj.round_number)
+        events.publish_on_commit('series', events.series_event(obj))
+
+    def process_series(self, request, obj):
+        # --- 1. LÓGICA DE W.O. (validação) ---
+        if obj.is_wo and not obj.series_winner:
             # Se for W.O., verifique se o admin selecionou um vencedor
-            if not obj.series_winner:
-                self.message_user(request, "ERRO: Se 'Vitória por W.O.' está marcada, você DEVE selecionar um 'Vencedor da Série'.", messages.ERROR)
-                raise transaction.TransactionManagementError("W.O. must have a series_winner.")
-            
+            self.message_user(request, "ERRO: Se 'Vitória por W.O.' está marcada, você DEVE selecionar um 'Vencedor da Série'.", messages.ERROR)
+            raise transaction.TransactionManagementError("W.O. must have a series_winner.")
+
+        if obj.is_wo:
             # Garanta que o status seja 'Concluída'
             obj.status = STATUS_COMPLETED
-            obj.save()
-            
+
+        # --- 2. REVERTER E REAPLICAR ESTATÍSTICAS (em lote) ---
+        # Sempre reverte os jogos já processados (para o caso de uma partida
+        # normal estar sendo convertida para W.O.) e reaplica os jogos se a
+        # série estiver 'Concluída'. Tudo somado em memória: uma UPDATE por
+        # jogador (ver roundRobin/stats.py).
+        try:
+            scores = settle_matches([obj])
+        except MissingWinConditionError as error:
+            self.message_user(request, f"ERRO: A 'Condição de Vitória' do Jogo {error.game_number} não foi preenchida.", messages.ERROR)
+            raise
+
+        # --- 3. RATING (Glicko) pelo placar da série, na mesma transação ---
+        ratings.rate_match(getattr(obj, '_standing_before', None), obj, scores[obj.pk])
+
+        obj.save()
+
+        if obj.is_wo:
             self.message_user(request, f"Partida salva como W.O. para {obj.series_winner.username}. Apenas 3 pontos de série foram dados (sem K/D/Farm).", messages.SUCCESS)
-            
-            # Pula todo o processamento de jogos
             return
 
-        # --- 3. LÓGICA DE PARTIDA NORMAL (SÓ RODA SE NÃO FOR W.O.) ---
-        
-        # Reseta o vencedor da série (será recalculado) se não for WO
-        obj.series_winner = None
-        
         if obj.status != STATUS_COMPLETED:
-            obj.save()
             self.message_user(request, "Estatísticas da série foram revertidas (status não 'Concluída').", messages.WARNING)
             return
 
-        all_completed_games = obj.games.filter(winner__isnull=False)
-
-        p1_series_wins = 0
-        p2_series_wins = 0
-
-        for game in all_completed_games:
-            game: Game
-
-            loser = player2 if game.winner == player1 else player1
-            winner_farm = game.player1_farm if game.winner == player1 else game.player2_farm
-            loser_farm = game.player2_farm if game.winner == player1 else game.player1_farm
-            
-            if game.win_condition == None:
-                self.message_user(request, f"ERRO: A 'Condição de Vitória' do Jogo {game.game_number} não foi preenchida.", messages.ERROR)
-                raise MissingWinConditionError(f"Condição de Vitória obrigatória para o Jogo {game.game_number}.")
-            
-            game.winner.add_match_result(
-                did_win=True, farm=winner_farm,
-                win_condition=game.win_condition, 
-                match_duration=game.duration
-            )
-
-            loser.add_match_result(
-                did_win=False, farm=loser_farm,
-                win_condition=game.win_condition, 
-                match_duration=game.duration
-            )
-            
-            if game.winner == player1:
-                p1_series_wins += 1
-            else:
-                p2_series_wins += 1
-
-            game.is_processed = True
-            game.save()
-
-        if p1_series_wins >= 2:
-            obj.series_winner = player1
-        elif p2_series_wins >= 2:
-            obj.series_winner = player2
-
-        obj.save()
-        
         self.message_user(request, 
                           "Estatísticas da série (partida normal) foram recalculadas e salvas com sucesso.", 
-                          messages.SUCCESS)
\ No newline at end of file
+                          messages.SUCCESS)
@@ -0,0 +1,221 @@
+"""
+API JSON somente leitura (overlays da live, bots).
+
+As respostas têm ETag/Last-Modified derivados da versão do campeonato
+(ver caching.py), que é lida do cache sem tocar no banco. Um cliente que
+repete a consulta com If-None-Match recebe 304 sem que as consultas de
+classificação rodem.
+"""
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import attrgetter
+
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotFound
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+
+from .caching import cached_page, get_version, get_version_time
+from .models import Match, Standing, StandingSnapshot
+from .replica import replica_reads
+from . import h2h
+from . import playoffs
+from . import standings
+
+JSON_COMPACT = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def tournament_etag(request, *args, **kwargs):
+    # A query string entra no ETag: /api/matches?round=1 e ?round=2 diferem.
+    # ETag fraca: a mesma versão pode ir comprimida (gzip) ou não.
+    return f'W/"v{get_version()}-{request.get_full_path()}"'
+
+
+def tournament_last_modified(request, *args, **kwargs):
+    timestamp = get_version_time()
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def api_view(name, params=()):
+    """ GET + 304 condicional + gzip + cache compartilhado + leitura na réplica, nesta ordem. """
+    def decorator(view_func):
+        view_func = cached_page(f"api:{name}", params)(replica_reads(view_func))
+        view_func = gzip_page(view_func)
+        view_func = condition(etag_func=tournament_etag, last_modified_func=tournament_last_modified)(view_func)
+        return require_GET(view_func)
+    return decorator
+
+
+def json_response(data):
+    return JsonResponse(data, json_dumps_params=JSON_COMPACT)
+
+
+def _seconds(duration):
+    return int(duration.total_seconds()) if duration is not None else None
+
+
+def serialize_standing(position, standing):
+    return {
+        'position': position,
+        'username': standing.player.username,
+        'points': standing.points,
+        'played': standing.series_played,
+        'wins': standing.series_wins,
+        'losses': standing.series_losses,
+        'kd': standing.kill_death_balance,
+        'farm': standing.total_farm,
+        'avg_win_time': _seconds(standing.average_win_time),
+        'rating': round(standing.rating, 1),
+        'rating_deviation': round(standing.rating_deviation, 1),
+    }
+
+
+def serialize_match(match):
+    return {
+        'id': match.pk,
+        'round': match.round_number,
+        'status': match.status,
+        'player1': match.player1.username,
+        'player2': match.player2.username,
+        'winner': match.series_winner.username if match.series_winner else None,
+        'wo': match.is_wo,
+        'score': [match.player1_game_wins, match.player2_game_wins],
+        'scheduled_time': match.scheduled_time.isoformat() if match.scheduled_time else None,
+        'games': [
+            {
+                'n': game.game_number,
+                'winner': game.winner_id and (
+                    match.player1.username if game.winner_id == match.player1_id else match.player2.username
+                ),
+                'condition': game.win_condition,
+                'duration': _seconds(game.duration),
+                'farm': [game.player1_farm, game.player2_farm],
+            }
+            for game in match.games.all()
+        ],
+    }
+
+
+@api_view('leaderboard')
+def api_leaderboard(request):
+    rows = standings.apply_head_to_head(
+        Standing.objects.filter(tournament__is_active=True).select_related('player')
+    )
+    return json_response({
+        'version': get_version(),
+        'standings': [serialize_standing(i, s) for i, s in enumerate(rows, start=1)],
+    })
+
+
+@api_view('standings-history')
+def api_standings_history(request):
+    """
+    Posição e pontos de cada jogador ao fim de cada rodada (gráfico), da
+    tabela StandingSnapshot, em uma consulta. Jogadores na ordem da última rodada.
+    """
+    rows = (
+        StandingSnapshot.objects.filter(tournament__is_active=True)
+        .order_by('round_number', 'position')
+        .values_list('round_number', 'player__username', 'position', 'points')
+    )
+    rounds = []
+    players = {}
+    for round_number, username, position, points in rows:
+        if not rounds or rounds[-1] != round_number:
+            rounds.append(round_number)
+        series = players.setdefault(username, {'username': username, 'positions': [], 'points': []})
+        missing = len(rounds) - 1 - len(series['positions'])  # jogador que entrou depois
+        series['positions'].extend([None] * missing + [position])
+        series['points'].extend([None] * missing + [points])
+
+    last_round = sorted(players.values(), key=lambda series: series['positions'][-1])
+    return json_response({'version': get_version(), 'rounds': rounds, 'players': last_round})
+
+
+@api_view('matches', params=('round',))
+def api_matches(request):
+    matches = (
+        Match.objects
+        .filter(tournament__is_active=True)
+        .select_related('player1', 'player2', 'series_winner')
+        .prefetch_related('games')
+        .order_by('round_number', 'scheduled_time', 'pk')
+    )
+    if request.GET.get('round'):
+        try:
+            matches = matches.filter(round_number=int(request.GET['round']))
+        except ValueError:
+            return HttpResponseBadRequest("'round' deve ser um número inteiro.")
+
+    rounds = [
+        {'round': round_number, 'matches': [serialize_match(m) for m in round_matches]}
+        for round_number, round_matches in groupby(matches, key=attrgetter('round_number'))
+    ]
+    return json_response({'version': get_version(), 'rounds': rounds})
+
+
+def serialize_bracket_match(match):
+    return {
+        'stage': match.stage,
+        'position': match.position,
+        'player1': match.player1.username if match.player1 else None,
+        'player2': match.player2.username if match.player2 else None,
+        'seeds': [match.seed1, match.seed2],
+        'winner': match.winner.username if match.winner else None,
+    }
+
+
+@api_view('playoffs')
+def api_playoffs(request):
+    bracket = playoffs.active_bracket()
+    if bracket is not None:
+        matches = playoffs.bracket_matches(bracket)
+        first_stage = [m for m in matches if m.stage == 1]
+        seeds = sorted(
+            (seed, player.username)
+            for m in first_stage for seed, player in ((m.seed1, m.player1), (m.seed2, m.player2))
+        )
+        return json_response({
+            'version': get_version(),
+            'enough_players': True,
+            'seeds': [{'seed': seed, 'username': username} for seed, username in seeds],
+            'bracket': {
+                'size': bracket.size,
+                'matches': [serialize_bracket_match(m) for m in matches],
+                'champion': matches[-1].winner.username if matches and matches[-1].winner else None,
+            },
+        })
+
+    top = standings.top_standings(
+        Standing.objects.filter(tournament__is_active=True).select_related('player'), playoffs.PREVIEW_SIZE
+    )
+    return json_response({
+        'version': get_version(),
+        'enough_players': len(top) == playoffs.PREVIEW_SIZE,
+        'seeds': [{'seed': i, 'username': s.player.username} for i, s in enumerate(top, start=1)],
+        'bracket': None,
+    })
+
+
+@api_view('h2h')
+def api_head_to_head(request, player1, player2):
+    """ Retrospecto entre dois jogadores no campeonato ativo (matriz de h2h.py, O(1)). """
+    rows = dict(
+        (username, (player_id, tournament_id))
+        for username, player_id, tournament_id in Standing.objects.filter(
+            tournament__is_active=True, player__username__in=[player1, player2]
+        ).values_list('player__username', 'player_id', 'tournament_id')
+    )
+    missing = [name for name in (player1, player2) if name not in rows]
+    if missing:
+        return HttpResponseNotFound(f"Jogador não encontrado: {', '.join(missing)}")
+
+    (a, tournament_id), (b, _) = rows[player1], rows[player2]
+    record = h2h.get_matrix(tournament_id).record(a, b)
+    return json_response({
+        'version': get_version(),
+        'player1': player1,
+        'player2': player2,
+        **record,
+    })
@@ -0,0 +1,100 @@
+"""
+Versões async das páginas públicas (ORM async do Django), servidas quando
+ASYNC_PUBLIC_VIEWS está ligado (ver urls.py) sob o worker ASGI (uvicorn).
+
+As consultas e a montagem do contexto são as mesmas de views.py; muda só o
+acesso ao banco e ao cache (async for / afirst / cache.a*). O que continua
+síncrono por natureza (matriz de confronto direto, fragmento da chave dos
+playoffs) roda via sync_to_async, sem bloquear o event loop.
+
+Obs.: o ORM async do Django ainda executa o SQL em uma thread (o driver é
+síncrono); o ganho é o worker não ficar preso enquanto espera o banco e o
+cache, e sim atender outras requisições no mesmo processo.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import render
+
+from .caching import cached_page
+from .replica import replica_reads
+from .models import Match, Bracket, Standing, STATUS_SCHEDULED
+from .views import (
+    STATUSES, round_summary, finished_round_keys, live_matches_queryset, assemble_rounds,
+    parse_cursor, profile_players, profile_matches, history_page_queryset, profile_context,
+)
+from . import playoffs
+from . import standings
+
+
+@cached_page('leaderboard')
+@replica_reads
+async def leaderboard_view(request):
+    rows = [
+        standing async for standing in
+        Standing.objects.filter(tournament__is_active=True).select_related('player')
+    ]
+    return render(request, 'roundRobin/leaderboard.html', {
+        'standings': await sync_to_async(standings.apply_head_to_head)(rows),
+    })
+
+
+@cached_page('playoffs')
+@replica_reads
+async def playoffs_view(request):
+    bracket = await Bracket.objects.filter(tournament__is_active=True).afirst()
+    if bracket is not None:
+        return render(request, 'roundRobin/playoffs.html', {
+            'bracket_html': await sync_to_async(playoffs.render_bracket)(bracket),
+            'not_enough_players': False,
+        })
+
+    top = await sync_to_async(standings.top_standings)(
+        Standing.objects.filter(tournament__is_active=True).select_related('player'), playoffs.PREVIEW_SIZE
+    )
+    if len(top) < playoffs.PREVIEW_SIZE:
+        return render(request, 'roundRobin/playoffs.html', {'not_enough_players': True})
+
+    return render(request, 'roundRobin/playoffs.html', {
+        'bracket_html': playoffs.render_preview([s.player for s in top]),
+        'is_preview': True,
+        'not_enough_players': False,
+    })
+
+
+@cached_page('match-list')
+@replica_reads
+async def match_list_view(request):
+    matches = Match.objects.filter(tournament__is_active=True)
+
+    rounds = [row async for row in round_summary(matches)]
+    finished_keys = await sync_to_async(finished_round_keys)(rounds)
+    fragments = await cache.aget_many(finished_keys.values())
+    cached_html = {
+        number: fragments[key] for number, key in finished_keys.items() if key in fragments
+    }
+
+    live_matches = []
+    if len(cached_html) < len(rounds):
+        # async for já aplica o prefetch_related('games').
+        live_matches = [match async for match in live_matches_queryset(matches, cached_html.keys())]
+
+    rounds_data, new_fragments = assemble_rounds(rounds, finished_keys, cached_html, live_matches)
+    if new_fragments:
+        await cache.aset_many(new_fragments, None)
+
+    return render(request, 'roundRobin/match_list.html', {'rounds_list': rounds_data, **STATUSES})
+
+
+@cached_page('player-profile', params=('after',))
+@replica_reads
+async def player_profile_view(request, username):
+    player = await profile_players().filter(username=username).afirst()
+    if player is None:
+        raise Http404("Jogador não encontrado.")
+
+    matches = profile_matches(player)
+    cursor = parse_cursor(request.GET.get('after'))
+    page = [match async for match in history_page_queryset(matches, cursor)]
+    upcoming = [match async for match in matches.filter(status=STATUS_SCHEDULED)[:5]]
+    return render(request, 'roundRobin/player_profile.html', profile_context(player, page, upcoming, cursor))
@@ -0,0 +1,244 @@
+"""
+Benchmark de ponta a ponta (usado pelo comando seed_and_bench).
+
+Cada "alvo" é uma requisição feita pelo Client de teste do Django: as URLs
+públicas (GET) e o "Salvar" de um confronto no admin (POST com os 3 jogos).
+As requisições rodam em um pool de threads (cada thread com seu Client e sua
+conexão com o banco); as primeiras `warmup` não entram nas estatísticas.
+Com --asgi, as páginas públicas também são medidas pelo handler ASGI, nas
+versões sync e async (run_asgi_target).
+"""
+import asyncio
+import itertools
+import math
+import random
+import re
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from .models import STATUS_COMPLETED
+from .synthetic import random_series
+from .urls import build_urlpatterns
+
+PUBLIC_URLS = (
+    'leaderboard', 'match-list', 'playoffs', 'livestream',
+    'api-leaderboard', 'api-matches', 'api-playoffs',
+)
+ADMIN_SAVE = 'admin-save'
+
+
+def percentile(values, pct):
+    """ Percentil pelo método nearest-rank (values já ordenado). """
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def bench_host():
+    # Sem setup_test_environment o host 'testserver' não está em ALLOWED_HOSTS.
+    return next((h for h in settings.ALLOWED_HOSTS if h and h != '*' and not h.startswith('.')), 'localhost')
+
+
+def make_client(user=None):
+    client = Client(raise_request_exception=False, HTTP_HOST=bench_host())
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def get_request(url_name):
+    path = reverse(url_name)
+    return lambda client, index: client.get(path)
+
+
+def admin_form_data(match, rng):
+    """ POST do formulário do confronto no admin: série concluída com jogos sorteados. """
+    _, games = random_series(rng, match)
+    data = {
+        'status': STATUS_COMPLETED,
+        'player1': match.player1_id,
+        'player2': match.player2_id,
+        'round_number': match.round_number,
+        'series_winner': '',
+        'games-TOTAL_FORMS': len(games),
+        'games-INITIAL_FORMS': 0,
+        'games-MIN_NUM_FORMS': 0,
+        'games-MAX_NUM_FORMS': 3,
+        '_save': 'Salvar',
+    }
+    for i, game in enumerate(games):
+        data.update({
+            f'games-{i}-match': match.pk,
+            f'games-{i}-game_number': game.game_number,
+            f'games-{i}-winner': game.winner_id,
+            f'games-{i}-win_condition': game.win_condition,
+            f'games-{i}-duration': str(game.duration),
+            f'games-{i}-player1_farm': game.player1_farm,
+            f'games-{i}-player2_farm': game.player2_farm,
+        })
+    return data
+
+
+def admin_save_request(matches, seed=0):
+    """ Cada requisição salva um confronto agendado diferente (matches[índice]). """
+    def request(client, index):
+        match = matches[index]
+        data = admin_form_data(match, random.Random(seed + index))
+        return client.post(reverse('admin:roundRobin_match_change', args=[match.pk]), data)
+    return request
+
+
+def run_target(request, iterations, warmup=0, concurrency=1, user=None, ok_status=(200, 304)):
+    """
+    Executa warmup + iterations requisições com `concurrency` threads.
+    Retorna o resumo (latências em ms, consultas por requisição, erros).
+    """
+    jobs = Queue()
+    for index in range(warmup + iterations):
+        jobs.put(index)
+    samples = []
+    lock = threading.Lock()
+
+    def worker():
+        client = make_client(user)
+        try:
+            while True:
+                try:
+                    index = jobs.get_nowait()
+                except Empty:
+                    return
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = request(client, index)
+                    elapsed = time.perf_counter() - started
+                if index >= warmup:
+                    with lock:
+                        samples.append((elapsed, len(queries), response.status_code in ok_status))
+        finally:
+            if concurrency > 1:
+                connection.close()
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+    else:
+        worker()  # na thread atual (enxerga a transação de quem chamou)
+    wall = time.perf_counter() - started
+
+    return summarize(samples, wall)
+
+
+def summarize(samples, wall):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    count = len(samples)
+    return {
+        'requests': count,
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+        'queries_per_request': sum(queries for _, queries, _ in samples) / count if count else None,
+        'throughput_rps': count / wall if wall else None,
+    }
+
+
+def bench_user(username):
+    """ Superusuário descartável para o alvo do admin. """
+    user, _ = User.objects.get_or_create(username=username, defaults={'is_staff': True, 'is_superuser': True})
+    return user
+
+
+# --- SYNC x ASYNC SOB ASGI (seed_and_bench --asgi) ---
+# As mesmas páginas, nas versões de views.py e de async_views.py, passando
+# pelo ASGIHandler de verdade (middlewares, uma thread por requisição para o
+# código sync), com `concurrency` requisições simultâneas no event loop.
+
+ASYNC_TARGETS = ('leaderboard', 'match-list', 'playoffs')
+_urlconfs = {}
+
+
+def urlconf(async_public_views):
+    """ URLconf completo (admin + app) com as páginas públicas sync ou async. """
+    if async_public_views not in _urlconfs:
+        module = types.ModuleType(f"bench_urls_{'async' if async_public_views else 'sync'}")
+        module.urlpatterns = [
+            path('admin/', admin.site.urls),
+            path('', include(build_urlpatterns(async_public_views))),
+        ]
+        _urlconfs[async_public_views] = module
+    return _urlconfs[async_public_views]
+
+
+def server_timing_queries(headers):
+    """ Consultas da requisição, lidas do Server-Timing (RequestMetricsMiddleware). """
+    found = re.search(r'desc="(\d+) consultas"', headers.get('server-timing', ''))
+    return int(found.group(1)) if found else 0
+
+
+async def asgi_get(app, path, host):
+    """ Um GET pela aplicação ASGI. Retorna (status, cabeçalhos). """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'headers': [(b'host', host.encode())],
+        'client': ('127.0.0.1', 0), 'server': (host, 80),
+    }
+    disconnect = asyncio.Event()  # nunca desconecta; a tarefa é cancelada no fim
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+    return start['status'], headers
+
+
+def run_asgi_target(url_name, iterations, warmup=0, concurrency=1, ok_status=(200, 304)):
+    """ Como run_target, mas pelo ASGIHandler, com `concurrency` tarefas no mesmo event loop. """
+    app = ASGIHandler()
+    path, host = reverse(url_name), bench_host()
+    indexes = itertools.count()
+    samples = []
+
+    async def worker():
+        while (index := next(indexes)) < warmup + iterations:
+            started = time.perf_counter()
+            status, headers = await asgi_get(app, path, host)
+            elapsed = time.perf_counter() - started
+            if index >= warmup:
+                samples.append((elapsed, server_timing_queries(headers), status in ok_status))
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    wall = asyncio.run(run())
+    return summarize(samples, wall)
@@ -0,0 +1,287 @@
+"""
+Cache das páginas públicas, compartilhado entre os workers do gunicorn.
+
+Toda página é guardada junto com a "versão" do campeonato em que foi
+renderizada. Qualquer alteração em Match/Game (sinais e MatchAdmin) troca
+essa versão por uma marca nova, o que invalida todas as páginas de uma vez
+sem precisar apagar chave por chave.
+
+Quando a versão muda, só UM worker renderiza a página de novo (ele pega um
+lock com cache.add). Os outros continuam servindo a cópia anterior até a nova
+ficar pronta (stale-while-revalidate), evitando o "estouro" de renderizações
+quando milhares de pessoas abrem a classificação ao mesmo tempo.
+
+Rodadas já encerradas da lista de partidas têm, além disso, um cache de
+fragmento próprio (round_fragment_keys), que não depende da versão do
+campeonato: só muda quando um confronto daquela rodada é salvo no admin.
+O mesmo vale para a chave dos playoffs (bracket_fragment_key).
+"""
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+VERSION_KEY = 'ipx1:tournament-version'
+VERSION_TIME_KEY = 'ipx1:tournament-version-time'
+# O sufixo muda junto com o formato da entrada (ver _cache_entry): cópias
+# gravadas por uma versão anterior do código não são lidas depois do deploy.
+PAGE_KEY_PREFIX = 'ipx1:page:2'
+ROUND_KEY_PREFIX = 'ipx1:round'
+BRACKET_KEY_PREFIX = 'ipx1:bracket'
+FRAGMENT_GENERATION_KEY = 'ipx1:fragment:generation'
+
+# Quanto tempo uma cópia (mesmo velha) fica disponível para ser servida.
+PAGE_TIMEOUT = 60 * 60 * 24
+# Tempo máximo de uma renderização; depois disso o lock expira sozinho.
+LOCK_TIMEOUT = 30
+
+
+def _new_token():
+    return time.time_ns()
+
+
+def get_version():
+    """
+    Versão atual do campeonato: uma marca única (time_ns), não um contador.
+    Se a chave for expulsa do cache (cull do FileBasedCache), a marca nova
+    nunca coincide com a de uma página antiga que ainda esteja lá.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_token(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    """ get_version() para views async (cache.aget, sem bloquear o event loop). """
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _new_token(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """ Invalida todas as páginas em cache (em todos os workers). """
+    cache.set(VERSION_TIME_KEY, time.time(), None)
+    version = _new_token()
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def get_version_time():
+    """ Momento (timestamp) da última mudança de resultado, se conhecido. """
+    return cache.get(VERSION_TIME_KEY)
+
+
+async def aget_version_time():
+    return await cache.aget(VERSION_TIME_KEY)
+
+
+def bump_version_on_commit():
+    """
+    Agenda bump_version() para depois do commit, uma única vez por transação
+    (apagar ou salvar milhares de linhas não gera milhares de escritas no cache).
+    """
+    connection = transaction.get_connection()
+    if any(func is bump_version for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(bump_version)
+    if settings.PUBLISH_ROOT:
+        # Republica os arquivos estáticos servidos pelo nginx (ver publishing.py).
+        # robust: uma falha na publicação não desfaz nem quebra o "Salvar".
+        from .publishing import publish_pages
+        transaction.on_commit(publish_pages, robust=True)
+
+
+# --- FRAGMENTOS (RODADAS ENCERRADAS, CHAVE DOS PLAYOFFS) ---
+# As "versões" também são marcas únicas (_new_token), como a do campeonato.
+# A "geração" vale para todos os fragmentos (eles mostram nomes de jogadores).
+
+def _fragment_tokens(version_keys):
+    """ Marcas atuais da geração e das versões pedidas (um get_many). """
+    tokens = cache.get_many([FRAGMENT_GENERATION_KEY, *version_keys])
+    for key in {FRAGMENT_GENERATION_KEY, *version_keys} - tokens.keys():
+        cache.add(key, _new_token(), None)
+        tokens[key] = cache.get(key)
+    return tokens
+
+
+def _round_version_key(tournament_id, round_number):
+    return f"{ROUND_KEY_PREFIX}:{tournament_id}:{round_number}:version"
+
+
+def round_fragment_keys(tournament_id, round_numbers):
+    """ {rodada: chave do fragmento HTML} para as rodadas pedidas. """
+    version_keys = {number: _round_version_key(tournament_id, number) for number in round_numbers}
+    tokens = _fragment_tokens(version_keys.values())
+    generation = tokens[FRAGMENT_GENERATION_KEY]
+    return {
+        number: f"{ROUND_KEY_PREFIX}:{tournament_id}:{number}:html:{generation}:{tokens[key]}"
+        for number, key in version_keys.items()
+    }
+
+
+class _PendingRoundBumps:
+    """ Rodadas a invalidar depois do commit: um único set_many por transação. """
+
+    def __init__(self):
+        self.keys = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        cache.set_many(dict.fromkeys(self.keys, _new_token()), None)
+
+
+def bump_round_on_commit(tournament_id, round_number):
+    """
+    Invalida o fragmento de UMA rodada (depois do commit). Apagar milhares de
+    confrontos numa transação (--clear-scheduled, descartar um campeonato)
+    agenda um só callback, com cada rodada uma vez.
+    """
+    connection = transaction.get_connection()
+    pending = next(
+        (func for _, func, _ in connection.run_on_commit
+         if isinstance(func, _PendingRoundBumps) and not func.done),
+        None,
+    )
+    key = _round_version_key(tournament_id, round_number)
+    if pending is not None:
+        pending.keys.add(key)
+        return
+    # Fora de uma transação o on_commit roda na hora: a chave entra antes.
+    pending = _PendingRoundBumps()
+    pending.keys.add(key)
+    transaction.on_commit(pending)
+
+
+def bracket_fragment_key(bracket_id):
+    """ Chave do HTML da chave dos playoffs (muda a cada resultado dos playoffs). """
+    version_key = f"{BRACKET_KEY_PREFIX}:{bracket_id}:version"
+    tokens = _fragment_tokens([version_key])
+    return f"{BRACKET_KEY_PREFIX}:{bracket_id}:html:{tokens[FRAGMENT_GENERATION_KEY]}:{tokens[version_key]}"
+
+
+def bump_bracket_on_commit(bracket_id):
+    key = f"{BRACKET_KEY_PREFIX}:{bracket_id}:version"
+    transaction.on_commit(lambda: cache.set(key, _new_token(), None))
+
+
+def bump_all_fragments_on_commit():
+    """ Invalida todos os fragmentos (importações, nomes de jogadores). """
+    transaction.on_commit(lambda: cache.set(FRAGMENT_GENERATION_KEY, _new_token(), None))
+
+
+def page_key(name, request, params=()):
+    """
+    Caminho + só os parâmetros que a view lê (`params`): ?utm_source=... ou
+    qualquer outra query string inventada não cria uma cópia nova no cache.
+    """
+    query = urlencode([(param, request.GET[param]) for param in params if param in request.GET])
+    return f"{PAGE_KEY_PREFIX}:{name}:{request.path}?{query}"
+
+
+# Cabeçalhos que não vão para o cache: recalculados a cada resposta.
+UNCACHED_HEADERS = {'content-length', 'x-cache'}
+
+
+def _cache_entry(version, response):
+    """ (versão, corpo, cabeçalhos da view): Content-Type, Vary, X-*... """
+    headers = [(name, value) for name, value in response.items() if name.lower() not in UNCACHED_HEADERS]
+    return (version, response.content, headers)
+
+
+def _cached_response(entry, status):
+    _, content, headers = entry
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    response['X-Cache'] = status
+    return response
+
+
+def cached_page(name, params=()):
+    """
+    Decorator para as views públicas (somente GET). Serve a página do cache
+    enquanto a versão do campeonato não mudar. Funciona com views sync e
+    async (nas async, o cache é acessado pelos métodos a*).
+    params: parâmetros da query string que mudam a página (ver page_key).
+    A view sem o cache fica em `.uncached` (os decorators de fora, com wraps,
+    copiam o atributo), para quem precisa renderizar sem tocar no cache.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            return _async_cached_page(name, params, view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            version = get_version()
+            key = page_key(name, request, params)
+            entry = cache.get(key)
+
+            if entry is not None and entry[0] == version:
+                return _cached_response(entry, 'HIT')
+
+            lock_key = f"{key}:lock"
+            if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+                # Outro worker já está renderizando: serve a cópia anterior.
+                if entry is not None:
+                    return _cached_response(entry, 'STALE')
+                # Cache frio (primeiro acesso): não há o que servir, renderiza.
+                return view_func(request, *args, **kwargs)
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    cache.set(key, _cache_entry(version, response), PAGE_TIMEOUT)
+                response['X-Cache'] = 'MISS'
+                return response
+            finally:
+                cache.delete(lock_key)
+
+        wrapper.uncached = view_func
+        return wrapper
+    return decorator
+
+
+def _async_cached_page(name, params, view_func):
+    """ Mesma lógica do cached_page, para views async. """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await view_func(request, *args, **kwargs)
+
+        version = await aget_version()
+        key = page_key(name, request, params)
+        entry = await cache.aget(key)
+
+        if entry is not None and entry[0] == version:
+            return _cached_response(entry, 'HIT')
+
+        lock_key = f"{key}:lock"
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            if entry is not None:
+                return _cached_response(entry, 'STALE')
+            return await view_func(request, *args, **kwargs)
+
+        try:
+            response = await view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                await cache.aset(key, _cache_entry(version, response), PAGE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        finally:
+            await cache.adelete(lock_key)
+
+    wrapper.uncached = view_func
+    return wrapper
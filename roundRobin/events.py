@@ -0,0 +1,166 @@
+"""
+Feed ao vivo (Server-Sent Events) para a página da live.
+
+Publicação: publish() grava o evento no cache compartilhado com um número de
+sequência alocado no banco (EventSequence), único entre os workers.
+
+Entrega: cada processo tem UM EventBroker que consulta essa sequência a cada
+POLL_INTERVAL segundos e distribui os eventos novos para as filas (asyncio)
+das conexões abertas naquele processo. Milhares de espectadores custam uma
+conexão aberta cada, e não renderizações de página.
+"""
+import asyncio
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+from .models import EventSequence
+
+SEQUENCE_KEY = 'ipx1:events:sequence'
+EVENT_KEY = 'ipx1:events:{}'
+
+# Por quanto tempo um evento fica disponível para quem reconectar.
+EVENT_TTL = 60 * 5
+# Intervalo de consulta do broker (um por processo, não por conexão).
+POLL_INTERVAL = 1.0
+# Comentário SSE para manter a conexão viva em proxies.
+KEEPALIVE_INTERVAL = 15.0
+# Quantos eventos uma conexão lenta pode acumular antes de perder os antigos.
+QUEUE_SIZE = 100
+
+
+@transaction.atomic
+def publish(kind, data):
+    """
+    Publica um evento para todos os workers. Retorna o id do evento.
+
+    O id sai do contador no banco (EventSequence), com a linha travada até o
+    fim: dois workers nunca recebem o mesmo id, e o evento e o último id
+    (SEQUENCE_KEY, lido pelos brokers) vão para o cache na ordem dos ids.
+    """
+    counter, _ = EventSequence.objects.select_for_update().get_or_create(pk=1)
+    counter.value += 1
+    counter.save(update_fields=['value'])
+    event_id = counter.value
+    cache.set(EVENT_KEY.format(event_id), {'id': event_id, 'event': kind, 'data': data}, EVENT_TTL)
+    cache.set(SEQUENCE_KEY, event_id, None)
+    return event_id
+
+
+def publish_on_commit(kind, data):
+    """ Publica só depois do commit (nada de anunciar resultado desfeito). """
+    transaction.on_commit(lambda: publish(kind, data))
+
+
+def series_event(match):
+    return {
+        'match': match.pk,
+        'round': match.round_number,
+        'status': match.status,
+        'player1': match.player1.username,
+        'player2': match.player2.username,
+        'winner': match.series_winner.username if match.series_winner else None,
+        'wo': match.is_wo,
+    }
+
+
+def game_event(game):
+    return {
+        'match': game.match_id,
+        'game_number': game.game_number,
+        'winner': game.winner.username if game.winner else None,
+        'win_condition': game.win_condition,
+    }
+
+
+def format_event(event):
+    data = json.dumps(event['data'], separators=(',', ':'), ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+async def events_since(last_id):
+    """ Eventos ainda no cache com id > last_id (em ordem). """
+    current = await cache.aget(SEQUENCE_KEY, 0)
+    if current <= last_id:
+        return current, []
+    keys = [EVENT_KEY.format(i) for i in range(max(last_id, current - QUEUE_SIZE) + 1, current + 1)]
+    found = await cache.aget_many(keys)
+    return current, [found[key] for key in keys if key in found]
+
+
+class EventBroker:
+    """ Distribui os eventos para as conexões SSE deste processo. """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_id = None
+        self.task = None
+
+    async def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.last_id is None:
+            self.last_id = await cache.aget(SEQUENCE_KEY, 0)
+        if self.task is None or self.task.done() or self.task.get_loop() is not asyncio.get_running_loop():
+            self.task = asyncio.create_task(self._relay())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.last_id = None
+
+    def _deliver(self, event):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()  # descarta o mais antigo
+            queue.put_nowait(event)
+
+    async def _relay(self):
+        while self.subscribers:
+            self.last_id, events = await events_since(self.last_id)
+            for event in events:
+                self._deliver(event)
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+broker = EventBroker()
+
+
+async def event_stream(request):
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    sent_id = int(last_event_id) if last_event_id.isdigit() else 0
+    queue = await broker.subscribe()
+    try:
+        yield f"retry: {int(POLL_INTERVAL * 3000)}\n\n"
+
+        # Reconexão: reenvia o que a conexão perdeu (se ainda estiver no cache).
+        if sent_id:
+            _, missed = await events_since(sent_id)
+            for event in missed:
+                sent_id = event['id']
+                yield format_event(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event['id'] <= sent_id:
+                continue
+            sent_id = event['id']
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(queue)
+
+
+async def live_events_view(request):
+    response = StreamingHttpResponse(event_stream(request), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: não bufferizar o stream
+    return response
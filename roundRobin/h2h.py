@@ -0,0 +1,173 @@
+"""
+Confronto direto (head-to-head) entre os jogadores de um campeonato.
+
+Matriz densa jogador x jogador (array 'H' do stdlib: n² contadores de 2
+bytes) com as séries e os jogos que cada jogador venceu contra cada
+adversário. É montada com UMA consulta (confrontos com LEFT JOIN dos jogos,
+lidos em uma passada) e guardada no cache compartilhado pelos workers.
+
+Cada "Salvar" no admin (ver standings.record_match_change) recalcula só as
+células do par envolvido, depois do commit; a matriz inteira só é montada de
+novo quando some do cache (ou depois de importações/reconstruções).
+"""
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Match, STATUS_COMPLETED
+
+H2H_KEY = 'ipx1:h2h:{}'
+LOCK_TIMEOUT = 10
+
+
+class HeadToHead:
+    """ Matriz de confronto direto de um campeonato. """
+
+    def __init__(self, tournament_id, player_ids):
+        self.tournament_id = tournament_id
+        self.index = {pk: i for i, pk in enumerate(sorted(player_ids))}
+        cells = len(self.index) ** 2
+        self.series = array('H', bytes(2 * cells))  # series[i*n + j]: séries que i venceu contra j
+        self.games = array('H', bytes(2 * cells))   # idem, jogos
+
+    def _cell(self, winner_id, loser_id):
+        return self.index[winner_id] * len(self.index) + self.index[loser_id]
+
+    def add(self, rows):
+        """ Soma as linhas de match_rows() (ordenadas pelo confronto). """
+        last_match = None
+        for match_pk, player1_id, player2_id, is_wo, series_winner_id, game_winner_id in rows:
+            players = (player1_id, player2_id)
+            if match_pk != last_match:
+                last_match = match_pk
+                if series_winner_id in players:
+                    loser_id = player2_id if series_winner_id == player1_id else player1_id
+                    self.series[self._cell(series_winner_id, loser_id)] += 1
+            # W.O. não conta jogos (mesma regra de stats.countable_games).
+            if not is_wo and game_winner_id in players:
+                loser_id = player2_id if game_winner_id == player1_id else player1_id
+                self.games[self._cell(game_winner_id, loser_id)] += 1
+
+    def covers(self, *player_ids):
+        return all(pk in self.index for pk in player_ids)
+
+    def reset_pair(self, a, b, rows):
+        """ Zera as células do par (a, b) e soma de novo os seus confrontos. """
+        for cell in (self._cell(a, b), self._cell(b, a)):
+            self.series[cell] = 0
+            self.games[cell] = 0
+        self.add(rows)
+
+    def record(self, a, b):
+        """ Retrospecto de `a` contra `b`, em O(1): {'series': [a, b], 'games': [a, b]}. """
+        if not self.covers(a, b) or a == b:
+            return {'series': [0, 0], 'games': [0, 0]}
+        ab, ba = self._cell(a, b), self._cell(b, a)
+        return {'series': [self.series[ab], self.series[ba]], 'games': [self.games[ab], self.games[ba]]}
+
+    def series_wins_against(self, player_id, opponent_ids):
+        """ Séries que `player_id` venceu contra o grupo (mini-tabela dos empatados). """
+        if player_id not in self.index:
+            return 0
+        row = self.index[player_id] * len(self.index)
+        return sum(self.series[row + self.index[pk]] for pk in opponent_ids if pk in self.index)
+
+
+def match_rows(matches):
+    """ Uma linha por jogo (ou uma só, sem jogos) dos confrontos concluídos. """
+    return (
+        matches.filter(status=STATUS_COMPLETED)
+        .order_by('pk')
+        .values_list('pk', 'player1_id', 'player2_id', 'is_wo', 'series_winner_id', 'games__winner_id')
+    )
+
+
+def build(tournament_id):
+    """ Monta a matriz do campeonato em uma consulta e uma passada. """
+    rows = list(match_rows(Match.objects.filter(tournament_id=tournament_id)))
+    matrix = HeadToHead(tournament_id, {pk for row in rows for pk in row[1:3]})
+    matrix.add(rows)
+    return matrix
+
+
+def _keys(tournament_id):
+    key = H2H_KEY.format(tournament_id)
+    return key, f"{key}:stale", f"{key}:lock", f"{key}:version"
+
+
+def _mark_changed(version_key):
+    """ Nova marca de versão: uma matriz montada antes disso não é mais gravada. """
+    cache.set(version_key, time.time_ns(), None)
+
+
+def get_matrix(tournament_id):
+    """
+    Matriz do cache; se não estiver lá (ou estiver marcada como velha), monta
+    e guarda. Só grava (com o mesmo lock do refresh_pairs) se nenhuma
+    atualização aconteceu durante a montagem: a leitura pode ter sido feita
+    antes de um commit cujo refresh_pairs já atualizou o cache. Nesse caso a
+    matriz montada serve só a esta leitura.
+    """
+    key, stale_key, lock_key, version_key = _keys(tournament_id)
+    found = cache.get_many([key, stale_key, version_key])
+    matrix = found.get(key)
+    if matrix is not None and stale_key not in found:
+        return matrix
+
+    matrix = build(tournament_id)
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            if cache.get(version_key) == found.get(version_key):
+                cache.set(key, matrix, None)
+                cache.delete(stale_key)
+        finally:
+            cache.delete(lock_key)
+    return matrix
+
+
+def refresh_pairs(tournament_id, pairs):
+    """
+    Recalcula só as células dos pares (a, b) na matriz em cache (uma
+    consulta por par). Se não der para atualizar com segurança (jogador novo
+    na matriz, outro worker atualizando ou montando ao mesmo tempo), a
+    matriz é marcada como velha e será montada de novo na próxima leitura.
+    """
+    key, stale_key, lock_key, version_key = _keys(tournament_id)
+    _mark_changed(version_key)
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        cache.set(stale_key, 1, None)
+        return
+    try:
+        matrix = cache.get(key)
+        if matrix is None or not all(matrix.covers(a, b) for a, b in pairs):
+            cache.set(stale_key, 1, None)
+            return
+        for a, b in pairs:
+            between = Match.objects.filter(
+                Q(player1_id=a, player2_id=b) | Q(player1_id=b, player2_id=a),
+                tournament_id=tournament_id,
+            )
+            matrix.reset_pair(a, b, match_rows(between))
+        cache.set(key, matrix, None)
+    finally:
+        cache.delete(lock_key)
+
+
+def refresh_pairs_on_commit(tournament_id, pairs):
+    pairs = {tuple(sorted(pair)) for pair in pairs if None not in pair and pair[0] != pair[1]}
+    if pairs:
+        transaction.on_commit(lambda: refresh_pairs(tournament_id, pairs))
+
+
+def invalidate_on_commit(tournament_id):
+    """ Marca a matriz como velha (importações e reconstruções mexem em muitos pares). """
+    _, stale_key, _, version_key = _keys(tournament_id)
+
+    def invalidate():
+        _mark_changed(version_key)
+        cache.set(stale_key, 1, None)
+
+    transaction.on_commit(invalidate)
@@ -0,0 +1,287 @@
+"""
+Importação em lote de resultados (um jogo por linha) a partir de CSV ou NDJSON.
+
+Colunas/chaves aceitas:
+    round, player1, player2, game_number, winner, win_condition,
+    duration, player1_farm, player2_farm, wo_winner
+
+Linhas com `wo_winner` registram um W.O. (sem jogo). O arquivo é lido em
+streaming e gravado em lotes (bulk_create/bulk_update); as estatísticas dos
+jogadores são recalculadas UMA vez, no final, só para quem foi afetado.
+"""
+import csv
+import json
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils.dateparse import parse_duration
+
+from .models import Tournament, Player, Match, Game, STATUS_COMPLETED, WIN_CONDITION_CHOICES
+from .standings import rebuild_standings
+from .ledger import rebuild_player_stats
+from .ratings import recompute_ratings
+from . import caching
+
+GAME_FIELDS = ('winner', 'win_condition', 'duration', 'player1_farm', 'player2_farm')
+VALID_WIN_CONDITIONS = {key for key, _ in WIN_CONDITION_CHOICES}
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(path):
+    """ Lê o arquivo em streaming: gera (nº da linha, dict). """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for line_number, line in enumerate(handle, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as error:
+                        yield line_number, RowError(f"JSON inválido: {error}")
+        else:
+            # Linha 1 é o cabeçalho.
+            for line_number, row in enumerate(csv.DictReader(handle), start=2):
+                yield line_number, row
+
+
+def _value(row, key):
+    value = row.get(key)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _player(row, key, players, required=True):
+    username = _value(row, key)
+    if not username:
+        if required:
+            raise RowError(f"'{key}' é obrigatório.")
+        return None
+    try:
+        return players[username]
+    except KeyError:
+        raise RowError(f"Jogador '{username}' não encontrado.")
+
+
+def _int(row, key, default=None):
+    value = _value(row, key)
+    if not value:
+        if default is None:
+            raise RowError(f"'{key}' é obrigatório.")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RowError(f"'{key}' deve ser um número inteiro (recebido '{value}').")
+
+
+def parse_row(row, players):
+    """
+    Valida uma linha e devolve um dicionário normalizado (com ids).
+    Levanta RowError com a mensagem para o relatório.
+    """
+    if isinstance(row, RowError):
+        raise row
+
+    round_number = _int(row, 'round')
+    if round_number < 1:
+        raise RowError("'round' deve ser >= 1.")
+    player1_id = _player(row, 'player1', players)
+    player2_id = _player(row, 'player2', players)
+    if player1_id == player2_id:
+        raise RowError("'player1' e 'player2' devem ser jogadores diferentes.")
+
+    parsed = {'round': round_number, 'player1': player1_id, 'player2': player2_id}
+
+    wo_winner = _player(row, 'wo_winner', players, required=False)
+    if wo_winner is not None:
+        if wo_winner not in (player1_id, player2_id):
+            raise RowError("'wo_winner' precisa ser um dos jogadores do confronto.")
+        parsed['wo_winner'] = wo_winner
+        return parsed
+
+    game_number = _int(row, 'game_number')
+    if game_number not in (1, 2, 3):
+        raise RowError("'game_number' deve ser 1, 2 ou 3.")
+
+    winner_id = _player(row, 'winner', players)
+    if winner_id not in (player1_id, player2_id):
+        raise RowError("'winner' precisa ser um dos jogadores do confronto.")
+
+    win_condition = _value(row, 'win_condition')
+    if win_condition not in VALID_WIN_CONDITIONS:
+        raise RowError(f"'win_condition' inválida: '{win_condition}'.")
+
+    duration = None
+    if _value(row, 'duration'):
+        duration = parse_duration(_value(row, 'duration'))
+        if duration is None:
+            raise RowError(f"'duration' inválida: '{_value(row, 'duration')}' (use MM:SS).")
+
+    parsed.update({
+        'game_number': game_number,
+        'winner': winner_id,
+        'win_condition': win_condition,
+        'duration': duration,
+        'player1_farm': _int(row, 'player1_farm', default=0),
+        'player2_farm': _int(row, 'player2_farm', default=0),
+    })
+    return parsed
+
+
+def _pair_key(round_number, player1_id, player2_id):
+    return (round_number, min(player1_id, player2_id), max(player1_id, player2_id))
+
+
+def _load_matches(keys, tournament_id):
+    """ Busca (ou cria, em um bulk_create) os confrontos das chaves do lote. """
+    rounds = {key[0] for key in keys}
+    player_ids = {key[1] for key in keys} | {key[2] for key in keys}
+    found = {}
+    candidates = Match.objects.filter(
+        tournament_id=tournament_id, round_number__in=rounds,
+        player1_id__in=player_ids, player2_id__in=player_ids,
+    ).order_by('pk')
+    for match in candidates:
+        found.setdefault(_pair_key(match.round_number, match.player1_id, match.player2_id), match)
+
+    missing = [key for key in keys if key not in found]
+    created = Match.objects.bulk_create([
+        Match(tournament_id=tournament_id, round_number=key[0], player1_id=key[1], player2_id=key[2])
+        for key in missing
+    ])
+    found.update(zip(missing, created))
+    return found
+
+
+def _import_batch(batch, report, tournament_id):
+    """ Grava um lote de linhas já validadas. """
+    matches = _load_matches({_pair_key(r['round'], r['player1'], r['player2']) for _, r in batch}, tournament_id)
+    match_ids = [match.pk for match in matches.values()]
+    existing = {
+        (game.match_id, game.game_number): game
+        for game in Game.objects.filter(match_id__in=match_ids)
+    }
+
+    to_create = {}
+    to_update = {}
+    wo_matches = {}
+
+    for line_number, row in batch:
+        match = matches[_pair_key(row['round'], row['player1'], row['player2'])]
+
+        if 'wo_winner' in row:
+            match.is_wo = True
+            match.status = STATUS_COMPLETED
+            match.series_winner_id = row['wo_winner']
+            wo_matches[match.pk] = match
+            report['affected_matches'].add(match.pk)
+            continue
+
+        if match.is_wo:
+            report['errors'].append((line_number, "Confronto já registrado como W.O."))
+            continue
+
+        # O arquivo pode listar os jogadores na ordem inversa do confronto.
+        swapped = match.player1_id != row['player1']
+        values = {
+            'winner_id': row['winner'],
+            'win_condition': row['win_condition'],
+            'duration': row['duration'],
+            'player1_farm': row['player2_farm'] if swapped else row['player1_farm'],
+            'player2_farm': row['player1_farm'] if swapped else row['player2_farm'],
+        }
+
+        key = (match.pk, row['game_number'])
+        game = existing.get(key) or to_create.get(key)
+        if game is None:
+            to_create[key] = Game(match_id=match.pk, game_number=row['game_number'], **values)
+        else:
+            for field, value in values.items():
+                setattr(game, field, value)
+            if key in existing:
+                to_update[key] = game
+        report['games'] += 1
+        report['affected_matches'].add(match.pk)
+
+    Game.objects.bulk_create(to_create.values())
+    Game.objects.bulk_update(to_update.values(), GAME_FIELDS)
+    Match.objects.bulk_update(wo_matches.values(), ['is_wo', 'status', 'series_winner'])
+
+
+def _settle_series(match_ids, chunk_size=1000):
+    """
+    Define vencedor e status das séries importadas a partir dos jogos
+    (quem tem 2 vitórias), com uma consulta agrupada por bloco.
+    Retorna os ids dos jogadores envolvidos.
+    """
+    match_ids = sorted(match_ids)
+    player_ids = set()
+    for start in range(0, len(match_ids), chunk_size):
+        chunk = match_ids[start:start + chunk_size]
+        wins = defaultdict(Counter)
+        for row in Game.objects.filter(match_id__in=chunk, winner__isnull=False).values('match_id', 'winner_id').annotate(total=Count('pk')).order_by():
+            wins[row['match_id']][row['winner_id']] = row['total']
+
+        to_update = []
+        for match in Match.objects.filter(pk__in=chunk).only('pk', 'player1_id', 'player2_id', 'is_wo', 'status', 'series_winner_id'):
+            player_ids.update((match.player1_id, match.player2_id))
+            if match.is_wo:
+                continue
+            leader = [pk for pk, total in wins[match.pk].items() if total >= 2]
+            match.series_winner_id = leader[0] if leader else None
+            if leader:
+                match.status = STATUS_COMPLETED
+            to_update.append(match)
+        Match.objects.bulk_update(to_update, ['series_winner', 'status'])
+    return player_ids
+
+
+def import_results(rows, tournament=None, batch_size=1000, dry_run=False):
+    """
+    Importa as linhas (iterável de (nº da linha, dict)) no campeonato (o
+    ativo, por padrão) e devolve um relatório:
+    {'rows', 'games', 'errors': [(linha, mensagem)], 'affected_matches', 'players'}.
+    Linhas inválidas entram no relatório e não interrompem a importação.
+    Com dry_run=True tudo é validado e gravado dentro da transação, que
+    então é desfeita.
+    """
+    if tournament is None:
+        tournament = Tournament.objects.current()
+    players = dict(Player.objects.values_list('username', 'pk'))
+    report = {'rows': 0, 'games': 0, 'errors': [], 'affected_matches': set(), 'players': 0}
+
+    with transaction.atomic():
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+
+            batch = []
+            for line_number, row in chunk:
+                report['rows'] += 1
+                try:
+                    batch.append((line_number, parse_row(row, players)))
+                except RowError as error:
+                    report['errors'].append((line_number, str(error)))
+            if batch:
+                _import_batch(batch, report, tournament.pk)
+
+        player_ids = _settle_series(report['affected_matches'])
+        report['players'] = len(player_ids)
+        if player_ids:
+            rebuild_player_stats(player_ids)
+            rebuild_standings(tournament)
+            recompute_ratings(tournament.pk)
+            caching.bump_version_on_commit()
+            caching.bump_all_fragments_on_commit()
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return report
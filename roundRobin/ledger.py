@@ -0,0 +1,248 @@
+"""
+Livro-razão das estatísticas dos jogadores (StatEvent, somente inserção).
+
+O efeito de cada jogo em cada jogador é lançado como uma linha assinada. Ao
+salvar um confronto, o efeito esperado dos jogos (regras de stats.py) é
+comparado com a soma do que já foi lançado para eles (uma consulta agrupada),
+e só a diferença é gravada:
+
+- jogo novo: lançamento com o efeito inteiro;
+- farm corrigido: uma linha só com a diferença de total_farm;
+- jogo apagado, W.O., série reaberta: estorno (o negativo do saldo).
+
+Os contadores do Player são um cache dessa soma: recebem o mesmo delta (uma
+UPDATE com F() por jogador) e podem ser reconstruídos a qualquer momento com
+um único SUM agrupado (fold). Como nada é alterado nem apagado, o livro-razão
+também serve para auditoria (history) e para refazer os totais de qualquer
+momento do passado (fold(as_of=...)).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, F, Sum
+from django.utils import timezone
+
+from .models import Player, Match, Game, StatEvent
+from .models import STATUS_COMPLETED, STAT_EVENT_APPLY, STAT_EVENT_ADJUST, STAT_EVENT_REVERT
+from .stats import (
+    STAT_FIELDS, MissingWinConditionError, _zero_stats, new_deltas, accumulate_game, apply_deltas,
+    countable_games, game_totals,
+)
+
+SUMS = {f"sum_{field}": Sum(field) for field in STAT_FIELDS}
+
+
+def _sum_row(row):
+    return {field: row[f"sum_{field}"] or _zero_stats()[field] for field in STAT_FIELDS}
+
+
+def target_entries(games):
+    """
+    Efeito esperado de cada jogo, a partir de (jogo, player1_id, player2_id):
+    {(confronto, jogo, jogador): {campo: valor}}.
+    """
+    target = {}
+    for game, player1_id, player2_id in games:
+        deltas = new_deltas()
+        accumulate_game(deltas, game, player1_id, player2_id)
+        for player_id, fields in deltas.items():
+            target[game.match_id, game.pk, player_id] = fields
+    return target
+
+
+def posted_entries(match_ids):
+    """ Saldo já lançado por (confronto, jogo, jogador), em uma consulta agrupada. """
+    rows = (
+        StatEvent.objects.filter(match_id__in=match_ids)
+        .values('match_id', 'game_id', 'player_id')
+        .annotate(**SUMS)
+        .order_by()
+    )
+    return {(row['match_id'], row['game_id'], row['player_id']): _sum_row(row) for row in rows}
+
+
+def post_differences(target, posted):
+    """
+    Grava (bulk_create) a diferença entre o efeito esperado e o saldo lançado
+    de cada jogo. Retorna os deltas por jogador, para o cache do Player.
+    """
+    created_at = timezone.now()
+    events = []
+    deltas = new_deltas()
+    for key in target.keys() | posted.keys():
+        expected = target.get(key) or _zero_stats()
+        current = posted.get(key) or _zero_stats()
+        diff = {field: expected[field] - current[field] for field in STAT_FIELDS}
+        if not any(diff.values()):
+            continue
+
+        if not any(current.values()):
+            kind = STAT_EVENT_APPLY
+        elif not any(expected.values()):
+            kind = STAT_EVENT_REVERT
+        else:
+            kind = STAT_EVENT_ADJUST
+        match_id, game_id, player_id = key
+        events.append(StatEvent(
+            match_id=match_id, game_id=game_id, player_id=player_id,
+            kind=kind, created_at=created_at, **diff,
+        ))
+        for field, value in diff.items():
+            deltas[player_id][field] += value
+
+    StatEvent.objects.bulk_create(events, batch_size=1000)
+    return deltas
+
+
+@transaction.atomic
+def settle_matches(matches):
+    """
+    Lança no livro-razão o efeito de um ou mais confrontos:
+
+    - Se o confronto está 'Concluído' e não é W.O., o efeito esperado são
+      todos os jogos com vencedor, e match.series_winner passa a ser quem
+      fez 2 vitórias.
+    - Senão, o efeito esperado é zero (estorno do que estava lançado).
+
+    Só a diferença para o que já foi lançado é gravada, então salvar de
+    novo um confronto sem mudanças não escreve nada.
+    O Match em si NÃO é salvo aqui: isso fica com quem chamou.
+    Retorna {match.pk: (vitórias do player1, vitórias do player2)}.
+    """
+    matches = list(matches)
+    by_pk = {match.pk: match for match in matches}
+    games = Game.objects.filter(match_id__in=by_pk.keys(), winner__isnull=False).order_by('match_id', 'game_number')
+
+    counted = []
+    scores = {pk: (0, 0) for pk in by_pk}
+    for game in games:
+        match = by_pk[game.match_id]
+        if match.is_wo or match.status != STATUS_COMPLETED:
+            continue
+        if game.win_condition is None:
+            raise MissingWinConditionError(game.game_number)
+        counted.append((game, match.player1_id, match.player2_id))
+
+        p1_wins, p2_wins = scores[match.pk]
+        if game.winner_id == match.player1_id:
+            scores[match.pk] = (p1_wins + 1, p2_wins)
+        else:
+            scores[match.pk] = (p1_wins, p2_wins + 1)
+
+    for match in matches:
+        if match.is_wo:
+            continue
+        p1_wins, p2_wins = scores[match.pk]
+        if p1_wins >= 2:
+            match.series_winner_id = match.player1_id
+        elif p2_wins >= 2:
+            match.series_winner_id = match.player2_id
+        else:
+            match.series_winner_id = None
+
+    apply_deltas(post_differences(target_entries(counted), posted_entries(by_pk.keys())))
+    return scores
+
+
+@transaction.atomic
+def revert_matches(match_ids):
+    """ Estorna tudo o que foi lançado para os confrontos (ex.: confronto apagado). """
+    return apply_deltas(post_differences({}, posted_entries(match_ids)))
+
+
+# --- RECONSTRUÇÃO, AUDITORIA E REPLAY ---
+
+def fold(player_ids=None, as_of=None, tournament=None):
+    """
+    Totais por jogador somando o livro-razão (uma consulta agrupada).
+    as_of: só os lançamentos feitos até esse momento (replay);
+    tournament: só os jogos daquele campeonato.
+    Retorna {player_id: {campo de STAT_FIELDS: valor}}.
+    """
+    events = StatEvent.objects.order_by()
+    if player_ids is not None:
+        events = events.filter(player_id__in=player_ids)
+    if as_of is not None:
+        events = events.filter(created_at__lte=as_of)
+    if tournament is not None:
+        events = events.filter(match__tournament=tournament)
+    totals = defaultdict(_zero_stats)
+    for row in events.values('player_id').annotate(**SUMS):
+        totals[row['player_id']] = _sum_row(row)
+    return totals
+
+
+def history(player, as_of=None):
+    """ Lançamentos de um jogador, em ordem (auditoria). """
+    events = StatEvent.objects.filter(player=player)
+    if as_of is not None:
+        events = events.filter(created_at__lte=as_of)
+    return events.order_by('created_at', 'pk')
+
+
+def reconcile(player_ids=None, batch_size=1000):
+    """
+    Acerta o livro-razão com os jogos gravados (importações e dados
+    sintéticos criam jogos em lote, sem passar por settle_matches): lança só
+    as diferenças. Restrito aos confrontos dos jogadores, se informados.
+    Retorna os ids dos jogadores que receberam lançamentos.
+    """
+    matches = Match.objects.order_by()
+    if player_ids is not None:
+        matches = matches.filter(Q(player1_id__in=player_ids) | Q(player2_id__in=player_ids))
+    match_ids = matches.values('pk')
+
+    games = countable_games().filter(match_id__in=match_ids).annotate(
+        player1=F('match__player1_id'), player2=F('match__player2_id'),
+    )
+    target = target_entries((game, game.player1, game.player2) for game in games.iterator(chunk_size=batch_size))
+    deltas = post_differences(target, posted_entries(match_ids))
+    return set(deltas)
+
+
+@transaction.atomic
+def rebuild_player_stats(player_ids=None, batch_size=1000):
+    """
+    Acerta o livro-razão com os jogos e reescreve os contadores do Player
+    como a soma do livro-razão (um SUM agrupado + bulk_update).
+    Retorna quantos jogadores foram reescritos.
+    """
+    posted_to = reconcile(player_ids, batch_size)
+    if player_ids is not None:
+        player_ids = set(player_ids) | posted_to
+    totals = fold(player_ids)
+
+    players = Player.objects.only('pk', *STAT_FIELDS)
+    if player_ids is not None:
+        players = players.filter(pk__in=player_ids)
+
+    rows = []
+    for player in players.iterator(chunk_size=batch_size):
+        for field, value in totals[player.pk].items():
+            setattr(player, field, value)
+        rows.append(player)
+    Player.objects.bulk_update(rows, STAT_FIELDS, batch_size=batch_size)
+    return len(rows)
+
+
+def ledger_drift(player_ids=None):
+    """
+    Compara o saldo do livro-razão com o recálculo a partir dos jogos.
+    Retorna {player_id: {campo: (esperado, lançado)}} só com o que difere.
+    """
+    expected = game_totals()
+    posted = fold()
+    ids = expected.keys() | posted.keys()
+    if player_ids is not None:
+        ids &= set(player_ids)
+
+    drift = {}
+    for player_id in ids:
+        diff = {
+            field: (expected[player_id][field], posted[player_id][field])
+            for field in STAT_FIELDS
+            if expected[player_id][field] != posted[player_id][field]
+        }
+        if diff:
+            drift[player_id] = diff
+    return drift
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from roundRobin.models import Player, Tournament
+from roundRobin.standings import check_standings, rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Compara a tabela de classificação (Standing) com as linhas de Match/Game.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Reconstrói a tabela Standing quando houver divergências.',
+        )
+        parser.add_argument(
+            '--tournament',
+            help='Confere só este campeonato (nome). Padrão: todos.',
+        )
+
+    def handle(self, *args, **options):
+        tournament = None
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+
+        problems = check_standings(tournament)
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS("Classificação consistente com Match/Game."))
+            return
+
+        names = dict(Player.objects.values_list('pk', 'username'))
+        tournaments = dict(Tournament.objects.values_list('pk', 'name'))
+        for tournament_id, player_id, field, expected, actual in problems:
+            self.stdout.write(self.style.WARNING(
+                f"[{tournaments.get(tournament_id, tournament_id)}] "
+                f"{names.get(player_id, player_id)}: {field} esperado={expected} armazenado={actual}"
+            ))
+        self.stdout.write(self.style.ERROR(f"{len(problems)} divergência(s) encontradas."))
+
+        if options['fix']:
+            with transaction.atomic():
+                total = rebuild_standings(tournament)
+            self.stdout.write(self.style.SUCCESS(f"Classificação reconstruída ({total} jogadores)."))
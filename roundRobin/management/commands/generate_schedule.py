@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from roundRobin.models import Player, Tournament
+from roundRobin.schedule import generate_schedule
+
+
+class Command(BaseCommand):
+    help = 'Gera a tabela de confrontos (round-robin pelo método do círculo) e insere tudo com bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--players',
+            nargs='+',
+            help='Usernames dos jogadores (padrão: todos).',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            help='Gera só as primeiras N rodadas (padrão: round-robin completo, n-1 rodadas).',
+        )
+        parser.add_argument('--tournament', help='Nome do campeonato (padrão: o ativo).')
+        parser.add_argument('--seed', type=int, help='Embaralha os jogadores de forma determinística.')
+        parser.add_argument('--first-round', type=int, default=1, help='Número da primeira rodada gerada.')
+        parser.add_argument('--start', help='Horário da 1ª rodada (ISO, ex.: 2026-11-01T19:00).')
+        parser.add_argument('--round-interval-days', type=float, default=7, help='Dias entre rodadas.')
+        parser.add_argument('--slot-minutes', type=float, default=0, help='Minutos entre confrontos da mesma rodada.')
+        parser.add_argument(
+            '--clear-scheduled',
+            action='store_true',
+            help='Apaga os confrontos ainda agendados do campeonato antes de gerar.',
+        )
+
+    def handle(self, *args, **options):
+        players = Player.objects.order_by('pk')
+        if options['players']:
+            players = players.filter(username__in=options['players'])
+            missing = set(options['players']) - set(players.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Jogadores não encontrados: {', '.join(sorted(missing))}")
+
+        tournament = None
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+
+        player_ids = list(players.values_list('pk', flat=True))
+        if len(player_ids) < 2:
+            raise CommandError("São necessários pelo menos 2 jogadores.")
+
+        if options['rounds'] is not None and options['rounds'] < 1:
+            raise CommandError("--rounds deve ser pelo menos 1.")
+        if options['first_round'] < 1:
+            raise CommandError("--first-round deve ser pelo menos 1.")
+        if options['round_interval_days'] < 0 or options['slot_minutes'] < 0:
+            raise CommandError("--round-interval-days e --slot-minutes não podem ser negativos.")
+
+        start = None
+        if options['start']:
+            try:
+                start = datetime.fromisoformat(options['start'])
+            except ValueError:
+                raise CommandError(f"Horário inválido em --start: {options['start']!r} (use ISO, ex.: 2026-11-01T19:00).")
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+
+        started = time.monotonic()
+        created = generate_schedule(
+            player_ids,
+            tournament=tournament,
+            clear_scheduled=options['clear_scheduled'],
+            rounds=options['rounds'],
+            seed=options['seed'],
+            first_round=options['first_round'],
+            start=start,
+            round_interval=timedelta(days=options['round_interval_days']),
+            slot=timedelta(minutes=options['slot_minutes']),
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created)} confrontos criados para {len(player_ids)} jogadores em {elapsed:.2f}s."
+        ))
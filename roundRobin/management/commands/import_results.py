@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from roundRobin.importer import import_results, read_rows
+from roundRobin.models import Tournament
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa resultados (um jogo por linha) de um arquivo CSV ou NDJSON, '
+        'gravando em lotes e recalculando as estatísticas uma única vez no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo .csv ou .ndjson/.jsonl.')
+        parser.add_argument('--tournament', help='Nome do campeonato (padrão: o ativo).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por lote.')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Valida e simula a importação sem gravar nada.',
+        )
+
+    def handle(self, *args, **options):
+        tournament = None
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+
+        started = time.monotonic()
+        try:
+            report = import_results(
+                read_rows(options['path']),
+                tournament=tournament,
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo não encontrado: {options['path']}")
+
+        for line_number, message in report['errors']:
+            self.stderr.write(f"Linha {line_number}: {message}")
+
+        prefix = "[DRY-RUN] " if options['dry_run'] else ""
+        summary = (
+            f"{prefix}{report['rows']} linha(s) lidas, {report['games']} jogo(s) importados, "
+            f"{len(report['affected_matches'])} confronto(s) e {report['players']} jogador(es) atualizados, "
+            f"{len(report['errors'])} erro(s) em {time.monotonic() - started:.2f}s."
+        )
+        style = self.style.WARNING if report['errors'] else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from roundRobin.publishing import PUBLISHED_PAGES, publish_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Renderiza a classificação, as partidas, os playoffs e a API JSON em arquivos '
+        '(com cópias .gz) para o nginx servir direto. Gravação atômica (temporário + rename).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', help='Diretório de destino (padrão: PUBLISH_ROOT).')
+
+    def handle(self, *args, **options):
+        root = options['root'] or settings.PUBLISH_ROOT
+        if not root:
+            raise CommandError("Defina PUBLISH_ROOT ou use --root.")
+
+        started = time.monotonic()
+        written = publish_pages(root)
+        for relative in written:
+            self.stdout.write(f"  {relative}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(written)} de {len(PUBLISHED_PAGES)} arquivo(s) atualizados em {root} "
+            f"({time.monotonic() - started:.2f}s)."
+        ))
@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from roundRobin import caching
+from roundRobin.ledger import ledger_drift, rebuild_player_stats
+from roundRobin.models import Player, Match, Tournament
+from roundRobin.standings import rebuild_standings
+from roundRobin.stats import player_stat_drift
+
+
+class Command(BaseCommand):
+    help = (
+        'Acerta o livro-razão de estatísticas com as linhas de Game e recalcula os '
+        'contadores dos jogadores (vitórias, farm, K/D, tempo) como a soma dele.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas mostra as divergências, sem gravar nada.',
+        )
+        parser.add_argument(
+            '--round',
+            type=int,
+            action='append',
+            dest='rounds',
+            help='Limita aos jogadores que jogaram nesta rodada (pode repetir).',
+        )
+        parser.add_argument(
+            '--tournament',
+            help='Limita ao campeonato (nome): seus jogadores e sua classificação.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        tournament = None
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+        player_ids = self.selected_players(options['rounds'], tournament)
+
+        if options['check']:
+            self.report_drift(player_ids)
+        else:
+            self.rebuild(player_ids, tournament)
+
+        self.stdout.write(f"Concluído em {time.monotonic() - started:.2f}s.")
+
+    def selected_players(self, rounds, tournament):
+        if not rounds and tournament is None:
+            return None
+        matches = Match.objects.all()
+        if rounds:
+            matches = matches.filter(round_number__in=rounds)
+        if tournament is not None:
+            matches = matches.filter(tournament=tournament)
+        return list(
+            Player.objects.filter(
+                Q(matches_as_player1__in=matches) | Q(matches_as_player2__in=matches)
+            ).distinct().values_list('pk', flat=True)
+        )
+
+    def report_drift(self, player_ids):
+        drift = player_stat_drift(player_ids)
+        names = dict(Player.objects.filter(pk__in=drift.keys()).values_list('pk', 'username'))
+
+        for player_id, fields in drift.items():
+            for field, (expected, stored) in fields.items():
+                self.stdout.write(self.style.WARNING(
+                    f"{names[player_id]}: {field} esperado={expected} gravado={stored}"
+                ))
+
+        unposted = ledger_drift(player_ids)
+        if unposted:
+            self.stdout.write(self.style.WARNING(
+                f"{len(unposted)} jogador(es) com o livro-razão diferente dos jogos."
+            ))
+
+        if drift or unposted:
+            raise CommandError(f"{len(drift)} jogador(es) com estatísticas divergentes.")
+        self.stdout.write(self.style.SUCCESS("Estatísticas consistentes com os jogos."))
+
+    def rebuild(self, player_ids, tournament):
+        # Os contadores do Player somam a carreira (todos os campeonatos);
+        # a classificação é reconstruída só no campeonato pedido.
+        with transaction.atomic():
+            total = rebuild_player_stats(player_ids)
+            rebuild_standings(tournament)
+            caching.bump_version_on_commit()
+        self.stdout.write(self.style.SUCCESS(f"Estatísticas de {total} jogador(es) recalculadas."))
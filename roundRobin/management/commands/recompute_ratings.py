@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from roundRobin import caching
+from roundRobin.models import Tournament
+from roundRobin.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Refaz o rating (Glicko) de todos os jogadores de um campeonato, '
+        'processando os confrontos em ordem cronológica.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tournament',
+            help='Campeonato (nome). Padrão: o campeonato ativo.',
+        )
+
+    def handle(self, *args, **options):
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+        else:
+            tournament = Tournament.objects.current()
+
+        started = time.monotonic()
+        with transaction.atomic():
+            total = recompute_ratings(tournament.pk)
+            caching.bump_version_on_commit()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rating de '{tournament}' recalculado: {total} confronto(s) em {time.monotonic() - started:.2f}s."
+        ))
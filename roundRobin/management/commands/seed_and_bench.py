@@ -0,0 +1,168 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from roundRobin import benchmark
+from roundRobin.models import Tournament, STATUS_SCHEDULED
+from roundRobin.synthetic import seed_tournament, discard_tournament
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria um campeonato sintético (N jogadores, R rodadas, séries MD3) em lote e mede '
+        'as URLs públicas e o "Salvar" do admin: p50/p95/p99 e consultas por requisição. '
+        'Use em homologação: o campeonato criado fica ativo durante a medição.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=100, help='Número de jogadores.')
+        parser.add_argument('--rounds', type=int, help='Rodadas geradas (padrão: round-robin completo).')
+        parser.add_argument('--completed-rounds', type=int, help='Rodadas já jogadas (padrão: metade).')
+        parser.add_argument('--seed', type=int, default=0, help='Semente dos resultados sorteados.')
+        parser.add_argument('--iterations', type=int, default=50, help='Requisições medidas por alvo.')
+        parser.add_argument('--warmup', type=int, default=5, help='Requisições descartadas por alvo.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Threads simultâneas.')
+        parser.add_argument(
+            '--targets',
+            nargs='+',
+            choices=[*benchmark.PUBLIC_URLS, benchmark.ADMIN_SAVE],
+            default=[*benchmark.PUBLIC_URLS, benchmark.ADMIN_SAVE],
+            help='Alvos medidos (padrão: todos).',
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Desliga o cache das páginas (mede sempre a renderização).',
+        )
+        parser.add_argument(
+            '--asgi',
+            action='store_true',
+            help='Compara as páginas públicas sync x async pelo handler ASGI (mesma carga).',
+        )
+        parser.add_argument('--json', dest='json_path', help="Grava o resultado em JSON ('-' para a saída padrão).")
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Mantém o campeonato sintético (padrão: apaga e reativa o anterior).',
+        )
+
+    def handle(self, *args, **options):
+        if options['players'] < 2:
+            raise CommandError("São necessários pelo menos 2 jogadores.")
+        if options['iterations'] < 1 or options['concurrency'] < 1 or options['warmup'] < 0:
+            raise CommandError("--iterations e --concurrency devem ser >= 1 e --warmup >= 0.")
+
+        previous = Tournament.objects.filter(is_active=True).first()
+        started = time.monotonic()
+        tournament = seed_tournament(
+            options['players'],
+            name=f"Benchmark {options['players']} jogadores {int(time.time())}",
+            rounds=options['rounds'],
+            completed_rounds=options['completed_rounds'],
+            seed=options['seed'],
+        )
+        seed_seconds = time.monotonic() - started
+        self.stderr.write(
+            f"Campeonato '{tournament}' criado em {seed_seconds:.2f}s "
+            f"({tournament.matches.count()} confrontos)."
+        )
+
+        try:
+            if options['no_cache']:
+                with override_settings(CACHES=NO_CACHE):
+                    results = self.run_targets(tournament, options)
+            else:
+                results = self.run_targets(tournament, options)
+        finally:
+            if not options['keep']:
+                discard_tournament(tournament)
+                if previous is not None:
+                    previous.activate()
+
+        report = {
+            'commit': self.git_commit(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'config': {
+                key: options[key] for key in (
+                    'players', 'rounds', 'completed_rounds', 'seed',
+                    'iterations', 'warmup', 'concurrency', 'no_cache', 'asgi',
+                )
+            },
+            'seed_seconds': round(seed_seconds, 3),
+            'results': results,
+        }
+        self.write_table(results)
+
+        if options['json_path'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Resultado gravado em {options['json_path']}.")
+
+    def run_targets(self, tournament, options):
+        results = {}
+        for target in options['targets']:
+            if target == benchmark.ADMIN_SAVE:
+                results[target] = self.run_admin_save(tournament, options)
+            elif options['asgi'] and target in benchmark.ASYNC_TARGETS:
+                for label, async_views in (('sync', False), ('async', True)):
+                    with override_settings(ROOT_URLCONF=benchmark.urlconf(async_views)):
+                        results[f"{target}:{label}"] = benchmark.run_asgi_target(
+                            target, options['iterations'], options['warmup'], options['concurrency'],
+                        )
+            else:
+                results[target] = benchmark.run_target(
+                    benchmark.get_request(target),
+                    options['iterations'], options['warmup'], options['concurrency'],
+                )
+            self.stderr.write(f"  {target}: ok")
+        return results
+
+    def run_admin_save(self, tournament, options):
+        total = options['warmup'] + options['iterations']
+        matches = list(
+            tournament.matches.filter(status=STATUS_SCHEDULED).order_by('round_number', 'pk')[:total]
+        )
+        if len(matches) < total:
+            raise CommandError(
+                f"O alvo '{benchmark.ADMIN_SAVE}' precisa de {total} confrontos agendados "
+                f"(há {len(matches)}): aumente --players/--rounds ou diminua --iterations."
+            )
+        user = benchmark.bench_user(f"bench-admin-{tournament.pk}")
+        try:
+            return benchmark.run_target(
+                benchmark.admin_save_request(matches, options['seed']),
+                options['iterations'], options['warmup'], options['concurrency'],
+                user=user, ok_status=(302,),
+            )
+        finally:
+            if not options['keep']:
+                user.delete()
+
+    def write_table(self, results):
+        header = f"{'alvo':<18} {'req':>5} {'erros':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'consultas':>9} {'req/s':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for target, row in results.items():
+            self.stdout.write(
+                f"{target:<18} {row['requests']:>5} {row['errors']:>5} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+                f"{row['queries_per_request']:>9.1f} {row['throughput_rps']:>8.1f}"
+            )
+
+    def git_commit(self):
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
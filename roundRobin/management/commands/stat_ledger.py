@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from roundRobin.ledger import fold, history
+from roundRobin.models import Player, Tournament
+from roundRobin.stats import STAT_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Auditoria do livro-razão de estatísticas: lançamentos de um jogador ou '
+        'os totais de todos os jogadores em um momento do passado (replay).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--player', help='Lista os lançamentos deste jogador (nome), com o saldo.')
+        parser.add_argument('--as-of', help='Considera só os lançamentos até este momento (ISO 8601).')
+        parser.add_argument('--tournament', help='Totais só dos jogos deste campeonato (nome).')
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_datetime(options['as_of'])
+            if as_of is None:
+                raise CommandError(f"Data inválida: {options['as_of']}")
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+
+        if options['player']:
+            try:
+                player = Player.objects.get(username=options['player'])
+            except Player.DoesNotExist:
+                raise CommandError(f"Jogador não encontrado: {options['player']}")
+            self.print_history(player, as_of)
+            return
+
+        tournament = None
+        if options['tournament']:
+            try:
+                tournament = Tournament.objects.get(name=options['tournament'])
+            except Tournament.DoesNotExist:
+                raise CommandError(f"Campeonato não encontrado: {options['tournament']}")
+        self.print_totals(fold(as_of=as_of, tournament=tournament))
+
+    def print_history(self, player, as_of):
+        balance = {field: 0 for field in ('wins', 'losses', 'total_farm')}
+        for event in history(player, as_of):
+            changes = ' '.join(
+                f"{field}={value:+}" for field in ('wins', 'losses', 'total_farm', 'total_kills', 'total_deaths')
+                if (value := getattr(event, field))
+            )
+            for field in balance:
+                balance[field] += getattr(event, field)
+            self.stdout.write(
+                f"{event.created_at:%Y-%m-%d %H:%M:%S} {event.get_kind_display():<11} "
+                f"confronto {event.match_id} jogo {event.game_id}: {changes}"
+            )
+        self.stdout.write(
+            f"Saldo: {balance['wins']} V / {balance['losses']} D / farm {balance['total_farm']}"
+        )
+
+    def print_totals(self, totals):
+        names = dict(Player.objects.filter(pk__in=totals.keys()).values_list('pk', 'username'))
+        rows = sorted(totals.items(), key=lambda item: (-item[1]['wins'], names.get(item[0], '')))
+        for player_id, fields in rows:
+            self.stdout.write(f"{names.get(player_id, player_id)}: " + ' '.join(
+                f"{field}={fields[field]}" for field in STAT_FIELDS
+            ))
+        self.stdout.write(f"{len(rows)} jogador(es).")
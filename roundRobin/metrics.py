@@ -0,0 +1,298 @@
+"""
+Instrumentação por requisição: consultas SQL, tempo de banco, tempo de
+template e tempo total, por view.
+
+- Cada resposta leva um cabeçalho Server-Timing (aparece no DevTools).
+- Os valores entram em histogramas em memória, por processo. De tempos em
+  tempos (FLUSH_INTERVAL) cada worker grava os seus em um arquivo próprio
+  (METRICS_DIR/metrics-<pid>.json, escrita atômica com rename). O endpoint
+  /metrics soma os arquivos dos workers vivos (os de workers mortos são
+  apagados) e responde no formato texto do Prometheus. Nenhum lock entre
+  processos: cada arquivo tem um só dono.
+
+O custo por requisição é um ContextVar, um wrapper de consulta e algumas
+somas em memória, então a instrumentação pode ficar ligada em produção.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+FLUSH_INTERVAL = 5.0
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMS = {
+    'ipx1_request_duration_seconds': ('Tempo total da requisição.', DURATION_BUCKETS),
+    'ipx1_request_db_seconds': ('Tempo gasto no banco por requisição.', DURATION_BUCKETS),
+    'ipx1_request_template_seconds': ('Tempo de renderização de templates por requisição.', DURATION_BUCKETS),
+    'ipx1_request_queries': ('Consultas SQL por requisição.', QUERY_BUCKETS),
+}
+
+# Medições da requisição em andamento (propaga para as threads do sync_to_async).
+current_request = ContextVar('ipx1_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+# --- COLETA ---
+
+def record_query(execute, sql, params, many, context):
+    """ execute_wrapper instalado em toda conexão: conta e cronometra. """
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+class TimedTemplate(Template):
+    """ Template que soma seu tempo de renderização (só o mais externo). """
+
+    def render(self, context=None, request=None):
+        stats = current_request.get()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """ Backend de templates padrão do Django, com TimedTemplate. """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+# --- ARMAZENAMENTO (por processo, somado entre processos no /metrics) ---
+
+def pid_alive(pid):
+    """ Se o processo existe (sinal 0: só verifica, não envia nada). """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, mas é de outro usuário
+    return True
+
+
+class MetricsStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.histograms = {}  # (métrica, view) -> [contagens por bucket..., soma, total]
+        self.last_flush = time.monotonic()
+
+    def observe(self, name, view, value):
+        buckets = HISTOGRAMS[name][1]
+        with self.lock:
+            row = self.histograms.get((name, view))
+            if row is None:
+                row = self.histograms[name, view] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def record(self, view, stats, total):
+        self.observe('ipx1_request_duration_seconds', view, total)
+        self.observe('ipx1_request_db_seconds', view, stats.db_time)
+        self.observe('ipx1_request_template_seconds', view, stats.template_time)
+        self.observe('ipx1_request_queries', view, stats.queries)
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def path(self, pid=None):
+        return os.path.join(self.directory, f"metrics-{pid or os.getpid()}.json")
+
+    def flush(self):
+        """ Grava o arquivo deste processo (temporário + rename: leitores nunca veem meio arquivo). """
+        with self.lock:
+            self.last_flush = time.monotonic()
+            data = [[name, view, row] for (name, view), row in self.histograms.items()]
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.metrics-')
+        try:
+            with os.fdopen(fd, 'w') as handle:
+                json.dump(data, handle)
+            os.replace(temp_path, self.path())
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def collect(self):
+        """
+        Soma os histogramas dos workers vivos. Arquivos de workers que já
+        morreram (reciclados pelo gunicorn, reinício do servidor) são apagados:
+        senão os contadores somariam as vidas anteriores para sempre.
+        """
+        self.flush()
+        merged = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            pid = filename[len('metrics-'):-len('.json')]
+            if not pid.isdigit() or not pid_alive(int(pid)):
+                try:
+                    os.unlink(os.path.join(self.directory, filename))
+                except OSError:
+                    pass  # outro worker apagou primeiro
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as handle:
+                    data = json.load(handle)
+            except (OSError, ValueError):
+                continue  # arquivo de um worker que acabou de morrer
+            for name, view, row in data:
+                if name not in HISTOGRAMS:
+                    continue
+                total = merged.setdefault((name, view), [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+        return merged
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None or _store.directory != settings.METRICS_DIR:
+        _store = MetricsStore(settings.METRICS_DIR)
+    return _store
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(merged):
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, view), row in sorted(merged.items()):
+            if metric != name:
+                continue
+            label = f'view="{_label(view)}"'
+            for bound, count in zip(buckets, row):
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {row[-1]}')
+            lines.append(f'{name}_sum{{{label}}} {row[-2]:.6f}')
+            lines.append(f'{name}_count{{{label}}} {row[-1]}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """ /metrics no formato texto do Prometheus (somando todos os workers). """
+    return HttpResponse(
+        render_prometheus(get_store().collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+# --- MIDDLEWARE ---
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+class RequestMetricsMiddleware:
+    """
+    Deve ser o PRIMEIRO do MIDDLEWARE, para o tempo total incluir os outros.
+    Respostas em streaming (feed SSE) não são medidas: duram o tempo da conexão.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, total):
+        if response.streaming:
+            return response
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} consultas", '
+            f'tpl;dur={stats.template_time * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        get_store().record(view_name(request), stats, total)
+        return response
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:34
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_standings(apps, schema_editor):
+    Player = apps.get_model('roundRobin', 'Player')
+    Match = apps.get_model('roundRobin', 'Match')
+    Standing = apps.get_model('roundRobin', 'Standing')
+
+    completed = Match.objects.filter(status='completed')
+    rows = []
+    for player in Player.objects.all():
+        played = completed.filter(models.Q(player1=player) | models.Q(player2=player)).count()
+        wins = completed.filter(series_winner=player).count()
+        rows.append(Standing(
+            player=player,
+            series_played=played,
+            series_wins=wins,
+            series_losses=played - wins,
+            points=wins * 3,
+            kill_death_balance=player.total_kills - player.total_deaths,
+            total_farm=player.total_farm,
+            wins=player.wins,
+            total_win_time=player.total_win_time,
+            average_win_time=player.total_win_time / player.wins if player.wins else datetime.timedelta(0),
+        ))
+    Standing.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0005_match_is_wo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='standing', serialize=False, to='roundRobin.player')),
+                ('series_played', models.IntegerField(default=0)),
+                ('series_wins', models.IntegerField(default=0)),
+                ('series_losses', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('kill_death_balance', models.IntegerField(default=0)),
+                ('total_farm', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('total_win_time', models.DurationField(default=datetime.timedelta(0))),
+                ('average_win_time', models.DurationField(default=datetime.timedelta(0))),
+            ],
+            options={
+                'verbose_name': 'Classificação',
+                'verbose_name_plural': 'Classificação',
+                'ordering': ['-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player'],
+                'indexes': [models.Index(fields=['-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player'], name='standing_rank_idx')],
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
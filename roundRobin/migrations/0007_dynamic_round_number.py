@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:39
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0006_standing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='round_number',
+            field=models.IntegerField(db_index=True, default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Rodada'),
+        ),
+    ]
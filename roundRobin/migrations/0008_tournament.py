@@ -0,0 +1,125 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:02
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_default_tournament(apps, schema_editor):
+    """ Tudo o que já existe passa a ser a primeira temporada (ativa). """
+    Tournament = apps.get_model('roundRobin', 'Tournament')
+    Player = apps.get_model('roundRobin', 'Player')
+    Match = apps.get_model('roundRobin', 'Match')
+
+    if not Match.objects.exists() and not Player.objects.exists():
+        return
+    tournament = Tournament.objects.create(name='Temporada 1', is_active=True)
+    Match.objects.update(tournament=tournament)
+
+
+def populate_standings(apps, schema_editor):
+    # Com uma única temporada, os contadores do Player são os da temporada.
+    Tournament = apps.get_model('roundRobin', 'Tournament')
+    Player = apps.get_model('roundRobin', 'Player')
+    Match = apps.get_model('roundRobin', 'Match')
+    Standing = apps.get_model('roundRobin', 'Standing')
+
+    tournament = Tournament.objects.filter(is_active=True).first()
+    if tournament is None:
+        return
+
+    completed = Match.objects.filter(tournament=tournament, status='completed')
+    rows = []
+    for player in Player.objects.all():
+        played = completed.filter(models.Q(player1=player) | models.Q(player2=player)).count()
+        wins = completed.filter(series_winner=player).count()
+        rows.append(Standing(
+            tournament=tournament,
+            player=player,
+            series_played=played,
+            series_wins=wins,
+            series_losses=played - wins,
+            points=wins * 3,
+            kill_death_balance=player.total_kills - player.total_deaths,
+            total_farm=player.total_farm,
+            wins=player.wins,
+            total_win_time=player.total_win_time,
+            average_win_time=player.total_win_time / player.wins if player.wins else datetime.timedelta(0),
+        ))
+    Standing.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0007_dynamic_round_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('is_active', models.BooleanField(default=False, verbose_name='Ativo')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Campeonato',
+                'verbose_name_plural': 'Campeonatos',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_tournament')],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='tournament',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='roundRobin.tournament', verbose_name='Campeonato'),
+        ),
+        migrations.RunPython(create_default_tournament, migrations.RunPython.noop),
+        # Sem default: as linhas existentes já foram preenchidas acima, e num
+        # banco vazio não há o que preencher (nenhum campeonato é criado).
+        migrations.AlterField(
+            model_name='match',
+            name='tournament',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='roundRobin.tournament', verbose_name='Campeonato'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'status', 'round_number'], name='match_tourn_status_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'series_winner'], name='match_tourn_winner_idx'),
+        ),
+        # A classificação passa a ser por campeonato: a tabela é derivada
+        # (Match/Game), então é recriada e preenchida de novo.
+        migrations.DeleteModel(
+            name='Standing',
+        ),
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_played', models.IntegerField(default=0)),
+                ('series_wins', models.IntegerField(default=0)),
+                ('series_losses', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('kill_death_balance', models.IntegerField(default=0)),
+                ('total_farm', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('total_win_time', models.DurationField(default=datetime.timedelta(0))),
+                ('average_win_time', models.DurationField(default=datetime.timedelta(0))),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='roundRobin.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='roundRobin.tournament')),
+            ],
+            options={
+                'verbose_name': 'Classificação',
+                'verbose_name_plural': 'Classificação',
+                'ordering': ['-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player'],
+                'indexes': [models.Index(fields=['tournament', '-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player'], name='standing_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'player'), name='standing_tournament_player_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
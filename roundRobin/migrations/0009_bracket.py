@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0008_tournament'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bracket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.PositiveSmallIntegerField(choices=[(4, '4 jogadores'), (8, '8 jogadores'), (16, '16 jogadores')], default=4, verbose_name='Tamanho')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bracket', to='roundRobin.tournament', verbose_name='Campeonato')),
+            ],
+            options={
+                'verbose_name': 'Chave dos Playoffs',
+                'verbose_name_plural': 'Chaves dos Playoffs',
+            },
+        ),
+        migrations.CreateModel(
+            name='BracketMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.PositiveSmallIntegerField(verbose_name='Fase')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('seed1', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('seed2', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('bracket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='roundRobin.bracket')),
+                ('player1', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='roundRobin.player')),
+                ('player2', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='roundRobin.player')),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='roundRobin.player', verbose_name='Vencedor da Série')),
+            ],
+            options={
+                'verbose_name': 'Confronto dos Playoffs',
+                'verbose_name_plural': 'Confrontos dos Playoffs',
+                'ordering': ['stage', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('bracket', 'stage', 'position'), name='bracket_match_slot_uniq')],
+            },
+        ),
+    ]
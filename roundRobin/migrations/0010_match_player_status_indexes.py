@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0009_bracket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['player1', 'status'], name='match_p1_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['player2', 'status'], name='match_p2_status_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:17
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+FIRST_BLOOD = 'first_blood'
+FARM_CONDITIONS = ('farm_80', 'time_farm')
+
+
+def open_ledger(apps, schema_editor):
+    Game = apps.get_model('roundRobin', 'Game')
+    StatEvent = apps.get_model('roundRobin', 'StatEvent')
+
+    opened_at = django.utils.timezone.now()
+    games = Game.objects.filter(is_processed=True, winner__isnull=False).select_related('match')
+    rows = []
+    for game in games.iterator(chunk_size=1000):
+        match = game.match
+        winner_is_p1 = game.winner_id == match.player1_id
+        loser_id = match.player2_id if winner_is_p1 else match.player1_id
+        first_blood = game.win_condition == FIRST_BLOOD
+        common = dict(match_id=match.pk, game_id=game.pk, kind='apply', created_at=opened_at)
+        rows.append(StatEvent(
+            player_id=game.winner_id, wins=1,
+            total_win_time=game.duration or datetime.timedelta(0),
+            total_farm=game.player1_farm if winner_is_p1 else game.player2_farm,
+            farm_wins=int(game.win_condition in FARM_CONDITIONS),
+            first_blood_wins=int(first_blood), total_kills=int(first_blood),
+            **common,
+        ))
+        rows.append(StatEvent(
+            player_id=loser_id, losses=1,
+            total_farm=game.player2_farm if winner_is_p1 else game.player1_farm,
+            total_deaths=int(first_blood),
+            **common,
+        ))
+    StatEvent.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0010_match_player_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('apply', 'Lançamento'), ('adjust', 'Correção'), ('revert', 'Estorno')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('first_blood_wins', models.IntegerField(default=0)),
+                ('farm_wins', models.IntegerField(default=0)),
+                ('total_farm', models.IntegerField(default=0)),
+                ('total_kills', models.IntegerField(default=0)),
+                ('total_deaths', models.IntegerField(default=0)),
+                ('total_win_time', models.DurationField(default=datetime.timedelta(0))),
+                ('game', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='roundRobin.game')),
+                ('match', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='roundRobin.match')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_events', to='roundRobin.player')),
+            ],
+            options={
+                'verbose_name': 'Lançamento de Estatística',
+                'verbose_name_plural': 'Lançamentos de Estatísticas',
+                'ordering': ['created_at', 'pk'],
+                'indexes': [models.Index(fields=['match', 'game', 'player'], name='stat_event_game_idx'), models.Index(fields=['player', 'created_at'], name='stat_event_player_time_idx')],
+            },
+        ),
+        # Abre o livro-razão com os jogos que já estavam somados nos
+        # contadores (is_processed), antes de apagar o flag.
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='game',
+            name='is_processed',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0011_stat_event_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='rated_result',
+            field=models.CharField(blank=True, default='', editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='rating_change1',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='rating_change2',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='standing',
+            name='rating',
+            field=models.FloatField(default=1500.0),
+        ),
+        migrations.AddField(
+            model_name='standing',
+            name='rating_deviation',
+            field=models.FloatField(default=350.0),
+        ),
+    ]
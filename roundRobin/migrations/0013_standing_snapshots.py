@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:26
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roundRobin', '0012_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round_number', models.IntegerField()),
+                ('position', models.IntegerField()),
+                ('points', models.IntegerField(default=0)),
+                ('series_played', models.IntegerField(default=0)),
+                ('series_wins', models.IntegerField(default=0)),
+                ('kill_death_balance', models.IntegerField(default=0)),
+                ('total_farm', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('total_win_time', models.DurationField(default=datetime.timedelta(0))),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='roundRobin.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='roundRobin.tournament')),
+            ],
+            options={
+                'verbose_name': 'Classificação por Rodada',
+                'verbose_name_plural': 'Classificação por Rodada',
+                'ordering': ['round_number', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'round_number', 'player'), name='snapshot_round_player_uniq')],
+            },
+        ),
+    ]
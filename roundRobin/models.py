@@ -1,10 +1,17 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import F
+from django.db.models import F, Q, Case, When, Value, Func, OuterRef, Subquery, ExpressionWrapper
 from datetime import timedelta
-from django.db import transaction
+from django.utils import timezone
+from django.db import IntegrityError, transaction
 
+# Quantidade mínima de rodadas oferecida no admin. A tabela gerada por
+# generate_schedule pode ter quantas rodadas precisar (n-1 para n jogadores).
 TOTAL_ROUNDS = 10
-ROUND_CHOICES = [ (i, f"Rodada {i}") for i in range(1, TOTAL_ROUNDS + 1) ]
+
+def round_choices(total_rounds=TOTAL_ROUNDS):
+    return [ (i, f"Rodada {i}") for i in range(1, total_rounds + 1) ]
 
 MATCH_FARM_LIMIT = timedelta(minutes=12)
 
@@ -24,6 +31,128 @@ STATUS_CHOICES = [
     (STATUS_COMPLETED, 'Concluída'),
 ]
 
+def format_duration(duration):
+    """ Formata um timedelta como MM:SS (usado nas tabelas). """
+    if not duration:
+        return "00:00"
+    total_seconds = int(duration.total_seconds())
+    minutes = total_seconds // 60
+    seconds = total_seconds % 60
+    return f"{minutes:02}:{seconds:02}"
+
+
+def _count_subquery(queryset):
+    """
+    Transforma um queryset em um COUNT(*) correlacionado (sem GROUP BY),
+    para ser usado dentro de .annotate().
+    """
+    counted = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+    return Subquery(counted, output_field=models.IntegerField())
+
+
+DEFAULT_TOURNAMENT_NAME = "Temporada 1"
+
+
+class TournamentQuerySet(models.QuerySet):
+
+    def current(self):
+        """
+        O campeonato ativo. Se não houver nenhum ativo (banco novo, ou todos
+        desativados), cria a temporada padrão ou a reativa, se ela já existir,
+        para o admin e os comandos funcionarem de imediato. Nunca devolve um
+        campeonato inativo.
+        """
+        tournament = self.filter(is_active=True).first()
+        if tournament is None:
+            tournament, _ = self.get_or_create(
+                name=DEFAULT_TOURNAMENT_NAME, defaults={'is_active': True}
+            )
+        if not tournament.is_active:
+            tournament.is_active = True
+            try:
+                with transaction.atomic():
+                    tournament.save(update_fields=['is_active'])
+            except IntegrityError:
+                # Outro processo ativou um campeonato nesse meio-tempo
+                # (single_active_tournament): é esse o atual.
+                tournament = self.get(is_active=True)
+        return tournament
+
+
+class Tournament(models.Model):
+    """
+    Uma temporada. Confrontos e classificação pertencem a um campeonato;
+    as páginas públicas mostram só o campeonato ativo (is_active).
+    """
+    name = models.CharField(verbose_name="Nome", max_length=100, unique=True)
+    is_active = models.BooleanField(verbose_name="Ativo", default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TournamentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # No máximo um campeonato ativo por vez.
+            models.UniqueConstraint(
+                fields=['is_active'],
+                condition=Q(is_active=True),
+                name='single_active_tournament',
+            ),
+        ]
+        verbose_name = "Campeonato"
+        verbose_name_plural = "Campeonatos"
+
+    def __str__(self):
+        return self.name
+
+    @transaction.atomic
+    def activate(self):
+        """ Torna este o campeonato ativo (desativando o anterior). """
+        Tournament.objects.filter(is_active=True).exclude(pk=self.pk).update(is_active=False)
+        self.is_active = True
+        self.save(update_fields=['is_active'])
+
+
+class PlayerQuerySet(models.QuerySet):
+
+    def with_standings(self, tournament=None):
+        """
+        Anota séries, pontos e critérios de desempate direto no SQL e já
+        devolve os jogadores na ordem da classificação
+        (Pontos > Séries > Saldo K/D > Farm > T.M.V.), em UMA consulta.
+        Com `tournament`, conta só as séries daquele campeonato (um Tournament
+        ou um queryset fatiado com [:1], que vira subconsulta).
+        """
+        completed = Match.objects.filter(status=STATUS_COMPLETED)
+        if tournament is not None:
+            completed = completed.filter(tournament=tournament)
+        series_wins = _count_subquery(completed.filter(series_winner=OuterRef('pk')))
+        series_played = _count_subquery(
+            completed.filter(Q(player1=OuterRef('pk')) | Q(player2=OuterRef('pk')))
+        )
+
+        return self.annotate(
+            series_wins_count=series_wins,
+            series_played_count=series_played,
+        ).annotate(
+            points_count=F('series_wins_count') * 3,
+            kd_balance=F('total_kills') - F('total_deaths'),
+            avg_win_time=Case(
+                When(wins=0, then=Value(timedelta(0))),
+                default=ExpressionWrapper(F('total_win_time') / F('wins'), output_field=models.DurationField()),
+                output_field=models.DurationField(),
+            ),
+        ).order_by(
+            '-points_count',
+            '-series_wins_count',
+            '-kd_balance',
+            '-total_farm',
+            'avg_win_time',
+            'pk',
+        )
+
+
 class Player(models.Model):
     username = models.CharField(
         verbose_name = "Nome de Usuario",
@@ -45,6 +174,8 @@ class Player(models.Model):
         help_text="Tempo total de vitória acumulado."
     )
 
+    objects = PlayerQuerySet.as_manager()
+
     # --- MÉTODOS E PROPRIEDADES (CÁLCULOS) ---
     def __str__(self):
         # (Este é seu __str__ original, que está correto)
@@ -74,17 +205,16 @@ class Player(models.Model):
 
     @property
     def average_win_time_display(self):
-        duration = self.average_win_time
-        if not duration:
-            return "00:00"
-        total_seconds = int(duration.total_seconds())
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-        return f"{minutes:02}:{seconds:02}"
+        return format_duration(self.average_win_time)
 
+    # As propriedades de série abaixo usam os valores anotados por
+    # Player.objects.with_standings() quando existem, evitando uma
+    # consulta por jogador na tabela de classificação.
     @property
     def series_played(self):
         """ Retorna a contagem de SéRIES (Matches) jogadas. """
+        if hasattr(self, 'series_played_count'):
+            return self.series_played_count
         # (Nós usamos os 'related_name's que já existem no seu modelo Match)
         played_as_p1 = self.matches_as_player1.filter(status=STATUS_COMPLETED).count()
         played_as_p2 = self.matches_as_player2.filter(status=STATUS_COMPLETED).count()
@@ -93,6 +223,8 @@ class Player(models.Model):
     @property
     def series_wins(self):
         """ Retorna a contagem de SéRIES (Matches) ganhas. """
+        if hasattr(self, 'series_wins_count'):
+            return self.series_wins_count
         # (related_name 'won_matches' do campo Match.series_winner)
         return self.won_matches.filter(status=STATUS_COMPLETED).count()
 
@@ -103,59 +235,18 @@ class Player(models.Model):
 
     @property
     def points(self):
+        if hasattr(self, 'points_count'):
+            return self.points_count
         return self.series_wins * 3
 
-    @transaction.atomic 
-    def add_match_result(self, did_win: bool, farm: int, win_condition: str, match_duration: timedelta):
-        update_fields = {}
-        if did_win:
-            update_fields['wins'] = F('wins') + 1
-            update_fields['total_win_time'] = F('total_win_time') + match_duration
-            
-            if win_condition in [WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM]:
-                update_fields['farm_wins'] = F('farm_wins') + 1
-            elif win_condition == WIN_CONDITION_FIRST_BLOOD: 
-                update_fields['first_blood_wins'] = F('first_blood_wins') + 1
-                update_fields['total_kills'] = F('total_kills') + 1
-            
-            update_fields['total_farm'] = F('total_farm') + farm
-        
-        else: 
-            update_fields['losses'] = F('losses') + 1
-            update_fields['total_farm'] = F('total_farm') + farm
-            
-            if win_condition == WIN_CONDITION_FIRST_BLOOD:
-                update_fields['total_deaths'] = F('total_deaths') + 1
-        
-        Player.objects.filter(pk=self.pk).update(**update_fields)
-        self.refresh_from_db()
-
-    @transaction.atomic
-    def remove_match_result(self, did_win: bool, farm: int, win_condition: str, match_duration: timedelta):
-        update_fields = {}
-        if did_win:
-            update_fields['wins'] = F('wins') - 1
-            update_fields['total_win_time'] = F('total_win_time') - match_duration
-            
-            if win_condition in [WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM]:
-                update_fields['farm_wins'] = F('farm_wins') - 1
-            elif win_condition == WIN_CONDITION_FIRST_BLOOD:
-                update_fields['first_blood_wins'] = F('first_blood_wins') - 1
-                update_fields['total_kills'] = F('total_kills') - 1
-            
-            update_fields['total_farm'] = F('total_farm') - farm
-        
-        else: 
-            update_fields['losses'] = F('losses') - 1
-            update_fields['total_farm'] = F('total_farm') - farm
-            
-            if win_condition == WIN_CONDITION_FIRST_BLOOD:
-                update_fields['total_deaths'] = F('total_deaths') - 1
-        
-        Player.objects.filter(pk=self.pk).update(**update_fields)
-        self.refresh_from_db()
-
 class Match(models.Model):
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="matches",
+        verbose_name="Campeonato"
+    )
+
     status = models.CharField(
         max_length=10,
         choices=STATUS_CHOICES,
@@ -168,7 +259,12 @@ class Match(models.Model):
     player2 = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="matches_as_player2")
     
     # --- Campos de Agendamento (Antes em ScheduledMatch) ---
-    round_number = models.IntegerField(choices=ROUND_CHOICES, default=1, db_index=True)
+    round_number = models.IntegerField(
+        verbose_name="Rodada",
+        default=1,
+        db_index=True,
+        validators=[MinValueValidator(1)]
+    )
     scheduled_time = models.DateTimeField(verbose_name="Horário Agendado", null=True, blank=True)
     
     # --- Campos de Resultado (Antes em Match, agora unificados) ---
@@ -187,10 +283,24 @@ class Match(models.Model):
         help_text="Marque se esta série foi vencida por W.O. O 'Vencedor da Série' deve ser definido manualmente e o status deve ser 'Concluída'."
     )
 
+    # Efeito deste confronto no rating dos jogadores (ver roundRobin/ratings.py):
+    # o placar avaliado ("2-1"; vazio = não conta) e quanto cada um ganhou/perdeu.
+    rated_result = models.CharField(max_length=7, blank=True, default='', editable=False)
+    rating_change1 = models.FloatField(default=0.0, editable=False)
+    rating_change2 = models.FloatField(default=0.0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['round_number', 'scheduled_time']
+        indexes = [
+            # Lista de partidas e classificação da temporada atual.
+            models.Index(fields=['tournament', 'status', 'round_number'], name='match_tourn_status_round_idx'),
+            models.Index(fields=['tournament', 'series_winner'], name='match_tourn_winner_idx'),
+            # Histórico do jogador (perfil): "player1 = X OR player2 = X" por status.
+            models.Index(fields=['player1', 'status'], name='match_p1_status_idx'),
+            models.Index(fields=['player2', 'status'], name='match_p2_status_idx'),
+        ]
         verbose_name = "Confronto (MD3)" # Mudei o nome para ficar claro
         verbose_name_plural = "Confrontos (MD3)"
  
@@ -202,6 +312,24 @@ class Match(models.Model):
         else:
             return f"[R{self.round_number}] {self.player1.username} vs {self.player2.username} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        # Sem campeonato informado (admin, shell): o ativo. Não é um default do
+        # campo porque o default rodaria uma consulta a cada Match() criado,
+        # inclusive nos bulk_create, que já passam o tournament_id.
+        if self.tournament_id is None:
+            self.tournament = Tournament.objects.current()
+        super().save(*args, **kwargs)
+
+    # Placar da série. Usam self.games.all() para aproveitar o
+    # prefetch_related('games') da lista de partidas (sem consultas extras).
+    @property
+    def player1_game_wins(self):
+        return sum(1 for game in self.games.all() if game.winner_id == self.player1_id)
+
+    @property
+    def player2_game_wins(self):
+        return sum(1 for game in self.games.all() if game.winner_id == self.player2_id)
+
 class Game(models.Model):
     """
     Representa UMA Partida (Jogo) dentro de um Confronto (Match) MD3.
@@ -247,9 +375,6 @@ class Game(models.Model):
         blank=True, 
     )
 
-    # Nosso "lacre" de segurança para não processar duas vezes
-    is_processed = models.BooleanField(default=False, editable=False)
-    
     class Meta:
         unique_together = ('match', 'game_number')
         ordering = ['game_number']
@@ -257,4 +382,255 @@ class Game(models.Model):
         verbose_name_plural = "Partidas (Jogos)"
 
     def __str__(self):
-        return f"{self.match} - Jogo {self.game_number}"
\ No newline at end of file
+        return f"{self.match} - Jogo {self.game_number}"
+
+STAT_EVENT_APPLY = 'apply'
+STAT_EVENT_ADJUST = 'adjust'
+STAT_EVENT_REVERT = 'revert'
+STAT_EVENT_KINDS = [
+    (STAT_EVENT_APPLY, 'Lançamento'),
+    (STAT_EVENT_ADJUST, 'Correção'),
+    (STAT_EVENT_REVERT, 'Estorno'),
+]
+
+
+class StatEvent(models.Model):
+    """
+    Livro-razão das estatísticas (somente inserção). Cada linha é o efeito
+    assinado de UM jogo em UM jogador; editar ou desfazer um jogo grava só a
+    diferença (correção/estorno), nunca altera linhas antigas. Os contadores
+    do Player são a soma destas linhas (ver roundRobin/ledger.py).
+
+    match/game guardam o id mesmo depois que o confronto ou o jogo é apagado
+    (sem FK no banco), para o estorno e a auditoria.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="stat_events")
+    match = models.ForeignKey(
+        Match, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    game = models.ForeignKey(
+        Game, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    kind = models.CharField(max_length=10, choices=STAT_EVENT_KINDS)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    # Mesmos campos (e regras) dos contadores do Player, com sinal.
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    first_blood_wins = models.IntegerField(default=0)
+    farm_wins = models.IntegerField(default=0)
+    total_farm = models.IntegerField(default=0)
+    total_kills = models.IntegerField(default=0)
+    total_deaths = models.IntegerField(default=0)
+    total_win_time = models.DurationField(default=timedelta(0))
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        indexes = [
+            models.Index(fields=['match', 'game', 'player'], name='stat_event_game_idx'),
+            models.Index(fields=['player', 'created_at'], name='stat_event_player_time_idx'),
+        ]
+        verbose_name = "Lançamento de Estatística"
+        verbose_name_plural = "Lançamentos de Estatísticas"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} jogo {self.game_id} / jogador {self.player_id}"
+
+
+class Standing(models.Model):
+    """
+    Linha desnormalizada da classificação (uma por jogador e campeonato).
+    Mantida por delta em MatchAdmin.save_related (ver roundRobin/standings.py),
+    para que a tabela seja lida com um único ORDER BY indexado.
+    """
+
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="standings"
+    )
+    player = models.ForeignKey(
+        Player,
+        on_delete=models.CASCADE,
+        related_name="standings"
+    )
+
+    # --- Séries (MD3) ---
+    series_played = models.IntegerField(default=0)
+    series_wins = models.IntegerField(default=0)
+    series_losses = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    # --- Critérios de desempate (somente os jogos deste campeonato) ---
+    kill_death_balance = models.IntegerField(default=0)
+    total_farm = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    total_win_time = models.DurationField(default=timedelta(0))
+    average_win_time = models.DurationField(default=timedelta(0))
+
+    # --- Rating de força (Glicko, ver roundRobin/ratings.py); não entra na ordenação ---
+    rating = models.FloatField(default=1500.0)
+    rating_deviation = models.FloatField(default=350.0)
+
+    class Meta:
+        ordering = ['-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player']
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'player'], name='standing_tournament_player_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tournament', '-points', '-series_wins', '-kill_death_balance', '-total_farm', 'average_win_time', 'player'],
+                name='standing_rank_idx',
+            ),
+        ]
+        verbose_name = "Classificação"
+        verbose_name_plural = "Classificação"
+
+    def __str__(self):
+        return f"{self.player.username}: {self.points} pts"
+
+    @property
+    def average_win_time_display(self):
+        return format_duration(self.average_win_time)
+
+
+class StandingSnapshot(models.Model):
+    """
+    Classificação ao fim de cada rodada (gráfico de posições). Gerada em uma
+    passada cronológica pelos confrontos (ver roundRobin/snapshots.py) e
+    refeita da rodada alterada em diante a cada resultado salvo.
+    """
+
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="standing_snapshots"
+    )
+    round_number = models.IntegerField()
+    player = models.ForeignKey(
+        Player,
+        on_delete=models.CASCADE,
+        related_name="standing_snapshots"
+    )
+    position = models.IntegerField()
+    points = models.IntegerField(default=0)
+    series_played = models.IntegerField(default=0)
+    series_wins = models.IntegerField(default=0)
+
+    # Desempates acumulados até a rodada: a reconstrução de uma rodada em
+    # diante parte daqui, sem reler os jogos das rodadas anteriores.
+    kill_death_balance = models.IntegerField(default=0)
+    total_farm = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    total_win_time = models.DurationField(default=timedelta(0))
+
+    class Meta:
+        ordering = ['round_number', 'position']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tournament', 'round_number', 'player'], name='snapshot_round_player_uniq',
+            ),
+        ]
+        verbose_name = "Classificação por Rodada"
+        verbose_name_plural = "Classificação por Rodada"
+
+    def __str__(self):
+        return f"R{self.round_number} {self.position}º: jogador {self.player_id}"
+
+
+BRACKET_SIZES = [(4, "4 jogadores"), (8, "8 jogadores"), (16, "16 jogadores")]
+
+
+class Bracket(models.Model):
+    """
+    Chave eliminatória dos playoffs de um campeonato. Os confrontos
+    (BracketMatch) são criados a partir da classificação ao salvar a chave
+    pela primeira vez (ver roundRobin/playoffs.py).
+    """
+    tournament = models.OneToOneField(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="bracket",
+        verbose_name="Campeonato"
+    )
+    size = models.PositiveSmallIntegerField(verbose_name="Tamanho", choices=BRACKET_SIZES, default=4)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Chave dos Playoffs"
+        verbose_name_plural = "Chaves dos Playoffs"
+
+    def __str__(self):
+        return f"Playoffs {self.tournament} ({self.size} jogadores)"
+
+    @property
+    def stage_count(self):
+        """ Número de fases (2 para 4 jogadores, 4 para 16). """
+        return self.size.bit_length() - 1
+
+    def clean(self):
+        if self.pk is None and self.tournament_id:
+            ranked = Standing.objects.filter(tournament_id=self.tournament_id).count()
+            if ranked < self.size:
+                raise ValidationError(
+                    f"A classificação de '{self.tournament}' tem {ranked} jogador(es); "
+                    f"a chave precisa de {self.size}."
+                )
+
+
+class BracketMatch(models.Model):
+    """
+    Um confronto da chave. `stage` 1 é a primeira fase e a final é a última;
+    o vencedor do confronto `position` avança para o confronto position // 2
+    da fase seguinte (lado 1 se `position` for par, lado 2 se for ímpar).
+    """
+    bracket = models.ForeignKey(Bracket, on_delete=models.CASCADE, related_name="matches")
+    stage = models.PositiveSmallIntegerField(verbose_name="Fase")
+    position = models.PositiveSmallIntegerField(verbose_name="Posição")
+
+    # Vazios até o confronto anterior ter vencedor.
+    player1 = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    player2 = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    seed1 = models.PositiveSmallIntegerField(null=True, blank=True)
+    seed2 = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    winner = models.ForeignKey(
+        Player,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Vencedor da Série"
+    )
+
+    class Meta:
+        ordering = ['stage', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['bracket', 'stage', 'position'], name='bracket_match_slot_uniq'),
+        ]
+        verbose_name = "Confronto dos Playoffs"
+        verbose_name_plural = "Confrontos dos Playoffs"
+
+    def __str__(self):
+        names = [p.username if p else "?" for p in (self.player1, self.player2)]
+        return f"Fase {self.stage}: {names[0]} vs {names[1]}"
+
+    def clean(self):
+        if self.winner_id is not None and self.winner_id not in (self.player1_id, self.player2_id):
+            raise ValidationError({'winner': "O vencedor deve ser um dos dois jogadores do confronto."})
+
+
+class EventSequence(models.Model):
+    """
+    Contador dos ids do feed ao vivo (roundRobin/events.py). Fica no banco, e
+    não no cache, porque o incr do FileBasedCache não é atômico entre os
+    workers: dois resultados salvos ao mesmo tempo ganhariam o mesmo id. A
+    linha é travada (SELECT ... FOR UPDATE) enquanto o evento é gravado.
+    """
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequência do feed ao vivo"
+
+    def __str__(self):
+        return str(self.value)
@@ -0,0 +1,147 @@
+"""
+Chave eliminatória dos playoffs (4, 8 ou 16 jogadores).
+
+Os cabeças de chave vêm da classificação materializada com um LIMIT k no
+SQL: o índice 'standing_rank_idx' já entrega as linhas na ordem, então montar
+(ou pré-visualizar) a chave custa o mesmo com 10 ou com 1000 jogadores.
+
+O avanço dos vencedores é feito por propagate(): lê os confrontos da chave
+(no máximo 15) em uma consulta, percorre as fases em ordem e grava só o que
+mudou, com um bulk_update.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .caching import bracket_fragment_key
+from .models import Bracket, BracketMatch, Standing
+from .standings import top_standings
+
+# Título da fase pelo número de confrontos nela.
+STAGE_TITLES = {1: "Grande Final", 2: "Semi-Final", 4: "Quartas de Final", 8: "Oitavas de Final"}
+
+# Sem chave cadastrada, a página mostra a prévia com os 4 primeiros.
+PREVIEW_SIZE = 4
+
+
+def seed_order(size):
+    """ Cabeças de chave na ordem dos confrontos da 1ª fase (8: 1x8, 4x5, 2x7, 3x6). """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for s in order for seed in (s, total - s)]
+    return order
+
+
+def top_players(tournament_id, size):
+    """
+    Os `size` primeiros da classificação (LIMIT no SQL, sem ordenar todo
+    mundo), com o desempate por confronto direto.
+    """
+    return [
+        standing.player for standing in
+        top_standings(Standing.objects.filter(tournament_id=tournament_id).select_related('player'), size)
+    ]
+
+
+def build_matches(bracket, players):
+    """ Confrontos (não salvos) da chave, com `players` na ordem da classificação. """
+    order = seed_order(bracket.size)
+    matches = [
+        BracketMatch(
+            bracket=bracket, stage=1, position=position,
+            seed1=seed1, seed2=seed2, player1=players[seed1 - 1], player2=players[seed2 - 1],
+        )
+        for position, (seed1, seed2) in enumerate(zip(order[::2], order[1::2]))
+    ]
+    for stage in range(2, bracket.stage_count + 1):
+        matches.extend(
+            BracketMatch(bracket=bracket, stage=stage, position=position)
+            for position in range(bracket.size >> stage)
+        )
+    return matches
+
+
+@transaction.atomic
+def seed_bracket(bracket):
+    """ (Re)cria os confrontos da chave a partir da classificação atual. """
+    players = top_players(bracket.tournament_id, bracket.size)
+    if len(players) < bracket.size:
+        raise ValueError(f"São necessários {bracket.size} jogadores na classificação (há {len(players)}).")
+    bracket.matches.all().delete()
+    return BracketMatch.objects.bulk_create(build_matches(bracket, players))
+
+
+@transaction.atomic
+def propagate(bracket):
+    """
+    Leva cada vencedor para a fase seguinte. Se um resultado for corrigido,
+    o vencedor antigo sai das fases seguintes (e os resultados que dependiam
+    dele são apagados). Retorna quantos confrontos mudaram.
+    """
+    matches = {(m.stage, m.position): m for m in bracket.matches.all()}
+    changed = {}
+    for stage in range(1, bracket.stage_count + 1):
+        for position in range(bracket.size >> stage):
+            match = matches[stage, position]
+            if match.winner_id is not None and match.winner_id not in (match.player1_id, match.player2_id):
+                match.winner_id = None
+                changed[match.pk] = match
+
+            following = matches.get((stage + 1, position // 2))
+            if following is None:
+                continue
+            side = 1 if position % 2 == 0 else 2
+            seed = match.seed1 if match.winner_id == match.player1_id else match.seed2
+            if match.winner_id is None:
+                seed = None
+            if getattr(following, f'player{side}_id') != match.winner_id:
+                setattr(following, f'player{side}_id', match.winner_id)
+                setattr(following, f'seed{side}', seed)
+                changed[following.pk] = following
+
+    BracketMatch.objects.bulk_update(changed.values(), ['player1', 'player2', 'seed1', 'seed2', 'winner'])
+    return len(changed)
+
+
+def active_bracket():
+    """ A chave do campeonato ativo, se já existir (uma consulta). """
+    return Bracket.objects.filter(tournament__is_active=True).first()
+
+
+def bracket_matches(bracket):
+    return list(bracket.matches.select_related('player1', 'player2', 'winner'))
+
+
+def stages(matches):
+    """ Confrontos agrupados por fase, na ordem, com o título de cada fase. """
+    grouped = {}
+    for match in matches:
+        grouped.setdefault(match.stage, []).append(match)
+    return [
+        {'stage': stage, 'title': STAGE_TITLES.get(len(items), f"Fase {stage}"), 'matches': items}
+        for stage, items in sorted(grouped.items())
+    ]
+
+
+def render_bracket(bracket):
+    """ HTML da chave; guardado em cache até o próximo resultado dos playoffs. """
+    key = bracket_fragment_key(bracket.pk)
+    html = cache.get(key)
+    if html is None:
+        matches = bracket_matches(bracket)
+        html = render_to_string('roundRobin/playoffs_bracket.html', {
+            'stages': stages(matches),
+            'champion': matches[-1].winner if matches else None,
+        })
+        cache.set(key, html, None)
+    return html
+
+
+def render_preview(tournament_players):
+    """ Prévia (sem resultados) com os PREVIEW_SIZE primeiros da classificação. """
+    preview = Bracket(size=PREVIEW_SIZE)
+    return render_to_string('roundRobin/playoffs_bracket.html', {
+        'stages': stages(build_matches(preview, tournament_players)),
+        'champion': None,
+    })
@@ -0,0 +1,109 @@
+"""
+Publicação estática das páginas públicas (servidas direto pelo nginx).
+
+As páginas públicas só mudam quando um resultado é salvo. Então, logo depois
+do commit (ver caching.bump_version_on_commit), elas são renderizadas uma vez
+e gravadas em PUBLISH_ROOT, com uma cópia .gz ao lado (gzip_static do nginx).
+O nginx serve esses arquivos sem passar pelo gunicorn; se um arquivo não
+existir, a requisição cai no Django, como antes.
+
+Cada arquivo é gravado em um temporário no mesmo diretório e renomeado por
+cima do anterior (os.replace é atômico): o nginx nunca lê meio arquivo.
+"""
+import gzip
+import os
+import tempfile
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .caching import get_version
+from .replica import use_primary
+
+# URL (nome) -> arquivo dentro de PUBLISH_ROOT (os mesmos caminhos do nginx.prod.conf).
+PUBLISHED_PAGES = {
+    'leaderboard': 'leaderboard/index.html',
+    'match-list': 'matches/index.html',
+    'playoffs': 'playoffs/index.html',
+    'api-leaderboard': 'api/leaderboard.json',
+    'api-matches': 'api/matches.json',
+    'api-playoffs': 'api/playoffs.json',
+}
+
+
+def write_atomic(path, content):
+    """ Grava `content` em `path` via temporário + rename. """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.publish-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(content)
+        os.chmod(temp_path, 0o644)  # mkstemp cria 0600; o nginx roda com outro usuário
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _unchanged(path, content):
+    try:
+        with open(path, 'rb') as handle:
+            return handle.read() == content
+    except OSError:
+        return False
+
+
+def render_page(url_name):
+    """
+    Renderiza a página pela própria view, sem o cache de páginas (.uncached):
+    a renderização do publicador não é guardada nem servida aos visitantes.
+    """
+    path = reverse(url_name)
+    match = resolve(path)
+    view = getattr(match.func, 'uncached', match.func)
+    if iscoroutinefunction(view):
+        view = async_to_sync(view)  # ASYNC_PUBLIC_VIEWS
+    request = RequestFactory().get(path)
+    request.resolver_match = match  # menu: class="active" da página atual
+    response = view(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def publish_pages(root=None):
+    """
+    Renderiza e grava as páginas públicas. Retorna os arquivos gravados
+    (os que não mudaram não são regravados).
+
+    Se a versão do campeonato mudar durante a renderização, nada é gravado:
+    outra publicação (com os dados mais novos) já está agendada, e gravar
+    agora poderia sobrescrever a dela com a página velha.
+    """
+    root = root or settings.PUBLISH_ROOT
+    version = get_version()
+    with use_primary():  # logo depois do commit a réplica ainda pode estar atrasada
+        rendered = {name: render_page(name) for name in PUBLISHED_PAGES}
+    if get_version() != version:
+        return []
+
+    written = []
+    for name, content in rendered.items():
+        relative = PUBLISHED_PAGES[name]
+        path = os.path.join(root, relative)
+        if content is None:
+            # Sem página válida: apaga a cópia antiga e deixa o Django responder.
+            for stale in (path, f"{path}.gz"):
+                if os.path.exists(stale):
+                    os.unlink(stale)
+            continue
+        if _unchanged(path, content):
+            continue
+        # .gz primeiro: quando o arquivo novo aparecer, a cópia comprimida já é a dele.
+        write_atomic(f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+        write_atomic(path, content)
+        written.append(relative)
+    return written
@@ -0,0 +1,225 @@
+"""
+Rating de força dos jogadores (Glicko-1), por campeonato.
+
+Cada jogador tem, no seu Standing, uma nota (rating) e uma incerteza
+(rating_deviation, o "RD" do Glicko). Cada confronto concluído (não W.O.)
+é um período de avaliação com os jogos da série: vencer um adversário forte
+rende mais do que vencer um fraco, e a incerteza cai a cada série jogada
+(e volta a subir um pouco entre uma série e outra).
+
+- Incremental: MatchAdmin.process_series chama rate_match na mesma
+  transação do "Salvar". O efeito de cada confronto fica gravado no Match
+  (rating_change1/2), então corrigir um resultado estorna a nota antiga e
+  aplica a nova sobre as notas atuais. A ordem exata só importa para
+  correções de confrontos antigos; recompute_ratings refaz a temporada.
+- Temporada inteira (comando recompute_ratings): os confrontos viram arrays
+  NumPy indexados pelo id do jogador e são processados em "ondas" de
+  confrontos sem jogador em comum (uma rodada do round-robin é uma onda).
+  Dentro de uma onda tudo é vetorizado; a ordem de cada jogador é mantida,
+  então o resultado é o mesmo de processar um confronto por vez.
+"""
+import math
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Match, Standing, STATUS_COMPLETED
+from .standings import ensure_standings
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+MIN_DEVIATION = 30.0
+# Incerteza que volta entre uma série e a seguinte do mesmo jogador.
+DEVIATION_GROWTH = 15.0
+
+_Q = math.log(10) / 400
+
+
+def _g(deviation):
+    return 1 / np.sqrt(1 + 3 * _Q ** 2 * deviation ** 2 / math.pi ** 2)
+
+
+def _rate_side(rating, deviation, opponent_rating, opponent_deviation, wins, games):
+    g = _g(opponent_deviation)
+    expected = 1 / (1 + 10 ** (-g * (rating - opponent_rating) / 400))
+    precision = 1 / deviation ** 2 + _Q ** 2 * games * g ** 2 * expected * (1 - expected)
+    new_rating = rating + _Q / precision * g * (wins - games * expected)
+    return new_rating, np.maximum(np.sqrt(1 / precision), MIN_DEVIATION)
+
+
+def glicko_update(rating1, deviation1, rating2, deviation2, wins1, wins2):
+    """
+    Uma série (wins1 x wins2 jogos) entre os jogadores 1 e 2, a partir das
+    notas anteriores dos dois. Vetorizado: aceita números ou arrays.
+    Retorna (rating1, deviation1, rating2, deviation2) depois da série.
+    """
+    deviation1 = np.minimum(np.sqrt(deviation1 ** 2 + DEVIATION_GROWTH ** 2), INITIAL_DEVIATION)
+    deviation2 = np.minimum(np.sqrt(deviation2 ** 2 + DEVIATION_GROWTH ** 2), INITIAL_DEVIATION)
+    games = wins1 + wins2
+    new1 = _rate_side(rating1, deviation1, rating2, deviation2, wins1, games)
+    new2 = _rate_side(rating2, deviation2, rating1, deviation1, wins2, games)
+    return (*new1, *new2)
+
+
+# --- INCREMENTAL (ADMIN) ---
+
+def rated_result(match, score):
+    """ Placar que conta para o rating ("2-1"), ou '' (agendado, W.O., sem jogos). """
+    if match.status != STATUS_COMPLETED or match.is_wo or not sum(score):
+        return ''
+    return f"{score[0]}-{score[1]}"
+
+
+def rate_match(before, match, score):
+    """
+    Atualiza o rating dos dois jogadores pelo resultado do confronto.
+    before: retrato do confronto antes do save (standings.match_snapshot),
+    score: (jogos do player1, jogos do player2). Altera os campos de rating
+    do `match`, que quem chamou salva em seguida (mesma transação).
+    """
+    result = rated_result(match, score)
+    unchanged_players = before is not None and (before[1], before[2], before[4]) == (
+        match.player1_id, match.player2_id, match.tournament_id
+    )
+    if result == match.rated_result and (unchanged_players or not result):
+        return
+
+    revert_match(match, before)
+    match.rated_result = result
+    match.rating_change1 = match.rating_change2 = 0.0
+    if not result:
+        return
+
+    players = (match.player1_id, match.player2_id)
+    current = {
+        player_id: (rating, deviation)
+        for player_id, rating, deviation in Standing.objects.filter(
+            tournament_id=match.tournament_id, player_id__in=players
+        ).values_list('player_id', 'rating', 'rating_deviation')
+    }
+    if len(current) < len(set(players)):
+        ensure_standings(match.tournament_id, players)
+    rating1, deviation1 = current.get(match.player1_id, (INITIAL_RATING, INITIAL_DEVIATION))
+    rating2, deviation2 = current.get(match.player2_id, (INITIAL_RATING, INITIAL_DEVIATION))
+    new_rating1, new_deviation1, new_rating2, new_deviation2 = (
+        float(value) for value in glicko_update(rating1, deviation1, rating2, deviation2, *score)
+    )
+
+    match.rating_change1 = new_rating1 - rating1
+    match.rating_change2 = new_rating2 - rating2
+    for player_id, rating, deviation in (
+        (match.player1_id, new_rating1, new_deviation1),
+        (match.player2_id, new_rating2, new_deviation2),
+    ):
+        Standing.objects.filter(tournament_id=match.tournament_id, player_id=player_id).update(
+            rating=rating, rating_deviation=deviation,
+        )
+
+
+def revert_match(match, before=None):
+    """
+    Estorna a nota que o confronto tinha dado (a incerteza não volta atrás).
+    before: retrato anterior, para estornar dos jogadores/campeonato antigos.
+    """
+    if not match.rated_result:
+        return
+    if before is None:
+        before = (match.status, match.player1_id, match.player2_id, match.series_winner_id, match.tournament_id)
+    _, player1_id, player2_id, _, tournament_id = before
+    for player_id, change in ((player1_id, match.rating_change1), (player2_id, match.rating_change2)):
+        if change:
+            Standing.objects.filter(tournament_id=tournament_id, player_id=player_id).update(
+                rating=F('rating') - change,
+            )
+
+
+# --- TEMPORADA INTEIRA (NUMPY) ---
+
+def season_results(tournament_id):
+    """
+    Confrontos que contam para o rating, em ordem cronológica (rodada,
+    horário, id), como arrays: (pks, player1, player2, jogos1, jogos2).
+    Uma consulta, com os jogos contados por agregação condicional.
+    """
+    rows = (
+        Match.objects.filter(tournament_id=tournament_id, status=STATUS_COMPLETED, is_wo=False)
+        .annotate(
+            wins1=Count('games', filter=Q(games__winner_id=F('player1_id'))),
+            wins2=Count('games', filter=Q(games__winner_id=F('player2_id'))),
+        )
+        .order_by('round_number', 'scheduled_time', 'pk')
+        .values_list('pk', 'player1_id', 'player2_id', 'wins1', 'wins2')
+    )
+    data = np.array(list(rows), dtype=np.int64).reshape(-1, 5)
+    data = data[data[:, 3] + data[:, 4] > 0]
+    return tuple(data.T)
+
+
+def schedule_waves(player1, player2):
+    """
+    Onda de cada confronto: a seguinte à última onda de qualquer um dos dois
+    jogadores. Confrontos da mesma onda não têm jogador em comum.
+    """
+    last = {}
+    waves = np.empty(len(player1), dtype=np.int64)
+    for index, (a, b) in enumerate(zip(player1.tolist(), player2.tolist())):
+        wave = max(last.get(a, -1), last.get(b, -1)) + 1
+        last[a] = last[b] = wave
+        waves[index] = wave
+    return waves
+
+
+def replay(player1, player2, wins1, wins2, size):
+    """
+    Refaz a temporada com arrays indexados pelo id do jogador (`size` = maior
+    id + 1). Retorna (rating, deviation, mudança do player1, mudança do player2).
+    """
+    rating = np.full(size, INITIAL_RATING)
+    deviation = np.full(size, INITIAL_DEVIATION)
+    change1 = np.zeros(len(player1))
+    change2 = np.zeros(len(player1))
+    if not len(player1):
+        return rating, deviation, change1, change2
+
+    waves = schedule_waves(player1, player2)
+    order = np.argsort(waves, kind='stable')
+    for batch in np.split(order, np.flatnonzero(np.diff(waves[order])) + 1):
+        a, b = player1[batch], player2[batch]
+        before1, before2 = rating[a], rating[b]
+        rating[a], deviation[a], rating[b], deviation[b] = glicko_update(
+            before1, deviation[a], before2, deviation[b], wins1[batch], wins2[batch]
+        )
+        change1[batch] = rating[a] - before1
+        change2[batch] = rating[b] - before2
+    return rating, deviation, change1, change2
+
+
+@transaction.atomic
+def recompute_ratings(tournament_id, batch_size=1000):
+    """
+    Refaz o rating de todo o campeonato em ordem cronológica e grava as notas
+    (Standing) e o efeito de cada confronto (Match) com bulk_update.
+    Retorna quantos confrontos foram avaliados.
+    """
+    pks, player1, player2, wins1, wins2 = season_results(tournament_id)
+    standings = list(Standing.objects.filter(tournament_id=tournament_id).only('pk', 'player_id'))
+    size = max([0, *player1.tolist(), *player2.tolist(), *(s.player_id for s in standings)]) + 1
+    rating, deviation, change1, change2 = replay(player1, player2, wins1, wins2, size)
+
+    for standing in standings:
+        standing.rating = float(rating[standing.player_id])
+        standing.rating_deviation = float(deviation[standing.player_id])
+    Standing.objects.bulk_update(standings, ['rating', 'rating_deviation'], batch_size=batch_size)
+
+    Match.objects.filter(tournament_id=tournament_id).exclude(rated_result='').update(
+        rated_result='', rating_change1=0.0, rating_change2=0.0,
+    )
+    rated = [
+        Match(pk=pk, tournament_id=tournament_id, rated_result=f"{w1}-{w2}", rating_change1=c1, rating_change2=c2)
+        for pk, w1, w2, c1, c2 in zip(
+            pks.tolist(), wins1.tolist(), wins2.tolist(), change1.tolist(), change2.tolist()
+        )
+    ]
+    Match.objects.bulk_update(rated, ['rated_result', 'rating_change1', 'rating_change2'], batch_size=batch_size)
+    return len(rated)
@@ -0,0 +1,150 @@
+"""
+Leituras das páginas públicas na réplica (alias 'replica' em DATABASES).
+
+- As views públicas (HTML e API) são marcadas com @replica_reads: durante a
+  view, as leituras vão para a réplica (PrimaryReplicaRouter). Todo o resto
+  (admin, publicação estática, comandos) lê e grava no primário.
+- Read-your-writes: depois de um "Salvar" (qualquer POST/PUT/DELETE bem
+  sucedido), o PrimaryPinMiddleware grava um cookie curto que prende aquele
+  navegador no primário por REPLICA_PIN_SECONDS. E, logo depois de um
+  resultado salvo (caching.get_version_time), todo mundo lê do primário pelo
+  mesmo intervalo: a página renderizada nesse momento vai para o cache com a
+  versão nova e não pode sair do atraso da réplica.
+- Failover: sem réplica configurada, tudo vai para o primário. Se a réplica
+  cair (OperationalError durante a view), ela fica fora por
+  REPLICA_RETRY_SECONDS neste processo e a view roda de novo no primário.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+
+from .caching import get_version_time, aget_version_time
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'ipx1_primary'
+# Depois de uma falha, quanto tempo (por processo) a réplica fica de fora.
+REPLICA_RETRY_SECONDS = 30
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Propaga para as threads do sync_to_async (ORM async, views async).
+_reading_from_replica = ContextVar('ipx1_reading_from_replica', default=False)
+_primary_only = ContextVar('ipx1_primary_only', default=False)
+_replica_down_until = 0.0
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_available():
+    return replica_configured() and time.monotonic() >= _replica_down_until
+
+
+def mark_replica_down():
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+
+@contextmanager
+def use_primary():
+    """ Força o primário, mesmo dentro de views @replica_reads (ex.: publicação estática). """
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def _primary_pinned(request):
+    return _primary_only.get() or not replica_available() or PIN_COOKIE in request.COOKIES
+
+
+def _recent_write(version_time):
+    return version_time is not None and time.time() - version_time < settings.REPLICA_PIN_SECONDS
+
+
+class PrimaryReplicaRouter:
+    """ DATABASE_ROUTERS: leituras na réplica só dentro de views @replica_reads. """
+
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get() and replica_available():
+            return REPLICA_ALIAS
+        return None  # padrão do Django: o banco da instância ou o primário
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e primário têm os mesmos dados.
+        return True
+
+
+def replica_reads(view_func):
+    """ Decorator das views públicas somente leitura (sync ou async). """
+    if iscoroutinefunction(view_func):
+        return _async_replica_reads(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if _primary_pinned(request) or _recent_write(get_version_time()):
+            return view_func(request, *args, **kwargs)
+        token = _reading_from_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        except OperationalError:
+            mark_replica_down()
+        finally:
+            _reading_from_replica.reset(token)
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _async_replica_reads(view_func):
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if _primary_pinned(request) or _recent_write(await aget_version_time()):
+            return await view_func(request, *args, **kwargs)
+        token = _reading_from_replica.set(True)
+        try:
+            return await view_func(request, *args, **kwargs)
+        except OperationalError:
+            mark_replica_down()
+        finally:
+            _reading_from_replica.reset(token)
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """ Read-your-writes: quem acabou de salvar lê do primário por REPLICA_PIN_SECONDS. """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
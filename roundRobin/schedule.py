@@ -0,0 +1,114 @@
+"""
+Geração da tabela de confrontos (round-robin) pelo método do círculo.
+
+Um jogador fica fixo e os outros "giram" uma posição por rodada; em cada
+rodada o primeiro enfrenta o último, o segundo o penúltimo, e assim por
+diante. Com número ímpar de jogadores entra um "fantasma" (None): quem cai
+contra ele folga (bye) naquela rodada.
+"""
+import random
+from collections import deque
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Match, Tournament, STATUS_SCHEDULED
+from .standings import ensure_standings
+from . import caching
+
+BULK_BATCH_SIZE = 2000
+
+
+def round_robin_pairings(player_ids, rounds=None, seed=None):
+    """
+    Gera (rodada, player1_id, player2_id) para um round-robin completo
+    (n-1 rodadas) ou parcial (as primeiras `rounds` rodadas).
+    Com `seed`, a ordem dos jogadores é embaralhada de forma determinística.
+    """
+    ids = list(player_ids)
+    if seed is not None:
+        random.Random(seed).shuffle(ids)
+    if len(ids) < 2:
+        return
+    if len(ids) % 2:
+        ids.append(None)  # bye
+
+    n = len(ids)
+    total_rounds = n - 1
+    rounds = total_rounds if rounds is None else min(rounds, total_rounds)
+
+    fixed = ids[0]
+    rotating = deque(ids[1:])
+    for round_index in range(rounds):
+        lineup = [fixed, *rotating]
+        for i in range(n // 2):
+            home, away = lineup[i], lineup[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alterna quem é o player1 para equilibrar o lado de cada jogador.
+            if (round_index + i) % 2:
+                home, away = away, home
+            yield round_index + 1, home, away
+        rotating.rotate(1)
+
+
+def build_schedule(player_ids, tournament_id, rounds=None, seed=None, first_round=1,
+                   start=None, round_interval=timedelta(days=7), slot=timedelta(0)):
+    """
+    Monta (sem salvar) os objetos Match da tabela do campeonato. Se `start` for informado,
+    a rodada r começa em start + (r-1) * round_interval e cada confronto
+    da rodada fica `slot` depois do anterior.
+    """
+    matches = []
+    slot_in_round = 0
+    current_round = None
+
+    for round_number, player1_id, player2_id in round_robin_pairings(player_ids, rounds, seed):
+        if round_number != current_round:
+            current_round = round_number
+            slot_in_round = 0
+
+        scheduled_time = None
+        if start is not None:
+            scheduled_time = start + (round_number - 1) * round_interval + slot_in_round * slot
+
+        matches.append(Match(
+            tournament_id=tournament_id,
+            player1_id=player1_id,
+            player2_id=player2_id,
+            round_number=first_round + round_number - 1,
+            scheduled_time=scheduled_time,
+            status=STATUS_SCHEDULED,
+        ))
+        slot_in_round += 1
+
+    return matches
+
+
+@transaction.atomic
+def generate_schedule(player_ids, tournament=None, clear_scheduled=False, **options):
+    """
+    Cria todos os confrontos do campeonato (o ativo, por padrão) com um único
+    bulk_create dentro de uma transação. `clear_scheduled` apaga antes os
+    confrontos do campeonato ainda não disputados.
+    Retorna a lista de Match criados.
+
+    Sem consultas por confronto: o tempo cresce linearmente com o número de
+    confrontos e quase todo ele é o ORM montando os INSERTs. Medido no
+    SQLite: 100 jogadores (4.950 confrontos) em ~0,6s; 500 jogadores
+    (124.750) em ~11-17s, conforme a máquina.
+    """
+    if tournament is None:
+        tournament = Tournament.objects.current()
+    player_ids = list(player_ids)
+
+    if clear_scheduled:
+        tournament.matches.filter(status=STATUS_SCHEDULED).delete()
+
+    matches = build_schedule(player_ids, tournament.pk, **options)
+    created = Match.objects.bulk_create(matches, batch_size=BULK_BATCH_SIZE)
+    ensure_standings(tournament.pk, player_ids)
+
+    # bulk_create não dispara post_save: invalida o cache manualmente.
+    caching.bump_version_on_commit()
+    return created
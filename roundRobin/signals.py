@@ -0,0 +1,63 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Tournament, Player, Match, Game, Bracket, BracketMatch, STATUS_COMPLETED
+from . import standings
+from . import ledger
+from . import ratings
+from . import snapshots
+from . import caching
+from . import events
+
+
+@receiver(post_save, sender=Player)
+def create_player_standing(sender, instance, created, raw=False, **kwargs):
+    """ Todo jogador novo já entra na classificação do campeonato ativo (zerado). """
+    if created and not raw:
+        standings.ensure_standings(Tournament.objects.current().pk, [instance.pk])
+
+
+@receiver(post_delete, sender=Match)
+def revert_deleted_match_standing(sender, instance, **kwargs):
+    """ Remove da classificação (e estorna no livro-razão e no rating) um confronto apagado. """
+    caching.bump_round_on_commit(instance.tournament_id, instance.round_number)
+    if instance.status != STATUS_COMPLETED:
+        return  # confronto não disputado não soma nada na classificação
+    standings.record_match_change(standings.match_snapshot(instance), None)
+    ledger.revert_matches([instance.pk])
+    ratings.revert_match(instance)
+    snapshots.invalidate_on_commit(instance.tournament_id, instance.round_number)
+
+
+@receiver(post_save, sender=Player)
+def invalidate_round_fragments(sender, instance, created, raw=False, **kwargs):
+    """ Os fragmentos (rodadas, playoffs) mostram o nome do jogador: renomear invalida todos. """
+    if not created and not raw:
+        caching.bump_all_fragments_on_commit()
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+@receiver(post_save, sender=Bracket)
+@receiver(post_delete, sender=Bracket)
+@receiver(post_save, sender=BracketMatch)
+@receiver(post_delete, sender=BracketMatch)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def invalidate_public_pages(sender, **kwargs):
+    """
+    Qualquer mudança de resultado invalida o cache das páginas públicas.
+    Só depois do commit, para nenhum worker cachear dados ainda não gravados.
+    """
+    caching.bump_version_on_commit()
+
+
+@receiver(post_save, sender=Game)
+def announce_game_change(sender, instance, raw=False, **kwargs):
+    """ Avisa o feed ao vivo (SSE) que um jogo mudou. """
+    if not raw:
+        events.publish_on_commit('game', events.game_event(instance))
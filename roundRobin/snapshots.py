@@ -0,0 +1,220 @@
+"""
+Classificação rodada a rodada (StandingSnapshot), para o gráfico de posições.
+
+Em vez de ordenar a classificação inteira uma vez por rodada, os confrontos
+do campeonato são lidos UMA vez, em ordem de rodada, e somados em arrays
+acumulados por jogador (pontos, séries, K/D, farm, tempo de vitória). Ao fim
+de cada rodada com resultado, as posições saem de um np.lexsort com os mesmos
+critérios do Standing (Pontos > Séries > Saldo K/D > Farm > T.M.V.) e do
+confronto direto entre empatados (standings.apply_head_to_head); as linhas
+são gravadas com bulk_create.
+
+Um resultado salvo só muda a classificação daquela rodada em diante: as
+rodadas anteriores ficam como estão. No "Salvar", as linhas daquela rodada em
+diante são apagadas na mesma transação e refeitas logo depois do commit
+(como a matriz de h2h.py), partindo dos desempates acumulados da última
+rodada guardada antes dela: só os jogos das rodadas refeitas são lidos.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Subquery
+
+from .models import Match, StandingSnapshot, STATUS_COMPLETED
+from .caching import bump_version
+from .stats import new_deltas, accumulate_game, countable_games
+
+# Só o que stats.accumulate_game lê de um Game (sem instanciar o modelo).
+_GameRow = namedtuple('_GameRow', (
+    'round_number', 'player1', 'player2', 'winner_id', 'win_condition', 'duration', 'player1_farm', 'player2_farm',
+))
+
+
+class _Totals:
+    """ Arrays acumulados por jogador (índice denso: posição em player_ids). """
+
+    def __init__(self, player_ids):
+        self.player_ids = np.array(player_ids, dtype=np.int64)
+        self.index = {pk: i for i, pk in enumerate(player_ids)}
+        size = len(player_ids)
+        self.points = np.zeros(size, dtype=np.int64)
+        self.played = np.zeros(size, dtype=np.int64)
+        self.series_wins = np.zeros(size, dtype=np.int64)
+        self.kill_death = np.zeros(size, dtype=np.int64)
+        self.farm = np.zeros(size, dtype=np.int64)
+        self.wins = np.zeros(size, dtype=np.int64)
+        self.win_seconds = np.zeros(size)
+        self.beat = np.zeros((size, size), dtype=np.int64)  # beat[i, j]: séries que i venceu contra j
+
+    def add_series(self, player1_id, player2_id, series_winner_id):
+        a, b = self.index[player1_id], self.index[player2_id]
+        self.played[[a, b]] += 1
+        if series_winner_id in (player1_id, player2_id):
+            winner, loser = (a, b) if series_winner_id == player1_id else (b, a)
+            self.series_wins[winner] += 1
+            self.points[winner] += 3
+            self.beat[winner, loser] += 1
+
+    def seed(self, rows):
+        """ Desempates acumulados de uma rodada guardada: (player_id, K/D, farm, vitórias, tempo). """
+        for player_id, kill_death, farm, wins, win_time in rows:
+            if player_id in self.index:
+                i = self.index[player_id]
+                self.kill_death[i], self.farm[i], self.wins[i] = kill_death, farm, wins
+                self.win_seconds[i] = win_time.total_seconds()
+
+    def add_games(self, deltas):
+        for player_id, fields in deltas.items():
+            i = self.index[player_id]
+            self.kill_death[i] += fields['total_kills'] - fields['total_deaths']
+            self.farm[i] += fields['total_farm']
+            self.wins[i] += fields['wins']
+            self.win_seconds[i] += fields['total_win_time'].total_seconds()
+
+    def ranking(self):
+        """ Índices dos jogadores na ordem da classificação atual. """
+        average = np.divide(self.win_seconds, self.wins, out=np.zeros_like(self.win_seconds), where=self.wins > 0)
+        # lexsort: a última chave é a principal.
+        order = np.lexsort((self.player_ids, average, -self.farm, -self.kill_death, -self.series_wins, -self.points))
+
+        # Confronto direto dentro de cada grupo empatado em pontos (ordenação estável).
+        ranked = []
+        for group in np.split(order, np.flatnonzero(np.diff(self.points[order])) + 1):
+            if np.count_nonzero(self.played[group]) > 1:
+                against_group = self.beat[np.ix_(group, group)].sum(axis=1)
+                group = group[np.argsort(-against_group, kind='stable')]
+            ranked.extend(group.tolist())
+        return ranked
+
+
+def sweep(tournament_id, from_round=1):
+    """
+    Gera (rodada, [linha, ...]) ao fim de cada rodada com confronto concluído,
+    de `from_round` em diante, em ordem. Cada linha é um dict com os campos do
+    StandingSnapshot. As séries (pontos, confronto direto) são somadas desde
+    a 1ª rodada, a partir de uma consulta leve; os desempates partem da última
+    rodada guardada antes de `from_round` e só os jogos seguintes são lidos.
+    """
+    matches = list(
+        Match.objects.filter(tournament_id=tournament_id, status=STATUS_COMPLETED)
+        .order_by('round_number', 'pk')
+        .values_list('round_number', 'player1_id', 'player2_id', 'series_winner_id')
+    )
+    totals = _Totals(sorted({pk for row in matches for pk in row[1:3]}))
+
+    seed_round = 0
+    if from_round > 1:
+        snapshots = StandingSnapshot.objects.filter(tournament_id=tournament_id)
+        last_saved = snapshots.filter(round_number__lt=from_round).order_by('-round_number').values('round_number')[:1]
+        seed = list(
+            snapshots.filter(round_number=Subquery(last_saved)).values_list(
+                'round_number', 'player_id', 'kill_death_balance', 'total_farm', 'wins', 'total_win_time'
+            )
+        )
+        if seed:
+            seed_round = seed[0][0]
+            totals.seed(row[1:] for row in seed)
+
+    games = (
+        countable_games()
+        .filter(match__tournament_id=tournament_id, match__round_number__gt=seed_round)
+        .order_by('match__round_number')
+        .values_list(
+            'match__round_number', 'match__player1_id', 'match__player2_id',
+            'winner_id', 'win_condition', 'duration', 'player1_farm', 'player2_farm',
+        )
+    )
+    games_by_round = {}
+    for row in games:
+        game = _GameRow(*row)
+        games_by_round.setdefault(game.round_number, []).append(game)
+
+    for position, (round_number, player1_id, player2_id, series_winner_id) in enumerate(matches):
+        totals.add_series(player1_id, player2_id, series_winner_id)
+        last_of_round = position + 1 == len(matches) or matches[position + 1][0] != round_number
+        if not last_of_round or round_number <= seed_round:
+            continue
+
+        deltas = new_deltas()
+        for game in games_by_round.get(round_number, ()):
+            accumulate_game(deltas, game, game.player1, game.player2)
+        totals.add_games(deltas)
+        if round_number < from_round:
+            continue
+
+        yield round_number, [
+            {
+                'player_id': int(totals.player_ids[i]),
+                'position': rank,
+                'points': int(totals.points[i]),
+                'series_played': int(totals.played[i]),
+                'series_wins': int(totals.series_wins[i]),
+                'kill_death_balance': int(totals.kill_death[i]),
+                'total_farm': int(totals.farm[i]),
+                'wins': int(totals.wins[i]),
+                'total_win_time': timedelta(seconds=float(totals.win_seconds[i])),
+            }
+            for rank, i in enumerate(totals.ranking(), start=1)
+        ]
+
+
+@transaction.atomic
+def rebuild_snapshots(tournament_id, from_round=1, batch_size=1000):
+    """
+    Refaz a classificação por rodada de `from_round` em diante (as rodadas
+    anteriores não mudam). Retorna quantas linhas foram gravadas.
+    """
+    StandingSnapshot.objects.filter(tournament_id=tournament_id, round_number__gte=from_round).delete()
+    rows = [
+        StandingSnapshot(tournament_id=tournament_id, round_number=round_number, **fields)
+        for round_number, ranking in sweep(tournament_id, from_round)
+        for fields in ranking
+    ]
+    StandingSnapshot.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+class _PendingRebuild:
+    """ Reconstrução agendada para depois do commit (uma por campeonato e rodada). """
+
+    def __init__(self, tournament_id, from_round):
+        self.tournament_id = tournament_id
+        self.from_round = from_round
+        self.done = False
+
+    def covers(self, tournament_id, round_number):
+        return not self.done and self.tournament_id == tournament_id and self.from_round <= round_number
+
+    def __call__(self):
+        self.done = True
+        rebuild_snapshots(self.tournament_id, self.from_round)
+        # O cache das páginas foi invalidado no commit, antes das linhas voltarem.
+        bump_version()
+
+
+def invalidate_on_commit(tournament_id, round_number):
+    """
+    Apaga a classificação por rodada de `round_number` em diante (nesta
+    transação) e agenda a reconstrução para depois do commit, uma vez por
+    campeonato e rodada. robust: uma falha não quebra o "Salvar"; as rodadas
+    ficam faltando até a próxima reconstrução (rebuild_stats).
+    """
+    StandingSnapshot.objects.filter(tournament_id=tournament_id, round_number__gte=round_number).delete()
+    connection = transaction.get_connection()
+    if any(isinstance(func, _PendingRebuild) and func.covers(tournament_id, round_number)
+           for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(_PendingRebuild(tournament_id, round_number), robust=True)
+
+
+def record_match_change(before, match):
+    """
+    Chamado pelo admin depois do "Salvar": um confronto que estava ou ficou
+    'Concluído' muda a classificação da sua rodada em diante.
+    before: retrato anterior (standings.match_snapshot).
+    """
+    was_completed = before is not None and before[0] == STATUS_COMPLETED
+    if match.status == STATUS_COMPLETED or was_completed:
+        invalidate_on_commit(match.tournament_id, match.round_number)
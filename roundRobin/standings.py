@@ -0,0 +1,291 @@
+"""
+Manutenção incremental da tabela Standing.
+
+Cada confronto (Match) contribui com no máximo duas linhas da classificação.
+Em vez de recalcular tudo, guardamos o "retrato" do confronto antes e depois
+do save e aplicamos apenas a diferença (delta) com expressões F().
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.db.models import F, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Player, Match, Standing, Tournament
+from .models import STATUS_COMPLETED
+from .stats import game_totals, countable_games
+from . import h2h
+from .snapshots import rebuild_snapshots
+
+SERIES_FIELDS = ('series_played', 'series_wins', 'series_losses', 'points')
+TIEBREAK_FIELDS = ('kill_death_balance', 'total_farm', 'wins', 'total_win_time')
+
+
+def match_snapshot(match):
+    """ Retrato mínimo de um confronto: (status, player1, player2, vencedor, campeonato). """
+    if match is None:
+        return None
+    return (match.status, match.player1_id, match.player2_id, match.series_winner_id, match.tournament_id)
+
+
+def stored_snapshot(match_pk):
+    """ Lê o retrato do confronto como está no banco (antes do save). """
+    if match_pk is None:
+        return None
+    return Match.objects.filter(pk=match_pk).values_list(
+        'status', 'player1_id', 'player2_id', 'series_winner_id', 'tournament_id'
+    ).first()
+
+
+def series_contribution(snapshot):
+    """
+    Quanto um confronto soma na classificação de cada jogador:
+    {(campeonato, player_id): [séries jogadas, séries ganhas]}.
+    Segue exatamente a mesma regra de Player.objects.with_standings().
+    """
+    contribution = defaultdict(lambda: [0, 0])
+    if snapshot is None:
+        return contribution
+
+    status, player1_id, player2_id, series_winner_id, tournament_id = snapshot
+    if status != STATUS_COMPLETED:
+        return contribution
+
+    contribution[tournament_id, player1_id][0] += 1
+    contribution[tournament_id, player2_id][0] += 1
+    if series_winner_id is not None:
+        contribution[tournament_id, series_winner_id][1] += 1
+    return contribution
+
+
+def ensure_standings(tournament_id, player_ids):
+    """ Garante que existe uma linha de Standing para cada jogador no campeonato. """
+    Standing.objects.bulk_create(
+        [Standing(tournament_id=tournament_id, player_id=pk) for pk in player_ids],
+        ignore_conflicts=True,
+    )
+
+
+def apply_series_delta(before, after):
+    """
+    Aplica na tabela Standing a diferença entre dois retratos do mesmo
+    confronto. Uma UPDATE por jogador afetado (no máximo 4).
+    Retorna os pares (campeonato, jogador) afetados.
+    """
+    old = series_contribution(before)
+    new = series_contribution(after)
+    affected = set(old) | set(new)
+
+    for tournament_id, player_id in affected:
+        key = (tournament_id, player_id)
+        played = new[key][0] - old[key][0]
+        wins = new[key][1] - old[key][1]
+        if not played and not wins:
+            continue
+        Standing.objects.filter(tournament_id=tournament_id, player_id=player_id).update(
+            series_played=F('series_played') + played,
+            series_wins=F('series_wins') + wins,
+            series_losses=F('series_losses') + (played - wins),
+            points=F('points') + wins * 3,
+        )
+    return affected
+
+
+def sync_tiebreakers(tournament_id, player_ids):
+    """
+    Recalcula os critérios de desempate (K/D, farm, T.M.V.) dos jogadores a
+    partir dos jogos DESTE campeonato (os contadores do Player somam a
+    carreira inteira). Três consultas agrupadas, restritas aos confrontos
+    dos jogadores, e uma UPDATE por jogador.
+    """
+    player_ids = {pk for pk in player_ids if pk is not None}
+    if not player_ids:
+        return
+
+    games = countable_games().filter(match__tournament_id=tournament_id).filter(
+        Q(match__player1_id__in=player_ids) | Q(match__player2_id__in=player_ids)
+    )
+    totals = game_totals(games)
+    for player_id in player_ids:
+        Standing.objects.filter(tournament_id=tournament_id, player_id=player_id).update(
+            **tiebreak_values(totals.get(player_id))
+        )
+
+
+def tiebreak_values(totals):
+    """ Campos de desempate do Standing a partir de uma linha de game_totals(). """
+    if totals is None:
+        return {
+            'kill_death_balance': 0, 'total_farm': 0, 'wins': 0,
+            'total_win_time': timedelta(0), 'average_win_time': timedelta(0),
+        }
+    return {
+        'kill_death_balance': totals['total_kills'] - totals['total_deaths'],
+        'total_farm': totals['total_farm'],
+        'wins': totals['wins'],
+        'total_win_time': totals['total_win_time'],
+        'average_win_time': totals['total_win_time'] / totals['wins'] if totals['wins'] else timedelta(0),
+    }
+
+
+def record_match_change(before, match):
+    """
+    Ponto de entrada usado pelo admin e pelos sinais: atualiza as séries por
+    delta e sincroniza os desempates dos jogadores envolvidos.
+    """
+    if match is not None:
+        ensure_standings(match.tournament_id, [match.player1_id, match.player2_id])
+    affected = apply_series_delta(before, match_snapshot(match))
+    if before is not None:
+        affected |= {(before[4], before[1]), (before[4], before[2])}
+    if match is not None:
+        affected |= {(match.tournament_id, match.player1_id), (match.tournament_id, match.player2_id)}
+
+    by_tournament = defaultdict(set)
+    for tournament_id, player_id in affected:
+        by_tournament[tournament_id].add(player_id)
+    for tournament_id, player_ids in by_tournament.items():
+        sync_tiebreakers(tournament_id, player_ids)
+
+    # Confronto direto: só as células do(s) par(es) envolvido(s).
+    pairs = defaultdict(set)
+    for snapshot in (before, match_snapshot(match)):
+        if snapshot is not None:
+            pairs[snapshot[4]].add((snapshot[1], snapshot[2]))
+    for tournament_id, tournament_pairs in pairs.items():
+        h2h.refresh_pairs_on_commit(tournament_id, tournament_pairs)
+
+
+# --- DESEMPATE POR CONFRONTO DIRETO ---
+
+def apply_head_to_head(rows):
+    """
+    Aplica o confronto direto à lista de Standing já ordenada pelo SQL
+    (Pontos > Séries > Saldo K/D > Farm > T.M.V.): dentro de cada grupo
+    empatado em pontos, quem venceu mais séries contra os outros do grupo
+    fica na frente; o resto da ordem do SQL decide o que continuar empatado.
+    A matriz só é lida se houver empate entre jogadores que já jogaram.
+    """
+    rows = list(rows)
+    groups = [list(group) for _, group in groupby(rows, key=lambda s: s.points)]
+    if all(sum(1 for s in group if s.series_played) < 2 for group in groups):
+        return rows
+
+    matrix = h2h.get_matrix(rows[0].tournament_id)
+    ordered = []
+    for group in groups:
+        if sum(1 for s in group if s.series_played) > 1:
+            ids = [s.player_id for s in group]
+            # sort é estável: empatados no confronto direto mantêm a ordem do SQL.
+            group.sort(key=lambda s: -matrix.series_wins_against(s.player_id, ids))
+        ordered.extend(group)
+    return ordered
+
+
+def top_standings(queryset, k):
+    """
+    Os k primeiros de uma classificação (queryset de Standing já filtrado),
+    com o desempate por confronto direto. Uma consulta: as linhas com pelo
+    menos a pontuação do k-ésimo (subconsulta com OFFSET k-1 no índice de
+    ranking), ou seja, os k primeiros mais TODO o grupo empatado no corte: o
+    confronto direto é decidido dentro do grupo inteiro, como na
+    classificação, então cortar o grupo ao meio poderia pôr nos playoffs
+    alguém que está fora dos k primeiros da tabela.
+    """
+    cut = queryset.order_by(*Standing._meta.ordering).values('points')[k - 1:k]
+    rows = queryset.filter(points__gte=Coalesce(Subquery(cut), 0)).order_by(*Standing._meta.ordering)
+    return apply_head_to_head(rows)[:k]
+
+
+# --- CHECAGEM DE CONSISTÊNCIA ---
+
+def _tournament_ids(tournament):
+    if tournament is not None:
+        return [getattr(tournament, 'pk', tournament)]
+    return list(Tournament.objects.values_list('pk', flat=True))
+
+
+def expected_standings(tournament):
+    """
+    Recalcula a classificação de um campeonato a partir das linhas de
+    Match/Game (a "fonte da verdade"), com poucas consultas agregadas.
+    Entram os jogadores com confronto no campeonato ou que já têm linha nele.
+    Retorna {player_id: {campo: valor}}.
+    """
+    matches = Match.objects.filter(tournament=tournament)
+    players = Player.objects.filter(
+        Q(pk__in=Standing.objects.filter(tournament=tournament).values('player_id'))
+        | Q(pk__in=matches.values('player1_id'))
+        | Q(pk__in=matches.values('player2_id'))
+    )
+
+    expected = {}
+    for player in players.with_standings(tournament):
+        expected[player.pk] = {
+            'series_played': player.series_played_count,
+            'series_wins': player.series_wins_count,
+            'series_losses': player.series_played_count - player.series_wins_count,
+            'points': player.points_count,
+        }
+
+    totals = game_totals(countable_games().filter(match__tournament=tournament))
+    for player_id, row in expected.items():
+        values = tiebreak_values(totals.get(player_id))
+        del values['average_win_time']
+        row.update(values)
+
+    return expected
+
+
+def check_standings(tournament=None):
+    """
+    Compara a tabela Standing com o recálculo a partir de Match/Game, de um
+    campeonato ou de todos (tournament=None).
+    Retorna uma lista de (campeonato, player_id, campo, esperado, armazenado).
+    """
+    problems = []
+    for tournament_id in _tournament_ids(tournament):
+        expected = expected_standings(tournament_id)
+        stored = {
+            row['player_id']: row
+            for row in Standing.objects.filter(tournament_id=tournament_id).values(
+                'player_id', *SERIES_FIELDS, *TIEBREAK_FIELDS
+            )
+        }
+
+        for player_id, fields in expected.items():
+            row = stored.get(player_id)
+            for field, value in fields.items():
+                actual = row[field] if row else None
+                if actual != value:
+                    problems.append((tournament_id, player_id, field, value, actual))
+    return problems
+
+
+def rebuild_standings(tournament=None):
+    """
+    Reconstrói a classificação de um campeonato (ou de todos) a partir de
+    Match/Game, inclusive a classificação por rodada (snapshots.py).
+    """
+    total = 0
+    for tournament_id in _tournament_ids(tournament):
+        expected = expected_standings(tournament_id)
+        ensure_standings(tournament_id, expected.keys())
+
+        rows = []
+        for standing in Standing.objects.filter(tournament_id=tournament_id).only('pk', 'player_id'):
+            fields = expected[standing.player_id]
+            for field, value in fields.items():
+                setattr(standing, field, value)
+            standing.average_win_time = (
+                fields['total_win_time'] / fields['wins'] if fields['wins'] else timedelta(0)
+            )
+            rows.append(standing)
+        Standing.objects.bulk_update(
+            rows, [*SERIES_FIELDS, *TIEBREAK_FIELDS, 'average_win_time'], batch_size=500
+        )
+        rebuild_snapshots(tournament_id)
+        h2h.invalidate_on_commit(tournament_id)
+        total += len(rows)
+    return total
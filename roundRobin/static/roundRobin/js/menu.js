@@ -0,0 +1,4 @@
+document.getElementById('menu-toggle').onclick = function() {
+    var navWrapper = document.getElementById('nav-wrapper');
+    navWrapper.classList.toggle('open');
+};
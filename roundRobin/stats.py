@@ -0,0 +1,162 @@
+"""
+Regras das estatísticas dos jogos (Game) nos contadores do Player.
+
+accumulate_game diz o efeito de um jogo em cada jogador; os deltas são somados
+em memória e gravados com UMA UPDATE com F() por jogador. O que já foi
+aplicado fica registrado no livro-razão (ver roundRobin/ledger.py);
+game_totals refaz as mesmas somas direto das linhas de Game (verificação).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F, Q, Count, Sum
+
+from .models import Player, Game
+from .models import STATUS_COMPLETED, WIN_CONDITION_FIRST_BLOOD, WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM
+
+STAT_FIELDS = (
+    'wins', 'losses', 'first_blood_wins', 'farm_wins',
+    'total_farm', 'total_kills', 'total_deaths', 'total_win_time',
+)
+
+
+class MissingWinConditionError(Exception):
+    """Raised when a Game is missing its win_condition."""
+
+    def __init__(self, game_number):
+        self.game_number = game_number
+        super().__init__(f"Condição de Vitória obrigatória para o Jogo {game_number}.")
+
+
+def _zero_stats():
+    stats = dict.fromkeys(STAT_FIELDS, 0)
+    stats['total_win_time'] = timedelta(0)
+    return stats
+
+
+def new_deltas():
+    """ {player_id: {campo: delta}} — começa tudo zerado. """
+    return defaultdict(_zero_stats)
+
+
+def accumulate_game(deltas, game, player1_id, player2_id, sign=1):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) o efeito de UM jogo nos deltas,
+    (o efeito de um jogo no vencedor e no perdedor).
+    """
+    winner_id = game.winner_id
+    loser_id = player2_id if winner_id == player1_id else player1_id
+    winner_farm = game.player1_farm if winner_id == player1_id else game.player2_farm
+    loser_farm = game.player2_farm if winner_id == player1_id else game.player1_farm
+
+    winner = deltas[winner_id]
+    winner['wins'] += sign
+    winner['total_win_time'] += sign * (game.duration or timedelta(0))
+    winner['total_farm'] += sign * winner_farm
+    if game.win_condition in (WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM):
+        winner['farm_wins'] += sign
+    elif game.win_condition == WIN_CONDITION_FIRST_BLOOD:
+        winner['first_blood_wins'] += sign
+        winner['total_kills'] += sign
+
+    loser = deltas[loser_id]
+    loser['losses'] += sign
+    loser['total_farm'] += sign * loser_farm
+    if game.win_condition == WIN_CONDITION_FIRST_BLOOD:
+        loser['total_deaths'] += sign
+
+
+def apply_deltas(deltas):
+    """
+    Grava os deltas: uma UPDATE com F() por jogador, ignorando campos (e
+    jogadores) cujo saldo final é zero. Retorna os ids atualizados.
+    """
+    updated = []
+    for player_id, fields in deltas.items():
+        changes = {
+            field: F(field) + value
+            for field, value in fields.items()
+            if value
+        }
+        if changes:
+            Player.objects.filter(pk=player_id).update(**changes)
+            updated.append(player_id)
+    return updated
+
+
+# --- RECÁLCULO COMPLETO A PARTIR DOS JOGOS ---
+
+def countable_games():
+    """
+    Jogos que DEVEM estar somados nos contadores do Player: com vencedor,
+    de confrontos 'Concluídos' que não foram W.O. (mesma regra de ledger.settle_matches).
+    """
+    return Game.objects.filter(
+        winner__isnull=False,
+        match__status=STATUS_COMPLETED,
+        match__is_wo=False,
+    ).order_by()
+
+
+def game_totals(games=None):
+    """
+    Soma, por jogador, os contadores do Player a partir das linhas de Game,
+    com três consultas agrupadas: uma pelo vencedor e uma para cada lado do
+    confronto. Retorna {player_id: {campo de STAT_FIELDS: valor}}.
+    """
+    if games is None:
+        games = countable_games()
+    totals = defaultdict(_zero_stats)
+    first_blood = Q(win_condition=WIN_CONDITION_FIRST_BLOOD)
+
+    by_winner = games.values('winner_id').annotate(
+        wins=Count('pk'),
+        kills=Count('pk', filter=first_blood),
+        farm_wins=Count('pk', filter=Q(win_condition__in=[WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM])),
+        win_time=Sum('duration'),
+    )
+    for row in by_winner:
+        entry = totals[row['winner_id']]
+        entry['wins'] = row['wins']
+        entry['first_blood_wins'] = row['kills']
+        entry['total_kills'] = row['kills']
+        entry['farm_wins'] = row['farm_wins']
+        entry['total_win_time'] = row['win_time'] or timedelta(0)
+
+    for side in ('player1', 'player2'):
+        lost = ~Q(winner_id=F(f'match__{side}_id'))
+        by_side = games.values(f'match__{side}_id').annotate(
+            farm=Sum(f'{side}_farm'),
+            losses=Count('pk', filter=lost),
+            deaths=Count('pk', filter=lost & first_blood),
+        )
+        for row in by_side:
+            entry = totals[row[f'match__{side}_id']]
+            entry['total_farm'] += row['farm'] or 0
+            entry['losses'] += row['losses']
+            entry['total_deaths'] += row['deaths']
+
+    return totals
+
+
+def player_stat_drift(player_ids=None):
+    """
+    Compara os contadores gravados no Player com o recálculo a partir dos
+    jogos. Retorna {player_id: {campo: (esperado, gravado)}} só com o que difere.
+    """
+    totals = game_totals()
+    players = Player.objects.values('pk', *STAT_FIELDS)
+    if player_ids is not None:
+        players = players.filter(pk__in=player_ids)
+
+    drift = {}
+    for row in players:
+        expected = totals.get(row['pk']) or _zero_stats()
+        diff = {
+            field: (expected[field], row[field])
+            for field in STAT_FIELDS
+            if expected[field] != row[field]
+        }
+        if diff:
+            drift[row['pk']] = diff
+    return drift
@@ -0,0 +1,64 @@
+"""
+Arquivos estáticos com hash no nome e pré-comprimidos (servidos pelo nginx).
+
+O ManifestStaticFilesStorage grava cada arquivo também com o hash do
+conteúdo no nome (base.3f2a9c1b7e4d.css) e o {% static %} aponta para esse
+nome: o arquivo nunca muda, então o nginx pode mandá-lo com cache "immutable"
+de um ano, e uma visita repetida não baixa CSS nenhum.
+
+Logo depois do collectstatic (post_process), cada arquivo de texto com hash
+ganha as cópias .gz (gzip_static do nginx) e, se o pacote brotli estiver
+instalado, .br (brotli_static, módulo ngx_brotli). Comprimido uma vez, com o
+nível máximo, em vez de a cada requisição.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .publishing import write_atomic
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele, só .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml')
+# Abaixo disso a cópia comprimida não compensa (cabeçalhos + CPU do cliente).
+MIN_COMPRESS_SIZE = 256
+
+
+def compressed_copies(content):
+    """ {extensão: conteúdo comprimido}, só das versões que ficam menores. """
+    copies = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies['.br'] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in copies.items() if len(data) < len(content)}
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ STORAGES['staticfiles']: nomes com hash + cópias .gz/.br ao lado. """
+
+    # Arquivo que ainda não está no manifesto (collectstatic antigo): o hash é
+    # calculado na hora em vez de a página quebrar com ValueError.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as handle:
+            content = handle.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        stat = os.stat(path)
+        for suffix, data in compressed_copies(content).items():
+            write_atomic(f"{path}{suffix}", data)
+            # Mesmo mtime do original: Last-Modified/ETag iguais com ou sem compressão.
+            os.utime(f"{path}{suffix}", ns=(stat.st_atime_ns, stat.st_mtime_ns))
@@ -0,0 +1,110 @@
+"""
+Campeonatos sintéticos para testes de desempenho e benchmarks.
+
+Cria jogadores, a tabela round-robin completa e os resultados das primeiras
+rodadas inteiramente com bulk_create/bulk_update (sem sinais e sem o admin),
+e no final recalcula contadores e classificação uma única vez. Com a mesma
+`seed`, o resultado é sempre o mesmo.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Tournament, Player, Match, Game, MATCH_FARM_LIMIT
+from .models import STATUS_COMPLETED, STATUS_SCHEDULED
+from .models import WIN_CONDITION_FIRST_BLOOD, WIN_CONDITION_FARM_80, WIN_CONDITION_TIME_FARM
+from .schedule import generate_schedule
+from .standings import rebuild_standings
+from .ledger import rebuild_player_stats
+from .ratings import recompute_ratings
+from . import caching
+
+BULK_BATCH_SIZE = 2000
+
+
+def random_series(rng, match):
+    """
+    Sorteia uma série MD3 (2x0 ou 2x1) para o confronto.
+    Retorna (vencedor da série, lista de Game não salvos).
+    """
+    winner, loser = (match.player1_id, match.player2_id)
+    if rng.random() < 0.5:
+        winner, loser = loser, winner
+    order = [winner, winner] if rng.random() < 0.5 else rng.choice([[winner, loser, winner], [loser, winner, winner]])
+
+    games = []
+    for number, game_winner in enumerate(order, start=1):
+        duration = timedelta(seconds=rng.randint(3 * 60, 18 * 60))
+        if duration > MATCH_FARM_LIMIT:
+            condition = WIN_CONDITION_TIME_FARM
+        else:
+            condition = rng.choice([WIN_CONDITION_FIRST_BLOOD, WIN_CONDITION_FARM_80])
+        winner_farm, loser_farm = rng.randint(60, 120), rng.randint(20, 80)
+        player1_won = game_winner == match.player1_id
+        games.append(Game(
+            match_id=match.pk,
+            game_number=number,
+            winner_id=game_winner,
+            win_condition=condition,
+            duration=duration,
+            player1_farm=winner_farm if player1_won else loser_farm,
+            player2_farm=loser_farm if player1_won else winner_farm,
+        ))
+    return winner, games
+
+
+@transaction.atomic
+def seed_tournament(players, name=None, rounds=None, completed_rounds=None, seed=0, prefix='bench'):
+    """
+    Cria (e ativa) um campeonato com `players` jogadores novos e o
+    round-robin completo (ou só as primeiras `rounds` rodadas). As primeiras
+    `completed_rounds` rodadas (padrão: metade) ficam concluídas com jogos.
+    Retorna o Tournament.
+    """
+    tournament = Tournament.objects.create(name=name or f"Sintético {players} jogadores #{seed}")
+    tournament.activate()
+
+    created = Player.objects.bulk_create(
+        [Player(username=f"{prefix}{tournament.pk}-{i}") for i in range(players)],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    player_ids = [player.pk for player in created]
+    matches = generate_schedule(player_ids, tournament=tournament, rounds=rounds, seed=seed)
+
+    last_round = max((match.round_number for match in matches), default=0)
+    if completed_rounds is None:
+        completed_rounds = last_round // 2
+
+    rng = random.Random(seed)
+    games = []
+    finished = []
+    for match in matches:
+        if match.round_number > completed_rounds:
+            continue
+        match.series_winner_id, series_games = random_series(rng, match)
+        match.status = STATUS_COMPLETED
+        games.extend(series_games)
+        finished.append(match)
+
+    Match.objects.bulk_update(finished, ['status', 'series_winner'], batch_size=BULK_BATCH_SIZE)
+    Game.objects.bulk_create(games, batch_size=BULK_BATCH_SIZE)
+
+    rebuild_player_stats(player_ids)
+    rebuild_standings(tournament)
+    recompute_ratings(tournament.pk)
+    caching.bump_version_on_commit()
+    return tournament
+
+
+@transaction.atomic
+def discard_tournament(tournament):
+    """
+    Apaga um campeonato criado por seed_tournament() junto com os jogadores
+    dele. Os confrontos voltam antes para 'Agendada' (uma UPDATE), assim o
+    sinal de exclusão não recalcula a classificação confronto a confronto.
+    """
+    player_ids = list(tournament.standings.values_list('player_id', flat=True))
+    tournament.matches.update(status=STATUS_SCHEDULED)
+    Player.objects.filter(pk__in=player_ids).delete()
+    tournament.delete()
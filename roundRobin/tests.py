@@ -1,3 +1,1427 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import Client, TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import MatchAdmin, BracketAdmin
+from .models import Tournament, Player, Match, Game, Standing, StandingSnapshot, Bracket, BracketMatch, StatEvent, STATUS_COMPLETED, STATUS_SCHEDULED
+from .models import WIN_CONDITION_FIRST_BLOOD, WIN_CONDITION_FARM_80, DEFAULT_TOURNAMENT_NAME
+from . import standings
+from . import benchmark
+from . import caching
+from . import events
+from . import h2h
+from . import playoffs
+from . import publishing
+from . import replica
+from .ledger import settle_matches
+from .ratings import recompute_ratings
+from . import ledger
+from .schedule import round_robin_pairings, generate_schedule
+from .synthetic import seed_tournament
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def quiet_tournament():
+    """ Campeonato ativo criado sem sinais (nenhum bump_version pendente no teste). """
+    [tournament] = Tournament.objects.bulk_create([Tournament(name=DEFAULT_TOURNAMENT_NAME, is_active=True)])
+    return tournament
+
+
+def make_players(count, prefix="P"):
+    return [Player.objects.create(username=f"{prefix}{i}") for i in range(count)]
+
+
+def complete_match(player1, player2, winner, round_number=1):
+    return Match.objects.create(
+        player1=player1, player2=player2, series_winner=winner,
+        status=STATUS_COMPLETED, round_number=round_number,
+    )
+
+
+def admin_save(match, **changes):
+    """
+    Simula o "Salvar" do admin: save_model + save_related, como o
+    ModelAdmin faz depois que o formulário e os inlines são válidos.
+    """
+    request = RequestFactory().post('/')
+    request.user = User(is_superuser=True, is_staff=True)
+    request._messages = CookieStorage(request)
+
+    change = match.pk is not None
+    for field, value in changes.items():
+        setattr(match, field, value)
+
+    model_admin = MatchAdmin(Match, site)
+    form = SimpleNamespace(instance=match, save_m2m=lambda: None)
+    model_admin.save_model(request, match, form, change)
+    model_admin.save_related(request, form, [], change)
+    return match
+
+
+def add_games(match, *winners, duration=timedelta(minutes=10), condition=WIN_CONDITION_FARM_80):
+    for number, winner in enumerate(winners, start=1):
+        Game.objects.update_or_create(
+            match=match, game_number=number,
+            defaults=dict(
+                winner=winner, duration=duration, win_condition=condition,
+                player1_farm=80, player2_farm=40,
+            ),
+        )
+
+
+class LeaderboardTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c, self.d = make_players(4)
+        complete_match(self.a, self.b, self.a)
+        complete_match(self.a, self.c, self.a)
+        complete_match(self.b, self.c, self.b)
+        Match.objects.create(player1=self.c, player2=self.d, status=STATUS_SCHEDULED)
+
+        # Empate em pontos entre C e D: desempata pelo saldo K/D.
+        Player.objects.filter(pk=self.d.pk).update(total_kills=2)
+        Player.objects.filter(pk=self.a.pk).update(wins=2, total_win_time=timedelta(minutes=20))
+
+    def test_with_standings_annotations(self):
+        ranked = list(Player.objects.with_standings())
+
+        self.assertEqual([p.pk for p in ranked], [self.a.pk, self.b.pk, self.d.pk, self.c.pk])
+        first = ranked[0]
+        self.assertEqual(first.points, 6)
+        self.assertEqual(first.series_played, 2)
+        self.assertEqual(first.series_losses, 0)
+        self.assertEqual(first.avg_win_time, timedelta(minutes=10))
+        self.assertEqual(ranked[3].series_played, 2)
+        self.assertEqual(ranked[3].series_losses, 2)
+
+    def test_with_standings_matches_python_properties(self):
+        for player in Player.objects.with_standings():
+            fresh = Player.objects.get(pk=player.pk)
+            self.assertEqual(player.series_wins, fresh.series_wins)
+            self.assertEqual(player.series_played, fresh.series_played)
+            self.assertEqual(player.points, fresh.points)
+
+
+@override_settings(CACHES=NO_CACHE)
+class StandingTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c, self.d = make_players(4)
+
+    def play(self, player1, player2, *winners, **game_kwargs):
+        match = Match.objects.create(player1=player1, player2=player2)
+        add_games(match, *winners, **game_kwargs)
+        return admin_save(match, status=STATUS_COMPLETED)
+
+    def test_apply_revert_and_wo(self):
+        match = self.play(self.a, self.b, self.a, self.b, self.a, condition=WIN_CONDITION_FIRST_BLOOD)
+
+        standing = Standing.objects.get(player=self.a)
+        self.assertEqual((standing.series_played, standing.series_wins, standing.points), (1, 1, 3))
+        self.assertEqual(standing.kill_death_balance, 1)
+        self.assertEqual(standing.average_win_time, timedelta(minutes=10))
+        self.assertEqual(Standing.objects.get(player=self.b).series_losses, 1)
+        self.assertEqual(standings.check_standings(), [])
+
+        admin_save(match, status=STATUS_SCHEDULED)
+        standing.refresh_from_db()
+        self.assertEqual((standing.series_played, standing.points, standing.wins), (0, 0, 0))
+        self.assertEqual(standings.check_standings(), [])
+
+        admin_save(match, status=STATUS_COMPLETED, is_wo=True, series_winner=self.b)
+        standing.refresh_from_db()
+        self.assertEqual((standing.series_played, standing.series_losses, standing.total_farm), (1, 1, 0))
+        self.assertEqual(Standing.objects.get(player=self.b).points, 3)
+        self.assertEqual(standings.check_standings(), [])
+
+    def test_deleting_match_reverts_series(self):
+        match = self.play(self.a, self.b, self.a, self.a)
+        match.delete()
+        self.assertEqual(Standing.objects.get(player=self.a).points, 0)
+
+    def test_check_detects_and_fixes_drift(self):
+        self.play(self.a, self.b, self.b, self.b)
+        Standing.objects.filter(player=self.b).update(points=99)
+
+        problems = standings.check_standings()
+        self.assertIn((Tournament.objects.current().pk, self.b.pk, 'points', 3, 99), problems)
+
+        standings.rebuild_standings()
+        self.assertEqual(standings.check_standings(), [])
+
+    def test_leaderboard_and_playoffs_query_count_is_constant(self):
+        self.play(self.a, self.b, self.a, self.a)
+        self.play(self.c, self.d, self.d, self.c, self.d)
+
+        # Classificação + matriz de confronto direto (A e D empatados; sem cache, ela é montada).
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual([s.player for s in response.context['standings']][:2], [self.a, self.d])
+
+        make_players(20, prefix="extra")
+        with self.assertNumQueries(2):
+            self.client.get(reverse('leaderboard'))
+
+        # Chave cadastrada? (não) + os 4 primeiros (e empatados no corte) + matriz.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('playoffs'))
+        html = response.context['bracket_html']
+        self.assertLess(html.index(self.a.username), html.index(self.d.username))
+
+
+@override_settings(CACHES=NO_CACHE)
+class PlayoffBracketTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.players = make_players(10)
+        self.tournament = Tournament.objects.current()
+        # Classificação conhecida: P0 em 1º, P1 em 2º, ...
+        for points, player in enumerate(reversed(self.players)):
+            Standing.objects.filter(player=player).update(points=points)
+
+    def create_bracket(self, size):
+        bracket = Bracket.objects.create(tournament=self.tournament, size=size)
+        playoffs.seed_bracket(bracket)
+        return bracket
+
+    def slot(self, bracket, stage, position):
+        return bracket.matches.get(stage=stage, position=position)
+
+    def save_results(self, bracket, **winners):
+        """ "Salvar" da chave no admin com os vencedores {'s1p0': jogador, ...}. """
+        for slot, winner in winners.items():
+            stage, position = int(slot[1]), int(slot[3])
+            BracketMatch.objects.filter(bracket=bracket, stage=stage, position=position).update(winner=winner)
+        request = RequestFactory().post('/')
+        request.user = User(is_superuser=True, is_staff=True)
+        form = SimpleNamespace(instance=bracket, save_m2m=lambda: None)
+        with self.captureOnCommitCallbacks(execute=True):
+            BracketAdmin(Bracket, site).save_related(request, form, [], True)
+
+    def test_seed_order(self):
+        self.assertEqual(playoffs.seed_order(4), [1, 4, 2, 3])
+        self.assertEqual(playoffs.seed_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+        self.assertEqual(len(playoffs.seed_order(16)), 16)
+
+    def test_seeding_takes_top_k_with_limit(self):
+        with CaptureQueriesContext(connection) as queries:
+            bracket = self.create_bracket(8)
+        # Corte no 8º colocado pelo índice de ranking (sem ordenar todo mundo em Python).
+        self.assertTrue(any('LIMIT 1 OFFSET 7' in q['sql'] for q in queries.captured_queries))
+
+        first = [(m.seed1, m.player1, m.seed2, m.player2) for m in bracket.matches.filter(stage=1)]
+        p = self.players
+        self.assertEqual(first, [(1, p[0], 8, p[7]), (4, p[3], 5, p[4]), (2, p[1], 7, p[6]), (3, p[2], 6, p[5])])
+        self.assertEqual(bracket.matches.count(), 7)
+
+        with self.assertRaises(ValueError):
+            playoffs.seed_bracket(Bracket(tournament=self.tournament, size=16))
+
+    def test_winners_advance_and_corrections_undo_the_path(self):
+        bracket = self.create_bracket(4)
+        p = self.players
+        self.save_results(bracket, s1p0=p[0], s1p1=p[2])
+        final = self.slot(bracket, 2, 0)
+        self.assertEqual((final.player1, final.seed1, final.player2, final.seed2), (p[0], 1, p[2], 3))
+
+        self.save_results(bracket, s2p0=p[2])
+        self.assertContains(self.client.get(reverse('playoffs')), f"Campeão: {p[2].username}")
+
+        # Semifinal corrigida: o finalista muda e o resultado da final cai.
+        self.save_results(bracket, s1p1=p[1])
+        final = self.slot(bracket, 2, 0)
+        self.assertEqual((final.player2, final.seed2, final.winner), (p[1], 2, None))
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_rendered_bracket_is_cached_until_a_playoff_result(self):
+        bracket = self.create_bracket(4)
+        self.client.get(reverse('playoffs'))
+
+        caching.bump_version()  # resultado da fase de grupos: a chave não muda
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('playoffs'))
+        self.assertNotContains(response, "venceu")
+
+        self.save_results(bracket, s1p0=self.players[3])
+        # O bump da página fica pendente na transação do teste (ver PublishStaticTests);
+        # o que se testa aqui é o fragmento da chave.
+        caching.bump_version()
+        self.assertContains(self.client.get(reverse('playoffs')), f"{self.players[3].username} venceu")
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class HeadToHeadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.a, self.b, self.c = make_players(3)
+        self.tournament_id = Tournament.objects.current().pk
+        # B vence A no confronto direto; A vence C com dois First Bloods (saldo K/D melhor que o de B).
+        self.ab = Match.objects.create(player1=self.a, player2=self.b, round_number=1)
+        add_games(self.ab, self.b, self.a, self.b)
+        admin_save(self.ab, status=STATUS_COMPLETED)
+        ac = Match.objects.create(player1=self.a, player2=self.c, round_number=2)
+        add_games(ac, self.a, self.a, condition=WIN_CONDITION_FIRST_BLOOD)
+        admin_save(ac, status=STATUS_COMPLETED)
+
+    def test_matrix_is_built_in_one_query(self):
+        with self.assertNumQueries(1):
+            matrix = h2h.build(self.tournament_id)
+        self.assertEqual(matrix.record(self.b.pk, self.a.pk), {'series': [1, 0], 'games': [2, 1]})
+        self.assertEqual(matrix.record(self.c.pk, self.a.pk), {'series': [0, 1], 'games': [0, 2]})
+
+    def test_head_to_head_breaks_ties_before_kd(self):
+        by_sql = list(Standing.objects.filter(tournament_id=self.tournament_id).select_related('player'))
+        self.assertEqual([s.player for s in by_sql][:2], [self.a, self.b])
+
+        ranked = standings.apply_head_to_head(by_sql)
+        self.assertEqual([s.player for s in ranked], [self.b, self.a, self.c])
+        self.assertEqual(
+            [row['username'] for row in self.client.get('/api/leaderboard').json()['standings']],
+            [self.b.username, self.a.username, self.c.username],
+        )
+
+    def test_top_standings_breaks_the_whole_tie_at_the_cut(self):
+        zeros = make_players(10, prefix="Z")  # empatados com C em 0 pontos
+        queryset = Standing.objects.filter(tournament_id=self.tournament_id).select_related('player')
+        self.assertEqual([s.player for s in standings.top_standings(queryset, 1)], [self.b])
+
+        with mock.patch.object(standings, 'apply_head_to_head', wraps=standings.apply_head_to_head) as tiebreak:
+            top = standings.top_standings(queryset, 4)
+        self.assertEqual(len(list(tiebreak.call_args.args[0])), 2 + 1 + len(zeros))
+        leaderboard = [row['username'] for row in self.client.get('/api/leaderboard').json()['standings']]
+        self.assertEqual([s.player.username for s in top], leaderboard[:4])
+
+    def test_result_save_updates_only_the_pair(self):
+        h2h.get_matrix(self.tournament_id)
+        add_games(self.ab, self.a, self.a, self.b)
+        with mock.patch.object(h2h, 'build', side_effect=AssertionError("reconstruiu a matriz")):
+            with self.captureOnCommitCallbacks(execute=True):
+                admin_save(self.ab, series_winner=self.a)
+            matrix = h2h.get_matrix(self.tournament_id)
+        self.assertEqual(matrix.record(self.a.pk, self.b.pk), {'series': [1, 0], 'games': [2, 1]})
+
+    def test_rebuild_does_not_overwrite_a_refresh_made_meanwhile(self):
+        cache.set(f"{h2h.H2H_KEY.format(self.tournament_id)}:stale", 1, None)
+        old = h2h.build(self.tournament_id)  # leitura de antes do "commit" abaixo
+
+        def build_while_saving(tournament_id):
+            add_games(self.ab, self.a, self.a, self.b)
+            admin_save(self.ab, series_winner=self.a)
+            h2h.refresh_pairs(self.tournament_id, {(self.a.pk, self.b.pk)})
+            return old
+
+        with mock.patch.object(h2h, 'build', side_effect=build_while_saving):
+            self.assertIs(h2h.get_matrix(self.tournament_id), old)
+        # A marca de velha continua: a próxima leitura monta a matriz atual.
+        matrix = h2h.get_matrix(self.tournament_id)
+        self.assertEqual(matrix.record(self.a.pk, self.b.pk), {'series': [1, 0], 'games': [2, 1]})
+
+    def test_api(self):
+        response = self.client.get(f'/api/h2h/{self.b.username}/{self.a.username}')
+        self.assertEqual(response.json()['series'], [1, 0])
+        self.assertEqual(response.json()['games'], [2, 1])
+        self.assertEqual(self.client.get(f'/api/h2h/{self.a.username}/ninguem').status_code, 404)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # bulk_create: sem sinais, para não deixar um bump pendente na transação do teste.
+        self.a, self.b = Player.objects.bulk_create([Player(username="P0"), Player(username="P1")])
+        standings.ensure_standings(quiet_tournament().pk, [self.a.pk, self.b.pk])
+
+    def test_hit_after_miss_costs_no_queries(self):
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertContains(response, self.a.username)
+
+    def test_result_save_bumps_version(self):
+        self.client.get(reverse('leaderboard'))
+        version = caching.get_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Player.objects.create(username="Novato")
+
+        self.assertNotEqual(caching.get_version(), version)
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, "Novato")
+
+    def test_evicted_version_does_not_match_old_pages(self):
+        self.client.get(reverse('leaderboard'))
+        cache.delete(caching.VERSION_KEY)  # expulsa pelo cull do cache
+
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_hit_keeps_the_headers_set_by_the_view(self):
+        @caching.cached_page('headers')
+        def view(request):
+            response = HttpResponse('{}', content_type='application/json')
+            response['Vary'] = 'Accept-Language'
+            response['X-Frame-Options'] = 'DENY'
+            return response
+
+        request = RequestFactory().get('/headers/')
+        miss, hit = view(request), view(request)
+        self.assertEqual((miss['X-Cache'], hit['X-Cache']), ('MISS', 'HIT'))
+        for name in ('Content-Type', 'Vary', 'X-Frame-Options'):
+            self.assertEqual(hit[name], miss[name])
+
+    def test_unknown_query_parameters_share_the_cached_page(self):
+        self.client.get(reverse('leaderboard'))
+        response = self.client.get(reverse('leaderboard') + '?utm_source=x&fbclid=y')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.client.get('/api/matches?round=1')
+        self.assertEqual(self.client.get('/api/matches?round=1&x=2')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/matches?round=2')['X-Cache'], 'MISS')
+
+    def test_serves_stale_copy_while_another_worker_renders(self):
+        self.client.get(reverse('leaderboard'))
+        caching.bump_version()
+
+        # Simula outro worker segurando o lock de renderização.
+        request = RequestFactory().get(reverse('leaderboard'))
+        cache.add(caching.page_key('leaderboard', request) + ':lock', 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'STALE')
+
+
+@override_settings(CACHES=NO_CACHE)
+class MatchListTests(TestCase):
+
+    def test_query_count_does_not_grow_with_matches_or_rounds(self):
+        players = make_players(6)
+        match = Match.objects.create(player1=players[0], player2=players[1])
+        add_games(match, players[0], players[1], players[0])
+        admin_save(match, status=STATUS_COMPLETED)
+
+        # Rodadas por status (agregado) + confrontos (JOIN) + jogos (prefetch).
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('match-list'))
+        self.assertContains(response, "2 x 1")
+
+        for round_number in range(1, 15):
+            for home, away in ((2, 3), (4, 5)):
+                match = Match.objects.create(
+                    player1=players[home], player2=players[away], round_number=round_number
+                )
+                add_games(match, players[home], players[home])
+                admin_save(match, status=STATUS_COMPLETED)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('match-list'))
+
+        rounds = response.context['rounds_list']
+        self.assertEqual([r['round_number'] for r in rounds], list(range(1, 15)))
+        self.assertEqual(len(rounds[0]['matches']), 3)
+        self.assertContains(response, "Rodada 14")
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RoundFragmentCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.a, self.b, self.c, self.d = Player.objects.bulk_create(
+            [Player(username=f"P{i}") for i in range(4)]
+        )
+        # Executa os callbacks: nenhuma invalidação fica pendente na transação do teste.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first = Match.objects.create(player1=self.a, player2=self.b, round_number=1)
+            add_games(self.first, self.a, self.a)
+            admin_save(self.first, status=STATUS_COMPLETED)
+            self.second = Match.objects.create(player1=self.c, player2=self.d, round_number=2)
+
+    def get_list(self):
+        caching.bump_version()  # força a renderização da página (sem o cache da página inteira)
+        return self.client.get(reverse('match-list'))
+
+    def test_finished_rounds_come_from_fragment_cache(self):
+        self.get_list()
+        response = self.get_list()
+        rounds = response.context['rounds_list']
+        self.assertNotIn('matches', rounds[0])  # rodada 1 veio pronta do cache
+        self.assertEqual(len(rounds[1]['matches']), 1)  # rodada 2 renderizada ao vivo
+        self.assertContains(response, "2 x 0")
+
+        add_games(self.second, self.d, self.d)
+        admin_save(self.second, status=STATUS_COMPLETED)
+        self.get_list()
+        with self.assertNumQueries(1):  # só o agregado das rodadas
+            response = self.get_list()
+        self.assertContains(response, "Rodada 2")
+
+    def test_admin_save_rebuilds_only_that_round(self):
+        self.get_list()
+        add_games(self.first, self.a, self.b, self.a)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_save(self.first)
+
+        response = self.get_list()
+        self.assertContains(response, "2 x 1")
+        self.assertNotContains(response, "2 x 0")
+
+    def test_deleting_many_matches_schedules_one_round_bump(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Match.objects.all().delete()
+        [bumps] = [func for func in callbacks if isinstance(func, caching._PendingRoundBumps)]
+        self.assertEqual(len(bumps.keys), 2)
+
+
+@override_settings(CACHES=NO_CACHE)
+class PlayerProfileTests(TestCase):
+
+    def setUp(self):
+        self.hero, *self.rivals = make_players(26)
+        tournament = Tournament.objects.current()
+        # 25 séries concluídas (uma por rodada) e uma agendada.
+        matches = Match.objects.bulk_create([
+            Match(
+                player1=rival if i % 2 else self.hero, player2=self.hero if i % 2 else rival,
+                series_winner=self.hero, status=STATUS_COMPLETED, round_number=i + 1, tournament=tournament,
+            )
+            for i, rival in enumerate(self.rivals)
+        ])
+        add_games(matches[0], self.hero, self.hero)
+        Match.objects.create(player1=self.hero, player2=self.rivals[0], round_number=30, tournament=tournament)
+        self.url = reverse('player-profile', args=[self.hero.username])
+
+    def test_keyset_pagination_with_constant_queries(self):
+        # Jogador + histórico + jogos (prefetch) + próximos confrontos.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        rounds = [r['round_number'] for r in response.context['rounds_list']]
+        self.assertEqual(rounds, list(range(1, 21)))
+        self.assertEqual(response.context['player'].series_wins, 25)
+        self.assertEqual(len(response.context['upcoming']), 1)
+        self.assertContains(response, "2 x 0")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'after': response.context['next_cursor']})
+        self.assertEqual([r['round_number'] for r in response.context['rounds_list']], list(range(21, 26)))
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_series_counts_are_from_the_active_tournament(self):
+        old = Tournament.objects.create(name="Temporada 0")
+        Match.objects.create(
+            player1=self.hero, player2=self.rivals[0], series_winner=self.hero,
+            status=STATUS_COMPLETED, tournament=old,
+        )
+        player = self.client.get(self.url).context['player']
+        self.assertEqual((player.series_wins, player.series_played, player.points), (25, 25, 75))
+
+    def test_unknown_player_and_bad_cursor(self):
+        self.assertEqual(self.client.get(reverse('player-profile', args=['ninguem'])).status_code, 404)
+        response = self.client.get(self.url, {'after': 'x'})
+        self.assertEqual(response.context['rounds_list'][0]['round_number'], 1)
+
+    def test_leaderboard_links_to_profiles(self):
+        self.assertContains(self.client.get(reverse('leaderboard')), f'href="{self.url}"')
+
+
+@override_settings(CACHES=NO_CACHE)
+class SettleMatchesTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c = make_players(3)
+
+    def test_batch_matches_player_counters(self):
+        first = Match.objects.create(player1=self.a, player2=self.b, status=STATUS_COMPLETED)
+        second = Match.objects.create(player1=self.c, player2=self.a, status=STATUS_COMPLETED)
+        add_games(first, self.a, self.b, self.b, condition=WIN_CONDITION_FIRST_BLOOD)
+        add_games(second, self.a, self.a)
+
+        scores = settle_matches([first, second])
+
+        self.assertEqual(scores, {first.pk: (1, 2), second.pk: (0, 2)})
+        self.assertEqual((first.series_winner_id, second.series_winner_id), (self.b.pk, self.a.pk))
+        a = Player.objects.get(pk=self.a.pk)
+        self.assertEqual((a.wins, a.losses, a.total_kills, a.total_deaths), (3, 2, 1, 2))
+        self.assertEqual(a.total_farm, 3 * 80 + 2 * 40)
+        self.assertEqual(a.total_win_time, timedelta(minutes=30))
+        # Um lançamento por jogo e por jogador.
+        self.assertEqual(StatEvent.objects.count(), 10)
+
+    def test_resaving_unchanged_series_writes_nothing(self):
+        match = Match.objects.create(player1=self.a, player2=self.b)
+        add_games(match, self.a, self.b, self.a)
+        admin_save(match, status=STATUS_COMPLETED)
+        before = Player.objects.get(pk=self.a.pk)
+
+        # SAVEPOINT + SELECT dos jogos + SUM do livro-razão + RELEASE,
+        # sem nenhum lançamento nem UPDATE em Player.
+        with self.assertNumQueries(4):
+            settle_matches([match])
+
+        after = Player.objects.get(pk=self.a.pk)
+        self.assertEqual((after.wins, after.total_farm), (before.wins, before.total_farm))
+
+
+@override_settings(CACHES=NO_CACHE)
+class RebuildStatsTests(TestCase):
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        a, b = make_players(2)
+        match = Match.objects.create(player1=a, player2=b)
+        add_games(match, a, b, a, condition=WIN_CONDITION_FIRST_BLOOD)
+        admin_save(match, status=STATUS_COMPLETED)
+
+        call_command('rebuild_stats', '--check', stdout=StringIO())
+
+        Player.objects.filter(pk=a.pk).update(wins=7, total_farm=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', '--check', '--round', '1', stdout=StringIO())
+
+        call_command('rebuild_stats', stdout=StringIO())
+        a.refresh_from_db()
+        self.assertEqual((a.wins, a.losses, a.total_kills, a.total_farm), (2, 1, 2, 240))
+        self.assertEqual(standings.check_standings(), [])
+
+
+class ScheduleTests(TestCase):
+
+    def test_circle_method_pairs_everyone_once(self):
+        for count in (2, 5, 8):
+            pairings = list(round_robin_pairings(range(count)))
+            pairs = {frozenset((home, away)) for _, home, away in pairings}
+
+            rounds = count - 1 if count % 2 == 0 else count
+            self.assertEqual(len(pairings), count * (count - 1) // 2)
+            self.assertEqual(len(pairs), len(pairings))
+            self.assertEqual(max(r for r, _, _ in pairings), rounds)
+            for round_number in range(1, rounds + 1):
+                seen = [p for r, home, away in pairings if r == round_number for p in (home, away)]
+                self.assertEqual(len(seen), len(set(seen)))
+
+    def test_seed_is_deterministic_and_partial_rounds(self):
+        first = list(round_robin_pairings(range(10), rounds=3, seed=42))
+        self.assertEqual(first, list(round_robin_pairings(range(10), rounds=3, seed=42)))
+        self.assertEqual(len(first), 3 * 5)
+
+    def test_command_bulk_inserts_schedule(self):
+        make_players(7)
+        # jogadores + SAVEPOINT + campeonato ativo + INSERT + classificação + RELEASE
+        with self.assertNumQueries(6):
+            generate_schedule(list(Player.objects.values_list('pk', flat=True)))
+
+        call_command('generate_schedule', '--rounds', '2', '--first-round', '8',
+                     '--start', '2026-11-01T19:00', '--slot-minutes', '30', stdout=StringIO())
+
+        self.assertEqual(Match.objects.filter(round_number__lte=7).count(), 21)
+        later = Match.objects.filter(round_number=8).order_by('scheduled_time')
+        self.assertEqual(later.count(), 3)
+        self.assertEqual(later[1].scheduled_time - later[0].scheduled_time, timedelta(minutes=30))
+
+        for bad in (['--start', '01/11/2026'], ['--first-round', '0'], ['--rounds', '0']):
+            with self.subTest(options=bad), self.assertRaises(CommandError):
+                call_command('generate_schedule', *bad, stdout=StringIO())
+
+
+@override_settings(CACHES=NO_CACHE)
+class ImportResultsTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c = make_players(3)
+
+    def write(self, name, content):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def test_csv_import_with_row_errors(self):
+        path = self.write('results.csv', (
+            "round,player1,player2,game_number,winner,win_condition,duration,player1_farm,player2_farm,wo_winner\n"
+            "1,P0,P1,1,P0,first_blood,08:30,40,35,\n"
+            "1,P1,P0,2,P0,farm_80,14:00,70,80,\n"
+            "1,P0,P1,3,Ninguem,farm_80,14:00,80,70,\n"
+            "2,P1,P2,,,,,,,P2\n"
+            "2,P0,P2,1,P0,mystery,10:00,0,0,\n"
+        ))
+        err = StringIO()
+        call_command('import_results', path, '--batch-size', '2', stdout=StringIO(), stderr=err)
+
+        self.assertIn("Linha 4: Jogador 'Ninguem'", err.getvalue())
+        self.assertIn("Linha 6: 'win_condition' inválida", err.getvalue())
+
+        match = Match.objects.get(round_number=1)
+        self.assertEqual((match.status, match.series_winner), (STATUS_COMPLETED, self.a))
+        # Linha com jogadores invertidos: o farm vai para o lado certo.
+        self.assertEqual(match.games.get(game_number=2).player1_farm, 80)
+        wo = Match.objects.get(round_number=2, player1=self.b)
+        self.assertTrue(wo.is_wo)
+
+        a = Player.objects.get(pk=self.a.pk)
+        self.assertEqual((a.wins, a.total_kills, a.total_farm), (2, 1, 120))
+        self.assertEqual(Standing.objects.get(player=self.c).points, 3)
+        self.assertEqual(standings.check_standings(), [])
+
+    def test_ndjson_dry_run_writes_nothing(self):
+        path = self.write('results.ndjson', (
+            '{"round": 1, "player1": "P0", "player2": "P1", "game_number": 1, "winner": "P1", '
+            '"win_condition": "time_farm", "duration": "13:00", "player1_farm": 90, "player2_farm": 99}\n'
+            'not json\n'
+        ))
+        out, err = StringIO(), StringIO()
+        call_command('import_results', path, '--dry-run', stdout=out, stderr=err)
+
+        self.assertIn("1 jogo(s) importados", out.getvalue())
+        self.assertIn("Linha 2: JSON inválido", err.getvalue())
+        self.assertFalse(Match.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.a, self.b = make_players(2)
+        match = Match.objects.create(player1=self.a, player2=self.b, round_number=2)
+        add_games(match, self.b, self.b)
+        admin_save(match, status=STATUS_COMPLETED)
+        Match.objects.create(player1=self.a, player2=self.b, round_number=3)
+
+    def test_payloads(self):
+        leaderboard = self.client.get('/api/leaderboard').json()
+        self.assertEqual(leaderboard['standings'][0]['username'], self.b.username)
+        self.assertEqual(leaderboard['standings'][0]['points'], 3)
+
+        rounds = self.client.get('/api/matches?round=2').json()['rounds']
+        self.assertEqual([r['round'] for r in rounds], [2])
+        match = rounds[0]['matches'][0]
+        self.assertEqual((match['winner'], match['score']), (self.b.username, [0, 2]))
+        self.assertEqual(match['games'][0]['duration'], 600)
+
+        playoffs = self.client.get('/api/playoffs').json()
+        self.assertFalse(playoffs['enough_players'])
+        self.assertEqual(self.client.get('/api/matches?round=x').status_code, 400)
+
+    def test_conditional_get_skips_queries_until_version_changes(self):
+        response = self.client.get('/api/leaderboard')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/leaderboard', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        caching.bump_version()
+        response = self.client.get('/api/leaderboard', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+
+    def test_gzip(self):
+        response = self.client.get('/api/matches', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['rounds'][1]['round'], 3)
+
+
+class StaticAssetsTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_collectstatic_hashes_and_precompresses(self):
+        storages = {
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'roundRobin.storage.PrecompressedManifestStaticFilesStorage'},
+        }
+        with override_settings(STORAGES=storages, STATIC_ROOT=self.root, CACHES=NO_CACHE):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            html = self.client.get(reverse('leaderboard')).content.decode()
+
+        with open(os.path.join(self.root, 'staticfiles.json')) as handle:
+            hashed = json.load(handle)['paths']['roundRobin/css/base.css']
+        self.assertRegex(hashed, r'^roundRobin/css/base\.[0-9a-f]{12}\.css$')
+        self.assertIn(f'/static/{hashed}', html)
+        self.assertNotIn('<style>', html)
+
+        path = os.path.join(self.root, hashed)
+        with open(path, 'rb') as original, open(f"{path}.gz", 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), original.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'roundRobin/css/base.css.gz')))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PublishStaticTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        # bulk_create: sem sinais, nenhum bump_version fica pendente na transação
+        # do teste (o que faria o admin_save abaixo não agendar a publicação).
+        self.a, self.b = Player.objects.bulk_create([Player(username="P0"), Player(username="P1")])
+        tournament = quiet_tournament()
+        standings.ensure_standings(tournament.pk, [self.a.pk, self.b.pk])
+        [self.match] = Match.objects.bulk_create([
+            Match(player1=self.a, player2=self.b, round_number=1, tournament=tournament)
+        ])
+
+    def read(self, relative):
+        with open(os.path.join(self.root, relative), 'rb') as handle:
+            return handle.read()
+
+    def test_command_writes_every_page_with_gzip_copy(self):
+        out = StringIO()
+        call_command('publish_static', root=self.root, stdout=out)
+        self.assertIn('6 de 6', out.getvalue())
+
+        for relative in publishing.PUBLISHED_PAGES.values():
+            self.assertEqual(gzip.decompress(self.read(f"{relative}.gz")), self.read(relative))
+        self.assertIn(b'Todas as Partidas', self.read('matches/index.html'))
+        self.assertEqual(len(json.loads(self.read('api/leaderboard.json'))['standings']), 2)
+        leftovers = [f for _, _, files in os.walk(self.root) for f in files if f.startswith('.publish-')]
+        self.assertEqual(leftovers, [])
+
+        # Nada mudou: nenhum arquivo é regravado.
+        self.assertEqual(publishing.publish_pages(self.root), [])
+
+    def test_result_save_republishes_after_commit(self):
+        with self.settings(PUBLISH_ROOT=self.root):
+            with self.captureOnCommitCallbacks(execute=True):
+                add_games(self.match, self.b, self.b)
+                admin_save(self.match, status=STATUS_COMPLETED)
+
+        leaderboard = json.loads(self.read('api/leaderboard.json'))
+        self.assertEqual(leaderboard['standings'][0]['username'], self.b.username)
+        self.assertIn(b'2 x 0', self.read('matches/index.html'))
+
+    def test_publishing_does_not_fill_the_page_cache(self):
+        publishing.publish_pages(self.root)
+        self.assertIn(b'class="active"', self.read('leaderboard/index.html'))
+
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'class="active"')
+
+    def test_stale_render_is_not_written(self):
+        with mock.patch.object(publishing, 'get_version', side_effect=[1, 2]):
+            self.assertEqual(publishing.publish_pages(self.root), [])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'leaderboard')))
+
+    def test_command_requires_root(self):
+        with self.assertRaises(CommandError):
+            call_command('publish_static', stdout=StringIO())
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class LiveEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def read_event(self, stream):
+        return (await anext(stream)).decode()
+
+    async def test_stream_delivers_published_events(self):
+        with mock.patch.object(events, 'POLL_INTERVAL', 0.01):
+            response = await self.async_client.get('/live/events/')
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            self.assertTrue((await self.read_event(stream)).startswith('retry:'))
+
+            event_id = await sync_to_async(events.publish)('series', {'match': 1, 'winner': 'ana'})
+            chunk = await self.read_event(stream)
+            await stream.aclose()
+
+        self.assertIn(f'id: {event_id}\nevent: series\n', chunk)
+        self.assertIn('"winner":"ana"', chunk)
+
+    def test_event_ids_come_from_the_database_counter(self):
+        first = events.publish('game', {'match': 1, 'game_number': 1})
+        cache.delete(events.SEQUENCE_KEY)  # expulsa do cache: o id não recomeça
+        second = events.publish('game', {'match': 1, 'game_number': 2})
+        self.assertEqual(second, first + 1)
+        self.assertEqual(cache.get(events.EVENT_KEY.format(first))['data']['game_number'], 1)
+        self.assertEqual(cache.get(events.SEQUENCE_KEY), second)
+
+    async def test_reconnect_replays_missed_events(self):
+        first = await sync_to_async(events.publish)('game', {'match': 1, 'game_number': 1})
+        await sync_to_async(events.publish)('game', {'match': 1, 'game_number': 2})
+
+        response = await self.async_client.get('/live/events/', headers={'Last-Event-ID': str(first)})
+        stream = aiter(response.streaming_content)
+        await self.read_event(stream)  # retry
+        chunk = await self.read_event(stream)
+        await stream.aclose()
+
+        self.assertIn(f'id: {first + 1}\n', chunk)
+        self.assertIn('"game_number":2', chunk)
+
+
+@override_settings(CACHES=NO_CACHE)
+class TournamentTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b = make_players(2)
+        self.old = Tournament.objects.current()
+        match = Match.objects.create(player1=self.a, player2=self.b)
+        add_games(match, self.a, self.a)
+        admin_save(match, status=STATUS_COMPLETED)
+
+        self.new = Tournament.objects.create(name="Temporada 2")
+        self.new.activate()
+        match = Match.objects.create(player1=self.a, player2=self.b, round_number=2)
+        add_games(match, self.b, self.b, condition=WIN_CONDITION_FIRST_BLOOD)
+        admin_save(match, status=STATUS_COMPLETED)
+
+    def test_current_never_returns_an_inactive_tournament(self):
+        Tournament.objects.filter(pk=self.new.pk).update(is_active=False)
+        self.assertEqual(self.old.name, DEFAULT_TOURNAMENT_NAME)
+
+        current = Tournament.objects.current()
+        self.assertEqual(current, self.old)
+        self.assertTrue(current.is_active)
+        self.assertEqual(Tournament.objects.get(is_active=True), self.old)
+        self.assertEqual(Tournament.objects.current(), self.old)
+
+    def test_new_match_gets_active_tournament_on_save(self):
+        with self.assertNumQueries(0):
+            match = Match(player1=self.a, player2=self.b, round_number=3)
+        match.save()
+        self.assertEqual(match.tournament, self.new)
+
+    def test_standings_are_scoped_per_tournament(self):
+        old = Standing.objects.get(tournament=self.old, player=self.a)
+        new = Standing.objects.get(tournament=self.new, player=self.a)
+        self.assertEqual((old.points, old.wins, old.kill_death_balance), (3, 2, 0))
+        self.assertEqual((new.points, new.wins, new.kill_death_balance), (0, 0, -2))
+
+        # Os contadores do Player continuam somando a carreira.
+        self.a.refresh_from_db()
+        self.assertEqual((self.a.wins, self.a.losses), (2, 2))
+        self.assertEqual(standings.check_standings(), [])
+
+    def test_public_pages_show_only_active_tournament(self):
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual([s.player for s in response.context['standings']], [self.b, self.a])
+        self.assertEqual([s.points for s in response.context['standings']], [3, 0])
+
+        response = self.client.get(reverse('match-list'))
+        self.assertEqual([r['round_number'] for r in response.context['rounds_list']], [2])
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:roundRobin_match_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(reverse('admin:roundRobin_match_changelist') + '?tournament=all')
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_rebuild_stats_for_one_tournament(self):
+        Standing.objects.update(points=99)
+        call_command('rebuild_stats', '--tournament', 'Temporada 2', stdout=StringIO())
+
+        self.assertEqual(standings.check_standings(self.new), [])
+        self.assertEqual(Standing.objects.get(tournament=self.old, player=self.a).points, 99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', '--tournament', 'Inexistente', stdout=StringIO())
+
+
+@override_settings(CACHES=NO_CACHE)
+class StatLedgerTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b = make_players(2)
+        self.match = Match.objects.create(player1=self.a, player2=self.b)
+        add_games(self.match, self.a, self.b, self.a, condition=WIN_CONDITION_FIRST_BLOOD)
+        admin_save(self.match, status=STATUS_COMPLETED)
+
+    def counters(self, player):
+        player.refresh_from_db()
+        return (player.wins, player.losses, player.total_farm, player.total_kills, player.total_deaths)
+
+    def test_farm_edit_posts_only_the_difference(self):
+        Game.objects.filter(match=self.match, game_number=2).update(player1_farm=55)
+        admin_save(self.match)
+
+        adjustment = StatEvent.objects.get(kind='adjust')
+        self.assertEqual((adjustment.player_id, adjustment.total_farm), (self.a.pk, -25))
+        self.assertEqual((adjustment.wins, adjustment.losses, adjustment.total_deaths), (0, 0, 0))
+        self.assertEqual(self.counters(self.a), (2, 1, 215, 2, 1))
+        self.assertEqual(ledger.ledger_drift(), {})
+
+    def test_reopen_and_delete_post_compensating_rows(self):
+        posted = StatEvent.objects.count()
+        admin_save(self.match, status=STATUS_SCHEDULED)
+        self.assertEqual(StatEvent.objects.filter(kind='revert').count(), 6)
+        self.assertEqual(StatEvent.objects.count(), posted + 6)  # nada é alterado nem apagado
+        self.assertEqual(self.counters(self.a), (0, 0, 0, 0, 0))
+
+        admin_save(self.match, status=STATUS_COMPLETED)
+        self.match.delete()
+        self.assertEqual(self.counters(self.b), (0, 0, 0, 0, 0))
+        self.assertEqual(ledger.fold()[self.b.pk]['losses'], 0)
+
+    def test_rebuild_is_one_grouped_sum_and_replay_sees_the_past(self):
+        before_edit = timezone.now()
+        StatEvent.objects.update(created_at=before_edit - timedelta(minutes=1))
+        Game.objects.filter(match=self.match, game_number=3).update(winner=self.b)
+        admin_save(self.match)
+
+        with self.assertNumQueries(1):
+            totals = ledger.fold()
+        self.assertEqual((totals[self.a.pk]['wins'], totals[self.b.pk]['wins']), (1, 2))
+        past = ledger.fold(as_of=before_edit)
+        self.assertEqual((past[self.a.pk]['wins'], past[self.b.pk]['wins']), (2, 1))
+        self.assertEqual(len(ledger.history(self.a, as_of=before_edit)), 3)
+
+        Player.objects.filter(pk=self.a.pk).update(wins=40)
+        ledger.rebuild_player_stats()
+        self.assertEqual(self.counters(self.a)[:2], (1, 2))
+
+        out = StringIO()
+        call_command('stat_ledger', '--player', self.a.username, stdout=out)
+        self.assertIn("Saldo: 1 V / 2 D", out.getvalue())
+
+
+class RatingTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c = make_players(3)
+
+    def rating(self, player):
+        return Standing.objects.get(player=player, tournament__is_active=True).rating
+
+    def play(self, player1, player2, *winners, round_number=1):
+        match = Match.objects.create(player1=player1, player2=player2, round_number=round_number)
+        add_games(match, *winners)
+        return admin_save(match, status=STATUS_COMPLETED)
+
+    def test_series_moves_both_ratings_and_edit_reverts_first(self):
+        match = self.play(self.a, self.b, self.a, self.a)
+        self.assertEqual(match.rated_result, '2-0')
+        self.assertGreater(self.rating(self.a), 1500)
+        self.assertAlmostEqual(self.rating(self.a) + self.rating(self.b), 3000)
+        self.assertAlmostEqual(self.rating(self.a) - 1500, match.rating_change1)
+
+        add_games(match, self.b, self.b)
+        admin_save(match)
+        self.assertLess(self.rating(self.a), 1500)
+
+        admin_save(match, is_wo=True, series_winner=self.a)
+        self.assertEqual((match.rated_result, self.rating(self.a)), ('', 1500))
+
+    def test_delete_reverts_rating(self):
+        match = self.play(self.a, self.b, self.a, self.b, self.a)
+        match.delete()
+        self.assertAlmostEqual(self.rating(self.a), 1500)
+        self.assertAlmostEqual(self.rating(self.b), 1500)
+
+    def test_recompute_matches_incremental_updates(self):
+        self.play(self.a, self.b, self.a, self.a, round_number=1)
+        self.play(self.b, self.c, self.c, self.b, self.b, round_number=2)
+        self.play(self.c, self.a, self.c, self.c, round_number=3)
+        incremental = {s.player_id: (s.rating, s.rating_deviation) for s in Standing.objects.all()}
+
+        Standing.objects.update(rating=0, rating_deviation=0)
+        call_command('recompute_ratings', stdout=StringIO())
+        for standing in Standing.objects.all():
+            expected = incremental[standing.player_id]
+            self.assertAlmostEqual(standing.rating, expected[0])
+            self.assertAlmostEqual(standing.rating_deviation, expected[1])
+        self.assertEqual(Match.objects.filter(rated_result='').count(), 0)
+
+    def test_recompute_query_count_does_not_grow_with_matches(self):
+        tournament_id = self.play(self.a, self.b, self.a, self.a, round_number=1).tournament_id
+        with CaptureQueriesContext(connection) as one_match:
+            recompute_ratings(tournament_id)
+        self.play(self.b, self.c, self.c, self.b, self.b, round_number=2)
+        self.play(self.c, self.a, self.c, self.c, round_number=3)
+        with self.assertNumQueries(len(one_match)):
+            recompute_ratings(tournament_id)
+
+    def test_api_exposes_rating(self):
+        self.play(self.a, self.b, self.b, self.b)
+        row = self.client.get('/api/leaderboard').json()['standings'][0]
+        self.assertEqual(row['username'], self.b.username)
+        self.assertGreater(row['rating'], 1500)
+        self.assertLess(row['rating_deviation'], 350)
+
+
+@override_settings(CACHES=NO_CACHE)
+class StandingSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.a, self.b, self.c = make_players(3)
+
+    def play(self, player1, player2, *winners, round_number):
+        match = Match.objects.create(player1=player1, player2=player2, round_number=round_number)
+        add_games(match, *winners)
+        with self.captureOnCommitCallbacks(execute=True):  # reconstrução depois do commit
+            return admin_save(match, status=STATUS_COMPLETED)
+
+    def test_last_round_matches_leaderboard(self):
+        tournament = seed_tournament(8, completed_rounds=4, prefix="snap-")
+        last_round = StandingSnapshot.objects.filter(tournament=tournament, round_number=4)
+        leaderboard = standings.apply_head_to_head(Standing.objects.filter(tournament=tournament))
+        self.assertEqual(
+            list(last_round.values_list('player_id', flat=True)),
+            [s.player_id for s in leaderboard],
+        )
+        self.assertEqual(set(StandingSnapshot.objects.values_list('round_number', flat=True)), {1, 2, 3, 4})
+
+    def test_edit_rebuilds_from_its_round_onward(self):
+        first = self.play(self.a, self.b, self.a, self.a, round_number=1)
+        self.play(self.b, self.c, self.b, self.b, round_number=2)
+        round_one = set(StandingSnapshot.objects.filter(round_number=1).values_list('pk', flat=True))
+        round_two = set(StandingSnapshot.objects.filter(round_number=2).values_list('pk', flat=True))
+
+        middle = self.play(self.a, self.c, self.c, self.c, round_number=2)
+        self.assertEqual(set(StandingSnapshot.objects.filter(round_number=1).values_list('pk', flat=True)), round_one)
+        self.assertFalse(round_two & set(StandingSnapshot.objects.values_list('pk', flat=True)))
+        leaderboard = standings.apply_head_to_head(Standing.objects.all())
+        self.assertEqual(
+            list(StandingSnapshot.objects.filter(round_number=2).values_list('player_id', flat=True)),
+            [s.player_id for s in leaderboard],
+        )
+
+        add_games(first, self.b, self.b)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_save(first)
+            self.assertFalse(StandingSnapshot.objects.exists())  # invalidada da rodada 1 em diante
+        self.assertEqual(StandingSnapshot.objects.get(round_number=1, position=1).player, self.b)
+        with self.captureOnCommitCallbacks(execute=True):
+            middle.delete()
+        self.assertEqual(StandingSnapshot.objects.get(round_number=2, player=self.c).points, 0)
+
+    def test_history_api_is_one_query(self):
+        self.play(self.a, self.b, self.a, self.a, round_number=1)
+        self.play(self.b, self.c, self.b, self.b, round_number=2)
+
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/standings/history').json()
+        self.assertEqual(data['rounds'], [1, 2])
+        self.assertEqual(data['players'][0], {'username': self.a.username, 'positions': [1, 1], 'points': [3, 3]})
+        self.assertEqual([p['username'] for p in data['players']], [self.a.username, self.b.username, self.c.username])
+
+
+# --- ORÇAMENTO DE CONSULTAS E TEMPOS (ESCALA) ---
+
+# Tempos dependem da máquina: só com IPX1_PERF_FULL=1 (ou ao regravar as
+# referências); as contagens de consultas rodam sempre.
+PERF_FULL = bool(os.environ.get('IPX1_PERF_FULL'))
+PERF_SIZES = (10, 100, 1000) if PERF_FULL else (10, 100)
+PERF_BASELINES = os.path.join(os.path.dirname(__file__), 'perf_baselines.json')
+# Quanto mais lento que a referência um passo pode ficar antes de falhar.
+PERF_TOLERANCE = float(os.environ.get('IPX1_PERF_TOLERANCE', '3'))
+# Diferenças menores que isso (segundos) são ruído de medição.
+PERF_MIN_MARGIN = 0.05
+
+# Consultas por operação: não podem crescer com o número de jogadores.
+# Sem cache, a matriz de confronto direto (h2h.py) conta uma consulta
+# sempre que há empate em pontos, o que os campeonatos sintéticos sempre têm.
+QUERY_BUDGET = {
+    'leaderboard': 2,
+    'playoffs': 3,
+    'match-list': 3,
+    'admin-save': 25,
+}
+
+
+def measure_operations():
+    """
+    Mede (consultas, segundos) das páginas públicas e do "Salvar" do admin
+    no campeonato ativo. Páginas: melhor de 3 execuções.
+    """
+    client = Client()
+    results = {}
+    for name in ('leaderboard', 'playoffs', 'match-list'):
+        timings = []
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                client.get(reverse(name))
+                timings.append(time.perf_counter() - started)
+        results[name] = (len(queries), min(timings))
+
+    match = (
+        Match.objects.filter(tournament__is_active=True, status=STATUS_SCHEDULED)
+        .select_related('player1', 'player2').order_by('round_number', 'pk').first()
+    )
+    add_games(match, match.player1, match.player2, match.player1)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        admin_save(match, status=STATUS_COMPLETED)
+        results['admin-save'] = (len(queries), time.perf_counter() - started)
+    return results
+
+
+@override_settings(CACHES=NO_CACHE)
+class QueryBudgetTests(TestCase):
+    """
+    Campeonatos sintéticos (round-robin completo, metade das rodadas jogadas)
+    com 10 e 100 jogadores. Um N+1 aparece como consultas que crescem com N.
+    Com IPX1_PERF_FULL=1, também 1000 jogadores e os tempos comparados com a
+    referência gravada em perf_baselines.json (regravar com IPX1_PERF_UPDATE=1).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.results = {}
+        for size in PERF_SIZES:
+            with transaction.atomic():
+                seed_tournament(size, prefix=f"n{size}-")
+                cls.results[size] = measure_operations()
+                transaction.set_rollback(True)
+
+    def test_query_counts_do_not_grow_with_players(self):
+        for name, budget in QUERY_BUDGET.items():
+            counts = {size: results[name][0] for size, results in self.results.items()}
+            with self.subTest(operation=name):
+                self.assertEqual(set(counts.values()), {budget}, f"Consultas por nº de jogadores: {counts}")
+
+    @skipUnless(PERF_FULL or os.environ.get('IPX1_PERF_UPDATE'), "tempos só com IPX1_PERF_FULL=1")
+    def test_timings_within_baseline(self):
+        measured = {
+            str(size): {name: round(elapsed, 4) for name, (_, elapsed) in results.items()}
+            for size, results in self.results.items()
+        }
+        if os.environ.get('IPX1_PERF_UPDATE'):
+            with open(PERF_BASELINES, 'w') as handle:
+                json.dump(measured, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.skipTest(f"Referências regravadas em {PERF_BASELINES}.")
+
+        with open(PERF_BASELINES) as handle:
+            baselines = json.load(handle)
+        for size, timings in measured.items():
+            for name, elapsed in timings.items():
+                baseline = baselines.get(size, {}).get(name)
+                if baseline is None:
+                    continue
+                with self.subTest(players=size, operation=name):
+                    self.assertLessEqual(
+                        elapsed, baseline * PERF_TOLERANCE + PERF_MIN_MARGIN,
+                        f"{name} com {size} jogadores: {elapsed:.3f}s (referência {baseline:.3f}s)",
+                    )
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SeedAndBenchTests(TestCase):
+
+    def test_command_reports_percentiles_and_cleans_up(self):
+        previous = Tournament.objects.current()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            out = StringIO()
+            call_command(
+                'seed_and_bench', '--players', '6', '--iterations', '3', '--warmup', '1',
+                '--concurrency', '1', '--targets', 'leaderboard', 'admin-save',
+                '--json', path, stdout=out, stderr=StringIO(),
+            )
+            with open(path) as handle:
+                report = json.load(handle)
+
+        self.assertIn('p95 ms', out.getvalue())
+        self.assertEqual(set(report['results']), {'leaderboard', 'admin-save'})
+        for row in report['results'].values():
+            self.assertEqual((row['requests'], row['errors']), (3, 0))
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+        self.assertEqual(report['config']['players'], 6)
+
+        # Campeonato sintético apagado e o anterior reativado.
+        self.assertEqual(Tournament.objects.get(is_active=True), previous)
+        self.assertFalse(Player.objects.filter(username__startswith='bench').exists())
+
+
+@override_settings(CACHES=NO_CACHE)
+class AsyncPublicViewsTests(TestCase):
+
+    def setUp(self):
+        players = make_players(4)
+        tournament = Tournament.objects.current()
+        Match.objects.bulk_create([
+            Match(player1=players[0], player2=players[1], series_winner=players[0],
+                  status=STATUS_COMPLETED, round_number=1, tournament=tournament),
+            Match(player1=players[2], player2=players[3], round_number=2, tournament=tournament),
+        ])
+        standings.ensure_standings(tournament.pk, [p.pk for p in players])
+        self.profile_url = reverse('player-profile', args=[players[0].username])
+
+    def fetch_all(self, async_views):
+        with override_settings(ROOT_URLCONF=benchmark.urlconf(async_views)):
+            return [
+                self.client.get(url).content
+                for url in (reverse('leaderboard'), reverse('match-list'), reverse('playoffs'), self.profile_url)
+            ]
+
+    def test_sync_and_async_views_render_the_same_pages(self):
+        self.assertEqual(self.fetch_all(async_views=False), self.fetch_all(async_views=True))
+
+    def test_async_profile_404(self):
+        with override_settings(ROOT_URLCONF=benchmark.urlconf(True)):
+            response = self.client.get(reverse('player-profile', args=['ninguem']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_asgi_runner(self):
+        # Página sem banco: as requisições ASGI rodam em outras threads (outras conexões).
+        row = benchmark.run_asgi_target('livestream', iterations=4, warmup=1, concurrency=2)
+        self.assertEqual((row['requests'], row['errors']), (4, 0))
+        self.assertEqual(row['queries_per_request'], 0)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ReplicaRoutingTests(TestCase):
+    """ Decisão do router/decorator, sem precisar de um segundo banco. """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(setattr, replica, '_replica_down_until', 0.0)
+        self.factory = RequestFactory()
+        self.routes = []
+
+        @replica.replica_reads
+        def view(request):
+            self.routes.append(replica.PrimaryReplicaRouter().db_for_read(Player))
+            return HttpResponse()
+        self.view = view
+
+    def route(self, request=None, configured=True):
+        with mock.patch.object(replica, 'replica_configured', return_value=configured):
+            self.view(request or self.factory.get('/'))
+        return self.routes[-1]
+
+    def test_public_reads_go_to_replica(self):
+        self.assertEqual(self.route(), 'replica')
+        # Fora da view, e sem réplica configurada, o primário (padrão do Django).
+        self.assertIsNone(replica.PrimaryReplicaRouter().db_for_read(Player))
+        self.assertIsNone(self.route(configured=False))
+        self.assertEqual(replica.PrimaryReplicaRouter().db_for_write(Player), 'default')
+
+    def test_read_your_writes(self):
+        request = self.factory.get('/')
+        request.COOKIES[replica.PIN_COOKIE] = '1'
+        self.assertIsNone(self.route(request))
+        with replica.use_primary():
+            self.assertIsNone(self.route())
+        # Resultado recém-salvo: todo mundo no primário durante REPLICA_PIN_SECONDS.
+        caching.bump_version()
+        self.assertIsNone(self.route())
+
+    def test_failover_to_primary(self):
+        @replica.replica_reads
+        def flaky(request):
+            route = replica.PrimaryReplicaRouter().db_for_read(Player)
+            self.routes.append(route)
+            if route == 'replica':
+                raise OperationalError("connection refused")
+            return HttpResponse()
+
+        with mock.patch.object(replica, 'replica_configured', return_value=True):
+            self.assertEqual(flaky(self.factory.get('/')).status_code, 200)
+            self.assertEqual(self.routes, ['replica', None])
+            flaky(self.factory.get('/'))  # réplica fora por REPLICA_RETRY_SECONDS
+        self.assertEqual(self.routes, ['replica', None, None])
+
+    def test_pin_cookie_after_save(self):
+        middleware = replica.PrimaryPinMiddleware(lambda request: HttpResponse(status=302))
+        with mock.patch.object(replica, 'replica_configured', return_value=True):
+            self.assertIn(replica.PIN_COOKIE, middleware(self.factory.post('/admin/')).cookies)
+            self.assertNotIn(replica.PIN_COOKIE, middleware(self.factory.get('/admin/')).cookies)
+        with mock.patch.object(replica, 'replica_configured', return_value=False):
+            self.assertNotIn(replica.PIN_COOKIE, middleware(self.factory.post('/admin/')).cookies)
+
+
+@skipUnless('replica' in settings.DATABASES, "defina DATABASE_REPLICA_URL (ex.: sqlite:////tmp/replica.sqlite3)")
+@override_settings(CACHES=NO_CACHE)
+class ReplicaDatabaseTests(TestCase):
+    """
+    Dois bancos locais: dados diferentes em cada um mostram de onde a página leu.
+    Rodar à parte (as outras classes usam só o primário):
+    DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 python manage.py test roundRobin.tests.ReplicaDatabaseTests
+    """
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        make_players(2, prefix="Primario")
+        tournament = Tournament.objects.using('replica').create(name="Réplica", is_active=True)
+        players = Player.objects.using('replica').bulk_create([Player(username="Replica0")])
+        Standing.objects.using('replica').bulk_create([Standing(tournament=tournament, player=players[0])])
+
+    def usernames(self):
+        response = self.client.get(reverse('api-leaderboard'))
+        return [row['username'] for row in response.json()['standings']]
+
+    def test_public_pages_read_from_replica(self):
+        self.assertEqual(self.usernames(), ["Replica0"])
+        self.assertContains(self.client.get(reverse('leaderboard')), "Replica0")
+
+    def test_pinned_session_reads_from_primary(self):
+        self.client.cookies[replica.PIN_COOKIE] = '1'
+        self.assertEqual(sorted(self.usernames()), ["Primario0", "Primario1"])
+
+
+@override_settings(CACHES=NO_CACHE)
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(METRICS_DIR=directory.name))
+        self.directory = directory.name
+        make_players(2)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('leaderboard'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="1 consultas"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_aggregate_all_worker_files(self):
+        self.client.get(reverse('leaderboard'))
+        self.client.get(reverse('leaderboard'))
+
+        # Arquivo de outro worker vivo (outro pid) com uma requisição já gravada,
+        # e o de um worker que já morreu, que não entra na soma.
+        row = [['ipx1_request_queries', 'leaderboard', [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1.0, 1]]]
+        dead = os.path.join(self.directory, 'metrics-999999.json')
+        for path in (os.path.join(self.directory, f'metrics-{os.getppid()}.json'), dead):
+            with open(path, 'w') as handle:
+                json.dump(row, handle)
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE ipx1_request_duration_seconds histogram', body)
+        self.assertIn('ipx1_request_duration_seconds_count{view="leaderboard"} 2', body)
+        self.assertIn('ipx1_request_queries_count{view="leaderboard"} 3', body)
+        self.assertIn('ipx1_request_queries_bucket{view="leaderboard",le="1"} 3', body)
+        self.assertIn('ipx1_request_queries_sum{view="leaderboard"} 3.000000', body)
+        self.assertFalse(os.path.exists(dead))
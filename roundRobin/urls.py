@@ -1,14 +1,41 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from . import async_views
+from . import api
+from . import events
+from . import metrics
 from django.views.generic import RedirectView
 
-urlpatterns = [
-    path('', RedirectView.as_view(pattern_name='leaderboard'), name='home'),
-    
-    # path('admin/approval', views.admin_player_approval_view, name="admin-approval"),
 
-    path('livestream/', views.livestream_view, name='livestream'),
-    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
-    path('matches/', views.match_list_view, name='match-list'),
-    path('playoffs/', views.playoffs_view, name='playoffs'),
-]
\ No newline at end of file
+def build_urlpatterns(async_public_views):
+    """
+    Rotas do app. As páginas públicas usam as views async (async_views.py)
+    ou sync (views.py); o benchmark (seed_and_bench --asgi) monta as duas.
+    """
+    public = async_views if async_public_views else views
+    return [
+        path('', RedirectView.as_view(pattern_name='leaderboard'), name='home'),
+
+        # path('admin/approval', views.admin_player_approval_view, name="admin-approval"),
+
+        path('livestream/', views.livestream_view, name='livestream'),
+        path('live/events/', events.live_events_view, name='live-events'),
+        path('leaderboard/', public.leaderboard_view, name='leaderboard'),
+        path('matches/', public.match_list_view, name='match-list'),
+        path('playoffs/', public.playoffs_view, name='playoffs'),
+        path('players/<path:username>/', public.player_profile_view, name='player-profile'),
+
+        # --- API JSON (somente leitura) ---
+        path('api/leaderboard', api.api_leaderboard, name='api-leaderboard'),
+        path('api/standings/history', api.api_standings_history, name='api-standings-history'),
+        path('api/matches', api.api_matches, name='api-matches'),
+        path('api/playoffs', api.api_playoffs, name='api-playoffs'),
+        path('api/h2h/<str:player1>/<str:player2>', api.api_head_to_head, name='api-h2h'),
+
+        # Métricas (Prometheus); bloqueado no nginx, raspado direto em web:8000.
+        path('metrics', metrics.metrics_view, name='metrics'),
+    ]
+
+
+urlpatterns = build_urlpatterns(settings.ASYNC_PUBLIC_VIEWS)
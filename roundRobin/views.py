@@ -1,91 +1,251 @@
-from django.shortcuts import render
-from .models import Player, Match, TOTAL_ROUNDS, STATUS_COMPLETED, STATUS_SCHEDULED
+from itertools import groupby
+from operator import attrgetter
 
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from .caching import cached_page, round_fragment_keys
+from .replica import replica_reads
+from . import playoffs
+from . import standings
+from .models import Tournament, Player, Match, Standing, STATUS_COMPLETED, STATUS_SCHEDULED
+
+@cached_page('leaderboard')
+@replica_reads
 def leaderboard_view(request):
     """
-    Busca todos os jogadores e os ordena pelos critérios de desempate
-    (Séries > T.M.V. > Saldo K/D) para exibir na tabela.
+    Busca todos os jogadores já ordenados pelos critérios de desempate
+    (Pontos > Confronto direto > Séries > Saldo K/D > Farm > T.M.V.) para
+    exibir na tabela.
     """
     
-    # 1. Pega todos os jogadores
-    # (Se você já tivesse o 'is_approved', filtraria aqui)
-    all_players = Player.objects.all() 
-
-    # 2. Ordena a lista em Python usando sorted()
-    #    'key=lambda p:' é uma mini-função que diz ao sorted() como comparar.
-    
-    sorted_players = sorted(
-        all_players, 
-        key=lambda p: (
-            -p.points,
-            -p.series_wins,           
-            -p.kill_death_balance,
-            -p.total_farm,
-            p.average_win_time, 
-        )
-    )
-    
+    # Uma única consulta na tabela materializada, só do campeonato ativo:
+    # o ORDER BY usa o índice 'standing_rank_idx' (ver roundRobin/standings.py).
+    # O confronto direto reordena só os grupos empatados em pontos (h2h.py).
     context = {
-        'players': sorted_players
+        'standings': standings.apply_head_to_head(
+            Standing.objects.filter(tournament__is_active=True).select_related('player')
+        )
     }
     
     return render(request, 'roundRobin/leaderboard.html', context)
 
+@cached_page('playoffs')
+@replica_reads
 def playoffs_view(request):
-    all_players = Player.objects.all()
+    """
+    Chave dos playoffs do campeonato ativo. Sem chave cadastrada, mostra a
+    prévia com os 4 primeiros da classificação. Custo constante: a chave vem
+    do cache de fragmentos e a prévia usa um LIMIT 4 no SQL (ver playoffs.py).
+    """
+    bracket = playoffs.active_bracket()
+    if bracket is not None:
+        return render(request, 'roundRobin/playoffs.html', {
+            'bracket_html': playoffs.render_bracket(bracket),
+            'not_enough_players': False,
+        })
 
-    sorted_players = sorted(all_players, key=lambda p: (
-            -p.points,
-            -p.series_wins,           
-            -p.kill_death_balance,
-            -p.total_farm,
-            p.average_win_time, 
-        ))
+    top_players = [
+        s.player for s in standings.top_standings(
+            Standing.objects.filter(tournament__is_active=True).select_related('player'), playoffs.PREVIEW_SIZE
+        )
+    ]
 
-    if len(sorted_players) < 4:
+    if len(top_players) < playoffs.PREVIEW_SIZE:
         return render(request, 'roundRobin/playoffs.html', {
             'not_enough_players': True
     })
 
     context = {
-        'first_place': sorted_players[0],
-        'second_place': sorted_players[1],
-        'third_place': sorted_players[2],
-        'fourth_place': sorted_players[3],
+        'bracket_html': playoffs.render_preview(top_players),
+        'is_preview': True,
         'not_enough_players': False
     }
     
     return render(request, 'roundRobin/playoffs.html', context)
 
-def match_list_view(request):
+# Constantes de status para os templates.
+STATUSES = {
+    'STATUS_COMPLETED': STATUS_COMPLETED,
+    'STATUS_SCHEDULED': STATUS_SCHEDULED,
+}
+
+
+# --- LISTA DE PARTIDAS ---
+# As consultas e a montagem ficam em funções separadas para a versão async
+# (async_views.py) usar exatamente a mesma lógica, mudando só o acesso ao banco.
+
+def round_summary(matches):
+    """ 1 consulta agregada: quantos confrontos cada rodada tem e quantos acabaram. """
+    return (
+        matches.values('tournament_id', 'round_number')
+        .annotate(total=Count('pk'), completed=Count('pk', filter=Q(status=STATUS_COMPLETED)))
+        .order_by('round_number')
+    )
+
+
+def finished_round_keys(rounds):
+    """ {rodada: chave do fragmento} das rodadas em que todos os confrontos acabaram. """
+    if not rounds:
+        return {}
+    finished = [r['round_number'] for r in rounds if r['completed'] == r['total']]
+    return round_fragment_keys(rounds[0]['tournament_id'], finished)
+
+
+def live_matches_queryset(matches, cached_rounds):
+    """ Mais duas consultas (JOIN dos jogadores + prefetch dos jogos), só das rodadas fora do cache. """
+    return (
+        matches
+        .exclude(round_number__in=cached_rounds)
+        .select_related('player1', 'player2', 'series_winner')
+        .prefetch_related('games')
+        .order_by('round_number', 'scheduled_time', 'pk')
+    )
+
+
+def assemble_rounds(rounds, finished_keys, cached_html, live_matches):
     """
-    Busca TODAS as partidas e as organiza por rodada.
+    Monta a lista de rodadas do template. Rodadas encerradas que não estavam
+    no cache são renderizadas aqui; devolve também os fragmentos novos
+    ({chave: html}) para quem chamou guardar.
     """
-    
+    # Agrupa em uma única passada (a lista já vem ordenada por rodada),
+    # funcionando para qualquer número de rodadas.
+    live_rounds = {
+        round_num: list(matches_in_round) # Passa a lista de objetos Match direto
+        for round_num, matches_in_round in groupby(live_matches, key=attrgetter('round_number'))
+    }
+
     rounds_data = []
-    
-    # Apenas UMA consulta em 'Match'
-    all_matches = Match.objects.all().order_by('round_number', 'scheduled_time')
-    
-    for round_num in range(1, TOTAL_ROUNDS + 1):
-        # Filtra as partidas em Python (mais rápido do que 10 consultas)
-        matches_in_round = [m for m in all_matches if m.round_number == round_num]
-        
-        if matches_in_round:
-            rounds_data.append({
-                'round_number': round_num,
-                'matches': matches_in_round # Passa a lista de objetos Match direto
-            })
+    new_fragments = {}
+    for row in rounds:
+        round_num = row['round_number']
+        if round_num in cached_html:
+            rounds_data.append({'round_number': round_num, 'html': cached_html[round_num]})
+            continue
+
+        round_data = {'round_number': round_num, 'matches': live_rounds[round_num]}
+        if round_num in finished_keys:
+            # Rodada encerrada fora do cache: renderiza uma vez e guarda sem prazo.
+            round_data['html'] = render_to_string(
+                'roundRobin/match_list_round.html', {'round_data': round_data, **STATUSES}
+            )
+            new_fragments[finished_keys[round_num]] = round_data['html']
+        rounds_data.append(round_data)
+    return rounds_data, new_fragments
+
+
+@cached_page('match-list')
+@replica_reads
+def match_list_view(request):
+    """
+    Busca TODAS as partidas do campeonato ativo e as organiza por rodada.
+
+    Rodadas encerradas (todos os confrontos 'Concluídos') vêm prontas do
+    cache de fragmentos; só as rodadas em andamento/agendadas são buscadas
+    no banco e renderizadas a cada acesso.
+    """
+    matches = Match.objects.filter(tournament__is_active=True)
+
+    rounds = list(round_summary(matches))
+    finished_keys = finished_round_keys(rounds)
+    fragments = cache.get_many(finished_keys.values())
+    cached_html = {
+        number: fragments[key] for number, key in finished_keys.items() if key in fragments
+    }
+
+    live_matches = []
+    if len(cached_html) < len(rounds):
+        live_matches = live_matches_queryset(matches, cached_html.keys())
+
+    rounds_data, new_fragments = assemble_rounds(rounds, finished_keys, cached_html, live_matches)
+    if new_fragments:
+        cache.set_many(new_fragments, None)
 
     context = {
         'rounds_list': rounds_data,
-        
-        # NOVO: Passamos as constantes de status para o template
-        'STATUS_COMPLETED': STATUS_COMPLETED,
-        'STATUS_SCHEDULED': STATUS_SCHEDULED,
+        **STATUSES,
     }
     
     return render(request, 'roundRobin/match_list.html', context)
 
+# Confrontos por página no histórico do jogador.
+HISTORY_PAGE_SIZE = 20
+
+
+def parse_cursor(value):
+    """ Cursor do histórico: "<rodada>-<id>" do último confronto da página anterior. """
+    round_number, _, pk = (value or '').partition('-')
+    if not (round_number.isdigit() and pk.isdigit()):
+        return None
+    return int(round_number), int(pk)
+
+
+def profile_players():
+    """
+    Jogadores com séries e pontos do campeonato ativo (não a soma de todas as
+    temporadas). O campeonato entra como subconsulta: continua UMA consulta.
+    """
+    return Player.objects.with_standings(Tournament.objects.filter(is_active=True)[:1])
+
+
+def profile_matches(player):
+    """ Confrontos do jogador no campeonato ativo, na ordem do cursor (rodada, id). """
+    return (
+        Match.objects
+        .filter(tournament__is_active=True)
+        .filter(Q(player1=player) | Q(player2=player))
+        .select_related('player1', 'player2', 'series_winner')
+        .order_by('round_number', 'pk')
+    )
+
+
+def history_page_queryset(matches, cursor):
+    """ Uma página do histórico: "WHERE (rodada, id) > cursor LIMIT n+1" (o +1 diz se há próxima). """
+    history = matches.filter(status=STATUS_COMPLETED).prefetch_related('games')
+    if cursor is not None:
+        round_number, pk = cursor
+        history = history.filter(Q(round_number__gt=round_number) | Q(round_number=round_number, pk__gt=pk))
+    return history[:HISTORY_PAGE_SIZE + 1]
+
+
+def profile_context(player, page, upcoming, cursor):
+    next_cursor = None
+    if len(page) > HISTORY_PAGE_SIZE:
+        page = page[:HISTORY_PAGE_SIZE]
+        next_cursor = f"{page[-1].round_number}-{page[-1].pk}"
+    return {
+        'player': player,
+        'rounds_list': [
+            {'round_number': round_num, 'matches': list(round_matches)}
+            for round_num, round_matches in groupby(page, key=attrgetter('round_number'))
+        ],
+        'upcoming': upcoming,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+        **STATUSES,
+    }
+
+
+@cached_page('player-profile', params=('after',))
+@replica_reads
+def player_profile_view(request, username):
+    """
+    Perfil do jogador: estatísticas da carreira (propriedades do Player) e o
+    histórico de séries no campeonato ativo, paginado por cursor (keyset) em
+    (rodada, id): cada página é um "WHERE (rodada, id) > cursor LIMIT n",
+    então a página 50 custa o mesmo que a primeira. Índices usados:
+    match_p1_status_idx / match_p2_status_idx.
+    """
+    # Uma consulta: as contagens de séries vêm anotadas (sem COUNT por propriedade).
+    player = get_object_or_404(profile_players(), username=username)
+
+    matches = profile_matches(player)
+    cursor = parse_cursor(request.GET.get('after'))
+    page = list(history_page_queryset(matches, cursor))
+    upcoming = list(matches.filter(status=STATUS_SCHEDULED)[:5])
+    return render(request, 'roundRobin/player_profile.html', profile_context(player, page, upcoming, cursor))
+
 def livestream_view(request):
     return render(request, 'roundRobin/livestream.html')
\ No newline at end of file